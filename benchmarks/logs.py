@@ -0,0 +1,76 @@
+"""
+Synthetic logs for the benchmarks.
+
+By default the logs are resampled from the BPIC19 log in ``data``: every
+synthetic case is a copy of a randomly drawn case of the source log, so the
+activity and variant distributions, trace lengths and case attributes are
+those of the real process at any size. The resampling works on the columns
+of the source log at once, which is much faster than ``util.generator`` for
+millions of cases. Logs of the parameterised process model, with injected
+violations, come from ``util.generator``.
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+from util import generator, load_event_log
+from util.event_log import EventLog
+
+SOURCE = Path(__file__).parents[1] / "data" / "BPI_Challenge_2019-3-w-after.xes.gz"
+PREFIX = "{http://www.xes-standard.org}"
+
+
+def source_log() -> EventLog:
+    """
+    :return: the BPIC19 log, parsed once and cached next to the file
+    """
+
+    return load_event_log(SOURCE, PREFIX, cache=True)
+
+
+def sample_log(source: EventLog, cases: int, seed=0) -> EventLog:
+    """
+    Draw cases of the source log with replacement.
+
+    :param source: log to sample from
+    :param cases: number of cases of the synthetic log
+    :param seed: seed of the random generator
+    :return: event log with the case ids "synthetic_0", "synthetic_1", ...
+    """
+
+    picks = np.random.default_rng(seed).integers(0, len(source), cases)
+
+    lengths = source.trace_lengths()[picks]
+    offsets = np.zeros(cases + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    # position of every synthetic event in the source columns
+    index = np.repeat(source.offsets[picks] - offsets[:-1], lengths)
+    index += np.arange(offsets[-1])
+
+    case_ids = np.empty(cases, dtype=object)
+    case_ids[:] = ["synthetic_%d" % i for i in range(cases)]
+
+    return EventLog(
+        source.activities,
+        source.codes[index],
+        offsets,
+        source.timestamps[index],
+        case_ids,
+        {name: column[picks] for name, column in source.attributes.items()},
+        source.utc_offsets[index],
+    )
+
+
+def process_log(cases: int, violations: dict = None, seed=0) -> EventLog:
+    """
+    :param cases: number of cases
+    :param violations: injected violations, see ``util.generator.VIOLATIONS``
+    :param seed: seed of the random generator
+    :return: event log of the 3-way matching process model
+    """
+
+    return EventLog.from_traces(
+        generator.generate(cases, generator.ProcessModel(), violations, seed)
+    )
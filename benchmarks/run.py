@@ -0,0 +1,288 @@
+"""
+Benchmarks of the importer and the ``Rule_Checker`` checks.
+
+Every benchmark runs in a forked process on a synthetic log of the requested
+size (see ``benchmarks.logs``) and reports the best and median wall time of
+several repetitions, the throughput in events per second, how far the peak
+resident set size of the process rose above its size at the fork and the peak
+of the memory allocated by Python (tracemalloc, measured in a separate
+repetition).
+
+Results can be saved as a JSON baseline and later runs compared against it;
+a benchmark that got slower or allocates more than the tolerance allows fails
+the run with exit code 1.
+
+Example::
+
+    python -m benchmarks.run --sizes 10000 100000 --save baseline.json
+    python -m benchmarks.run --sizes 10000 100000 --baseline baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from conformance_checking.rule_base import Rule_Checker
+from util import generator, import_xes_log, load_event_log
+
+from . import logs
+
+RGR = "Record Goods Receipt"
+RIR = "Record Invoice Receipt"
+CI = "Clear Invoice"
+VCI = "Vendor creates invoice"
+CPOI = "Create Purchase Order Item"
+
+# name -> call on a fresh Rule_Checker and the log, with the activities of the
+# 3-way matching scripts
+CHECKS = {
+    "check_cardinality": lambda rc, log: rc.check_cardinality(log, CI, 1, 1),
+    "check_order_loop_count": lambda rc, log: rc.check_order_loop_count(log, RGR, RIR),
+    "check_rir_rgr": lambda rc, log: rc.check_rir_rgr(log),
+    "check_rgr_ci": lambda rc, log: rc.check_rgr_ci(log),
+    "check_rir_ci": lambda rc, log: rc.check_rir_ci(log, with_throughput=True),
+    "check_order": lambda rc, log: rc.check_order(log, RGR, RIR),
+    "check_response": lambda rc, log: rc.check_response(log, RIR, CI),
+    "check_response_single": lambda rc, log: rc.check_response(log, RIR, CI, True),
+    "check_precedence": lambda rc, log: rc.check_precedence(log, RGR, CI),
+    "check_precedence_single": lambda rc, log: rc.check_precedence(log, VCI, RIR, True),
+    "check_exclusive": lambda rc, log: rc.check_exclusive(log, RGR, VCI),
+    "make_throughout_analysis": lambda rc, log: rc.make_throughout_analysis(
+        log, CPOI, RGR
+    ),
+}
+
+# name -> call on the path of a synthetic XES file
+IMPORTS = {
+    "import_xes_log": lambda file: import_xes_log(file, logs.PREFIX),
+    "load_event_log": lambda file: load_event_log(file, logs.PREFIX),
+}
+
+# "encoded" runs the checks on an EventLog, "traces" on the list of trace dicts
+# returned by import_xes_log
+KINDS = ("encoded", "traces")
+
+
+def measure(function, events: int, repeat: int) -> dict:
+    """
+    Time a function in a forked process.
+
+    :param function: callable without arguments
+    :param events: number of events processed by one call
+    :param repeat: number of timed calls
+    :return: result of the benchmark
+    """
+
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure, args=(function, repeat, sender))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        raise RuntimeError("benchmark process failed") from None
+    finally:
+        process.join()
+
+    if isinstance(result, BaseException):
+        raise result
+
+    result["events"] = events
+    result["events_per_second"] = events / result["seconds"]
+    return result
+
+
+def _measure(function, repeat: int, sender):
+    try:
+        # the forked process starts with the memory of the parent, only the
+        # growth above it belongs to the benchmark
+        start_rss = _rss()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                function()
+                times.append(time.perf_counter() - start)
+
+            tracemalloc.start()
+            function()
+            _, peak_alloc = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        sender.send(
+            {
+                "seconds": min(times),
+                "median": statistics.median(times),
+                "peak_rss": max(_peak_rss() - start_rss, 0),
+                "peak_alloc": peak_alloc,
+            }
+        )
+    except Exception as error:
+        sender.send(error)
+    finally:
+        sender.close()
+
+
+def _rss() -> int:
+    """
+    :return: current resident set size of this process in bytes
+    """
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # no procfs, the peak so far is the closest value
+        return _peak_rss()
+
+
+def _peak_rss() -> int:
+    # kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run(sizes: list, kinds=KINDS, select="", repeat=3, seed=0, model="sample"):
+    """
+    Run the benchmarks.
+
+    :param sizes: numbers of cases of the synthetic logs
+    :param kinds: log representations to run the checks on, see KINDS
+    :param select: run only the benchmarks whose name contains this string
+    :param repeat: number of timed calls per benchmark
+    :param seed: seed of the synthetic logs
+    :param model: "sample" to resample the BPIC19 log, "process" for the
+    process model of ``util.generator``
+    :return: iterator of (key, result), the key is
+    "<name>[<size>,<kind>,<model>]", without the kind for the imports
+    """
+
+    if model == "sample":
+        with contextlib.redirect_stdout(io.StringIO()):
+            source = logs.source_log()
+
+    for size in sizes:
+        if model == "sample":
+            log = logs.sample_log(source, size, seed)
+        else:
+            log = logs.process_log(size, seed=seed)
+        events = log.n_events
+
+        imports = {name: f for name, f in IMPORTS.items() if select in name}
+        if imports:
+            with tempfile.TemporaryDirectory() as directory:
+                file = os.path.join(directory, "synthetic.xes")
+                generator.write_xes(log, file)
+                for name, function in imports.items():
+                    result = measure(lambda: function(file), events, repeat)
+                    yield "%s[%d,%s]" % (name, size, model), result
+
+        for kind in kinds:
+            checks = {name: f for name, f in CHECKS.items() if select in name}
+            if not checks:
+                continue
+            traces = log if kind == "encoded" else [dict(trace) for trace in log]
+            for name, result in _measure_checks(checks, traces, events, repeat):
+                yield "%s[%d,%s,%s]" % (name, size, kind, model), result
+            del traces
+
+
+def _measure_checks(checks: dict, log, events: int, repeat: int):
+    for name, check in checks.items():
+        # fresh checker, so memoized throughput times do not carry over
+        yield name, measure(lambda: check(Rule_Checker(), log), events, repeat)
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    :param results: key -> result of this run
+    :param baseline: key -> result of the baseline run
+    :param tolerance: accepted relative increase, e.g. 0.25 for 25%
+    :return: descriptions of the regressions
+    """
+
+    found = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        for metric in ("seconds", "peak_alloc"):
+            old, new = baseline[key][metric], result[metric]
+            if new > old * (1 + tolerance):
+                found.append(
+                    "%s: %s %.4g -> %.4g (%+.0f%%)"
+                    % (key, metric, old, new, 100 * (new / old - 1))
+                )
+    return found
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS))
+    parser.add_argument("--select", default="", help="substring of the names")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", choices=("sample", "process"), default="sample")
+    parser.add_argument("--save", help="write the results as baseline JSON")
+    parser.add_argument("--baseline", help="compare against a baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    print(
+        "%-50s %10s %10s %14s %10s %10s"
+        % ("benchmark", "best s", "median s", "events/s", "rss MB", "alloc MB")
+    )
+
+    results = {}
+    for key, result in run(
+        args.sizes, args.kinds, args.select, args.repeat, args.seed, args.model
+    ):
+        results[key] = result
+        print(
+            "%-50s %10.4f %10.4f %14.0f %10.1f %10.1f"
+            % (
+                key,
+                result["seconds"],
+                result["median"],
+                result["events_per_second"],
+                result["peak_rss"] / 2**20,
+                result["peak_alloc"] / 2**20,
+            ),
+            flush=True,
+        )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not results.keys() & baseline.keys():
+            print(
+                "\nNo benchmark of this run is in the baseline, check --sizes,"
+                " --kinds and --model",
+                file=sys.stderr,
+            )
+        found = regressions(results, baseline, args.tolerance)
+        if found:
+            print("\nREGRESSIONS:", file=sys.stderr)
+            for line in found:
+                print("  " + line, file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
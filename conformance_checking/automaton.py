@@ -0,0 +1,511 @@
+"""
+Rules compiled into counter automata over integer activity codes.
+
+Every rule is a small finite-state machine with one integer counter. The
+activities of the rule are mapped to classes (0 for all other activities) and
+the transitions are stored in NumPy tables indexed by
+``[state, class, counter > 0]``. A single generic evaluator runs any such
+automaton over all traces of an ``EventLog`` at once: events of other
+activities never change the state, so they are dropped first, and the
+remaining events are processed position by position across all traces.
+
+If Numba is installed, a compiled per-trace kernel is used instead.
+"""
+
+import numpy as np
+
+from util import EventLog
+
+try:
+    import numba
+except ImportError:  # optional, the NumPy evaluator is used without it
+    numba = None
+
+
+class Automaton:
+    """
+    Counter automaton compiled into transition tables.
+
+    For every trace the evaluator reports whether the final state is a
+    candidate state and the number of violations: the violations emitted by
+    the transitions, plus ``final_emit[state]``, plus
+    ``final_counter[state] * counter``, plus ``final_nonzero[state]`` if the
+    counter is not zero.
+    """
+
+    def __init__(
+        self,
+        activities: tuple,
+        next_state: np.ndarray,
+        counter_delta: np.ndarray,
+        emit: np.ndarray,
+        candidate: np.ndarray,
+        final_emit: np.ndarray,
+        final_counter: np.ndarray,
+        final_nonzero: np.ndarray,
+    ):
+        self.activities = activities
+        self.next_state = next_state
+        self.counter_delta = counter_delta
+        self.emit = emit
+        self.candidate = candidate
+        self.final_emit = final_emit
+        self.final_counter = final_counter
+        self.final_nonzero = final_nonzero
+
+    @classmethod
+    def compile(
+        cls,
+        activities: tuple,
+        n_states: int,
+        step,
+        candidate: list,
+        final_emit: list = None,
+        final_counter: list = None,
+        final_nonzero: list = None,
+    ):
+        """
+        Build the transition tables from a step function.
+
+        Activities occurring more than once in ``activities`` get the class of
+        their first occurrence, like the if/elif chains of the checks.
+
+        :param activities: activities of the rule, the activity at position i
+        has class i + 1
+        :param n_states: number of states, 0 is the initial state
+        :param step: function(state, class, counter > 0) -> (next state,
+        counter delta, emitted violations), only called for classes > 0
+        :param candidate: per state, whether a trace ending there is a candidate
+        :param final_emit: per state, violations emitted at the end
+        :param final_counter: per state, weight of the counter at the end
+        :param final_nonzero: per state, violations if the counter is not zero
+        :return: automaton
+        """
+
+        shape = (n_states, len(activities) + 1, 2)
+
+        next_state = np.empty(shape, dtype=np.int8)
+        next_state[:] = np.arange(n_states, dtype=np.int8)[:, None, None]
+        counter_delta = np.zeros(shape, dtype=np.int8)
+        emit = np.zeros(shape, dtype=np.int8)
+
+        for s in range(n_states):
+            for c in range(1, len(activities) + 1):
+                for z in (0, 1):
+                    next_state[s, c, z], counter_delta[s, c, z], emit[s, c, z] = step(
+                        s, c, z
+                    )
+
+        def per_state(values):
+            if values is None:
+                return np.zeros(n_states, dtype=np.int8)
+            return np.asarray(values, dtype=np.int8)
+
+        return cls(
+            tuple(activities),
+            next_state,
+            counter_delta,
+            emit,
+            per_state(candidate).astype(bool),
+            per_state(final_emit),
+            per_state(final_counter),
+            per_state(final_nonzero),
+        )
+
+    def result(self, state: int, counter: int, emitted: int) -> tuple:
+        """
+        :param state: final state of a trace
+        :param counter: final counter of the trace
+        :param emitted: violations emitted by the transitions
+        :return: whether the trace is a candidate and its number of violations,
+        like :func:`evaluate` for one trace
+        """
+
+        if not self.candidate[state]:
+            return False, 0
+        return True, int(
+            emitted
+            + self.final_emit[state]
+            + self.final_counter[state] * counter
+            + self.final_nonzero[state] * (counter != 0)
+        )
+
+    def classes(self, log: EventLog) -> np.ndarray:
+        """
+        :param log: event log
+        :return: class of every activity code of the log
+        """
+
+        classes = np.zeros(len(log.activities), dtype=np.int8)
+        for c, activity in reversed(list(enumerate(self.activities, 1))):
+            code = log.code(activity)
+            if code >= 0:
+                classes[code] = c
+        return classes
+
+
+def evaluate(automaton: Automaton, log: EventLog):
+    """
+    Run the automaton over every trace of the log.
+
+    :param automaton: compiled rule
+    :param log: event log
+    :return: per trace, whether it is a candidate and its number of violations
+    """
+
+    # events of other activities keep the state, only visit the occurrences of
+    # the rule activities
+    relevant = log.inverted_index().union(automaton.activities)
+    classes = automaton.classes(log)[log.codes[relevant]]
+    cases = log.event_cases[relevant]
+
+    # the traces with at least one of them, the others end in the initial state
+    first = np.ones(len(cases), dtype=bool)
+    np.not_equal(cases[1:], cases[:-1], out=first[1:])
+    traces = cases[first]
+    offsets = np.append(np.flatnonzero(first), len(cases))
+
+    tables = (
+        automaton.next_state,
+        automaton.counter_delta,
+        automaton.emit,
+    )
+
+    run = _kernel if numba is not None else _run_batched
+
+    state = np.zeros(len(log), dtype=np.int8)
+    counter = np.zeros(len(log), dtype=np.int64)
+    emitted = np.zeros(len(log), dtype=np.int64)
+    state[traces], counter[traces], emitted[traces] = run(classes, offsets, *tables)
+
+    violations = (
+        emitted
+        + automaton.final_emit[state]
+        + automaton.final_counter[state] * counter
+        + automaton.final_nonzero[state] * (counter != 0)
+    )
+    candidate = automaton.candidate[state]
+
+    return candidate, np.where(candidate, violations, 0)
+
+
+def _run_batched(classes, offsets, next_state, counter_delta, emit):
+    """
+    Process the k-th event of all traces at once, for k = 0, 1, ...
+    """
+
+    n = len(offsets) - 1
+    lengths = np.diff(offsets)
+
+    # longest traces first, the active traces of step k are then a prefix
+    order = np.argsort(-lengths, kind="stable")
+    starts = offsets[:-1][order]
+    active = np.searchsorted(
+        -lengths[order], -np.arange(lengths.max(initial=0)), "left"
+    )
+
+    state = np.zeros(n, dtype=np.int8)
+    counter = np.zeros(n, dtype=np.int64)
+    emitted = np.zeros(n, dtype=np.int64)
+
+    for k, m in enumerate(active):
+        c = classes[starts[:m] + k]
+        s = state[:m]
+        z = (counter[:m] > 0).view(np.int8)
+
+        emitted[:m] += emit[s, c, z]
+        counter[:m] += counter_delta[s, c, z]
+        state[:m] = next_state[s, c, z]
+
+    inverse = np.empty(n, dtype=np.int64)
+    inverse[order] = np.arange(n)
+
+    return state[inverse], counter[inverse], emitted[inverse]
+
+
+def _run_loop(classes, offsets, next_state, counter_delta, emit):
+    """
+    Process one trace after the other, the kernel compiled with Numba.
+    """
+
+    n = len(offsets) - 1
+
+    state = np.zeros(n, dtype=np.int8)
+    counter = np.zeros(n, dtype=np.int64)
+    emitted = np.zeros(n, dtype=np.int64)
+
+    for t in range(n):
+        s = 0
+        k = 0
+        e = 0
+        for i in range(offsets[t], offsets[t + 1]):
+            c = classes[i]
+            z = 1 if k > 0 else 0
+            e += emit[s, c, z]
+            k += counter_delta[s, c, z]
+            s = next_state[s, c, z]
+        state[t] = s
+        counter[t] = k
+        emitted[t] = e
+
+    return state, counter, emitted
+
+
+_kernel = numba.njit(cache=True)(_run_loop) if numba is not None else None
+
+
+def evaluate_pairs(automaton: Automaton, log: EventLog, weights=None, cells=1 << 22):
+    """
+    Run the automaton for every ordered pair of distinct activities of the log
+    at once, the activities of the pair taking the places of the two rule
+    activities.
+
+    Every trace carries a state, counter and number of violations per pair.
+    An event of activity c only changes the pairs with c as first activity
+    (row c) or as second activity (column c), so the k-th events of all
+    traces update one row and one column per trace at a time. The traces are
+    processed in chunks of at most ``cells`` states.
+
+    :param automaton: compiled rule of two distinct activities
+    :param log: event log
+    :param weights: weight of every trace, e.g. the counts of the variants,
+    1 if None
+    :param cells: maximum number of per-pair states held at once
+    :return: weighted sums over the traces of candidate, violated and
+    violations as tables of activity codes x activity codes; the diagonal is
+    undefined
+    """
+
+    m = len(log.activities)
+    if weights is None:
+        weights = np.ones(len(log), dtype=np.int64)
+
+    candidates = np.zeros((m, m), dtype=np.int64)
+    violated = np.zeros((m, m), dtype=np.int64)
+    violations = np.zeros((m, m), dtype=np.int64)
+
+    chunk = max(cells // max(m * m, 1), 1)
+    for first in range(0, len(log), chunk):
+        traces = np.arange(first, min(first + chunk, len(log)))
+        state, counter, emitted = _run_pairs(automaton, log, traces, m)
+
+        result = (
+            emitted
+            + automaton.final_emit[state]
+            + automaton.final_counter[state] * counter
+            + automaton.final_nonzero[state] * (counter != 0)
+        )
+        candidate = automaton.candidate[state]
+        result[~candidate] = 0
+
+        w = weights[traces]
+        candidates += np.tensordot(w, candidate, axes=1).astype(np.int64)
+        violated += np.tensordot(w, result != 0, axes=1).astype(np.int64)
+        violations += np.tensordot(w, result, axes=1)
+
+    return candidates, violated, violations
+
+
+def _run_pairs(automaton: Automaton, log: EventLog, traces: np.ndarray, m: int):
+    """
+    Process the k-th event of the given traces at once, for k = 0, 1, ...
+    """
+
+    n = len(traces)
+    lengths = log.trace_lengths()[traces]
+
+    # longest traces first, the active traces of step k are then a prefix
+    order = np.argsort(-lengths, kind="stable")
+    starts = log.offsets[traces][order]
+    active = np.searchsorted(
+        -lengths[order], -np.arange(lengths.max(initial=0)), "left"
+    )
+
+    state = np.zeros((n, m, m), dtype=np.int8)
+    counter = np.zeros((n, m, m), dtype=np.int64)
+    emitted = np.zeros((n, m, m), dtype=np.int64)
+
+    rows = np.arange(n)[:, None]
+    columns = np.arange(m)[None, :]
+
+    for k, a in enumerate(active):
+        t = rows[:a]
+        c = log.codes[starts[:a] + k].astype(np.int64)[:, None]
+
+        # class 1: pairs with the activity first, class 2: pairs with it second
+        for cls, index in ((1, (t, c, columns)), (2, (t, columns, c))):
+            s = state[index]
+            z = (counter[index] > 0).view(np.int8)
+            emitted[index] += automaton.emit[s, cls, z]
+            counter[index] += automaton.counter_delta[s, cls, z]
+            state[index] = automaton.next_state[s, cls, z]
+
+    inverse = np.empty(n, dtype=np.int64)
+    inverse[order] = np.arange(n)
+
+    return state[inverse], counter[inverse], emitted[inverse]
+
+
+# Rules
+
+
+def precedence(preceding: str, request: str, single_occurrence=False) -> Automaton:
+    """
+    See ``Rule_Checker.check_precedence``.
+    """
+
+    same = preceding == request
+
+    if single_occurrence:
+        # 0 nothing seen, 1 preceding first, 2 request first, 3 request after preceding
+        def step(s, c, z):
+            if s == 0:
+                if same:
+                    return 3, 0, 0
+                return (1, 0, 0) if c == 1 else (2, 0, 0)
+            if s == 1 and c == 2:
+                return 3, 0, 0
+            return s, 0, 0
+
+        return Automaton.compile(
+            (preceding, request), 4, step, [0, 0, 1, 1], final_emit=[0, 0, 1, 0]
+        )
+
+    # 0 no request seen, 1 request seen; the counter holds the open preceding
+    def step(s, c, z):
+        if c == 1:
+            return (1 if same else s), 1, 0
+        if z:
+            return 1, -1, 0
+        return 1, 0, 1
+
+    return Automaton.compile((preceding, request), 2, step, [0, 1])
+
+
+def response(request: str, response: str, single_occurrence=False) -> Automaton:
+    """
+    See ``Rule_Checker.check_response``.
+    """
+
+    same = request == response
+
+    if single_occurrence:
+        # 0 nothing seen, 1 request last, 2 response last without request,
+        # 3 response last after a request
+        def step(s, c, z):
+            if c == 1:
+                return (3 if same else 1), 0, 0
+            return (2 if s in (0, 2) else 3), 0, 0
+
+        return Automaton.compile(
+            (request, response), 4, step, [0, 1, 0, 1], final_emit=[0, 1, 0, 0]
+        )
+
+    # 0 no request seen, 1 request seen; the counter holds the open requests
+    def step(s, c, z):
+        if c == 1:
+            return 1, 1, 0
+        return s, (-1 if z else 0), 0
+
+    return Automaton.compile((request, response), 2, step, [0, 1], final_counter=[0, 1])
+
+
+def order(first: str, second: str) -> Automaton:
+    """
+    See ``Rule_Checker.check_order``.
+    """
+
+    same = first == second
+
+    # bit 0 first seen, bit 1 second seen
+    def step(s, c, z):
+        if c == 1:
+            return (3 if same else s | 1), 0, 0
+        return s | 2, 0, (0 if s & 1 else 1)
+
+    return Automaton.compile((first, second), 4, step, [0, 0, 0, 1])
+
+
+def balanced_order(first: str, second: str) -> Automaton:
+    """
+    No occurrence of ``first`` may follow more ``second`` than ``first`` events,
+    see ``Rule_Checker.check_rir_rgr`` and ``Rule_Checker.check_rgr_ci``.
+    """
+
+    # 0 fine, 1 failed; the counter holds #second - #first
+    def step(s, c, z):
+        if s == 1:
+            return 1, 0, 0
+        if c == 1:
+            return (1, 0, 1) if z else (0, -1, 0)
+        return 0, 1, 0
+
+    return Automaton.compile((first, second), 2, step, [1, 1])
+
+
+def order_loop_count(first: str, second: str) -> Automaton:
+    """
+    See ``Rule_Checker.check_order_loop_count``.
+    """
+
+    same = first == second
+
+    # the counter holds #first - #second
+    def step(s, c, z):
+        if same:
+            return 0, 0, 0
+        return 0, (1 if c == 1 else -1), 0
+
+    return Automaton.compile((first, second), 1, step, [1], final_nonzero=[1])
+
+
+def balanced_count(first: str, second: str) -> Automaton:
+    """
+    ``balanced_order`` that also fails traces with a ``second`` and different
+    numbers of ``first`` and ``second``, see ``Rule_Checker.check_rir_ci``
+    without throughput time.
+    """
+
+    # 0 fine, 1 failed, 2 fine after a second; the counter holds
+    # #second - #first
+    def step(s, c, z):
+        if s == 1:
+            return 1, 0, 0
+        if c == 1:
+            return (1, 0, 1) if z else (s, -1, 0)
+        return 2, 1, 0
+
+    return Automaton.compile(
+        (first, second), 3, step, [1, 1, 1], final_nonzero=[0, 0, 1]
+    )
+
+
+def cardinality(activity: str) -> Automaton:
+    """
+    See ``Rule_Checker.check_cardinality``, the violations are the number of
+    occurrences.
+    """
+
+    # the counter holds the number of occurrences
+    def step(s, c, z):
+        return 0, 1, 0
+
+    return Automaton.compile((activity,), 1, step, [1], final_counter=[1])
+
+
+def exclusive(first: str, second: str) -> Automaton:
+    """
+    See ``Rule_Checker.check_exclusive``.
+    """
+
+    same = first == second
+
+    # bit 0 first seen, bit 1 second seen
+    def step(s, c, z):
+        if c == 1:
+            return (3 if same else s | 1), 0, 0
+        return s | 2, 0, 0
+
+    return Automaton.compile(
+        (first, second), 4, step, [1, 1, 1, 1], final_emit=[0, 0, 0, 1]
+    )
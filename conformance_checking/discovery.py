@@ -0,0 +1,428 @@
+"""
+Discovery of pairwise relations across all pairs of activities.
+
+Instead of one ``Rule_Checker`` call per pair, every template is evaluated for
+all activities x activities pairs at once on the encoded log, by default
+once per variant:
+
+- precedence and response (all occurrences) and order run their counter
+  automaton for all pairs in a single pass, see
+  ``automaton.evaluate_pairs``,
+- single-occurrence precedence and response compare the first and last
+  position tables of the log,
+- exclusive is the co-occurrence matrix of the log.
+
+The counts and rates are the same as those of the ``Rule_Checker`` check of
+the pair, the first activity of the pair being the first argument of the
+check (preceding, request, first).
+
+:func:`mine` keeps only the constraints above a support and confidence
+threshold. Like Apriori it first drops the infrequent activities and every
+pair whose co-occurrence count already bounds its support or confidence below
+the thresholds, and evaluates the remaining pairs on the log restricted to
+their activities.
+"""
+
+import numpy as np
+import pandas as pd
+
+from util import EventLog
+
+from . import automaton
+from .rule_base import Rule_Checker
+
+TEMPLATES = ("precedence", "response", "exclusive", "order")
+
+# templates of mine(), cardinality is unary
+MINED = ("cardinality",) + TEMPLATES
+
+# template -> automaton of the check
+FACTORIES = {
+    "precedence": automaton.precedence,
+    "response": automaton.response,
+    "order": automaton.order,
+}
+
+COLUMNS = ("template", "first", "second", "lower", "upper", "support", "confidence")
+
+
+class PairCounts:
+    """
+    Counts of one template for all pairs of activities.
+
+    The tables are indexed by activity codes, the first activity of the pair
+    is the row.
+    """
+
+    def __init__(
+        self,
+        template: str,
+        activities: list,
+        traces: int,
+        candidates: np.ndarray,
+        violated: np.ndarray,
+        violations: np.ndarray,
+    ):
+        """
+        :param template: name of the template, see TEMPLATES
+        :param activities: activity names, the position is the code
+        :param traces: number of traces of the log
+        :param candidates: number of candidate traces per pair
+        :param violated: number of violated traces per pair
+        :param violations: number of violations per pair
+        """
+
+        self.template = template
+        self.activities = list(activities)
+        self.traces = traces
+        self.candidates = candidates
+        self.violated = violated
+        self.violations = violations
+
+    def rates(self, rc: Rule_Checker = None) -> pd.DataFrame:
+        """
+        :param rc: checker computing the percentages
+        :return: violation rate of every pair in percent, like the reports of
+        the checks; rows are the first, columns the second activities
+        """
+
+        rc = rc or Rule_Checker()
+
+        if self.template == "exclusive":
+            totals = np.full_like(self.violated, self.traces)
+            observations = self.violated
+        elif self.template == "order":
+            totals, observations = self.candidates, self.violations
+        else:
+            totals, observations = self.candidates, self.violated
+
+        values = [
+            [rc.get_percentage(t, o) for t, o in zip(row_totals, row_observations)]
+            for row_totals, row_observations in zip(
+                totals.tolist(), observations.tolist()
+            )
+        ]
+        return pd.DataFrame(values, index=self.activities, columns=self.activities)
+
+
+def discover(log, templates=TEMPLATES, single_occurrence=False, variants=True) -> dict:
+    """
+    Compute the violation rates of all pairs of activities.
+
+    :param log: event log, list of traces or ``EventLog``
+    :param templates: names of the templates, see TEMPLATES
+    :param single_occurrence: single-occurrence variant of precedence and
+    response
+    :param variants: evaluate once per variant and weight by its count
+    :return: template -> activities x activities DataFrame of violation rates
+    in percent, see :meth:`PairCounts.rates`
+    """
+
+    if not isinstance(log, EventLog):
+        log = EventLog.from_traces(log)
+
+    rc = Rule_Checker()
+    return {
+        template: pair_counts(log, template, single_occurrence, variants).rates(rc)
+        for template in templates
+    }
+
+
+def pair_counts(
+    log: EventLog, template: str, single_occurrence=False, variants=True
+) -> PairCounts:
+    """
+    :param log: event log
+    :param template: name of the template, see TEMPLATES
+    :param single_occurrence: single-occurrence variant of precedence and
+    response
+    :param variants: evaluate once per variant and weight by its count
+    :return: counts of the template for all pairs of activities
+    """
+
+    if template not in TEMPLATES:
+        raise ValueError("Unknown template %r" % template)
+
+    if variants:
+        encoded, weights = log.variants().log, log.variants().counts
+    else:
+        encoded, weights = log, np.ones(len(log), dtype=np.int64)
+
+    if template == "exclusive":
+        together = encoded.co_occurrences(weights)
+        counts = together, together, together
+    elif single_occurrence and template in ("precedence", "response"):
+        counts = _single_occurrence(encoded, weights, template)
+    else:
+        factory = FACTORIES[template]
+        counts = automaton.evaluate_pairs(factory("a", "b"), encoded, weights)
+
+        # pairs of the same activity follow the rule of the checks for it
+        for code, activity in enumerate(encoded.activities):
+            candidate, result = automaton.evaluate(factory(activity, activity), encoded)
+            for table, values in zip(counts, (candidate, result != 0, result)):
+                table[code, code] = np.dot(weights, values)
+
+    return PairCounts(template, log.activities, len(log), *counts)
+
+
+def _single_occurrence(
+    log: EventLog, weights: np.ndarray, template: str, cells=1 << 22
+):
+    """
+    Single-occurrence precedence compares the first, response the last
+    positions of the two activities, see ``vectorized``.
+    """
+
+    m = len(log.activities)
+    table = log.first_positions() if template == "precedence" else log.last_positions()
+
+    candidates = np.zeros((m, m), dtype=np.int64)
+    violated = np.zeros((m, m), dtype=np.int64)
+
+    chunk = max(cells // max(m * m, 1), 1)
+    for start in range(0, len(log), chunk):
+        positions = table[start : start + chunk]
+        w = weights[start : start + chunk]
+
+        # [trace, first activity, second activity]
+        first = positions[:, :, None]
+        second = positions[:, None, :]
+
+        if template == "precedence":
+            # first activity preceding, second requesting
+            candidate = np.broadcast_to(second >= 0, (len(positions), m, m))
+            violation = candidate & ((first < 0) | (second < first))
+        else:
+            # first activity requesting, second responding
+            candidate = np.broadcast_to(first >= 0, (len(positions), m, m))
+            violation = candidate & ((second < 0) | (first > second))
+
+        candidates += np.tensordot(w, candidate, axes=1).astype(np.int64)
+        violated += np.tensordot(w, violation, axes=1).astype(np.int64)
+
+    return candidates, violated, violated.copy()
+
+
+def mine(
+    log,
+    min_support=0.1,
+    min_confidence=0.9,
+    templates=MINED,
+    single_occurrence=False,
+    by: str = None,
+) -> pd.DataFrame:
+    """
+    Find the constraints satisfied by enough traces of the log.
+
+    A constraint is activated by a trace containing the second activity
+    (precedence), the first activity (response), both activities (order),
+    either activity (exclusive) or by every trace (cardinality). Its support is
+    the fraction of all traces that satisfy it and contain its activities, its
+    confidence the fraction of the activating traces that satisfy it; order is
+    satisfied without violations. Cardinality constraints get the tightest
+    bounds with enough confidence. Only constraints of frequent activities,
+    whose support alone reaches the threshold, and of two distinct activities
+    are mined.
+
+    :param log: event log, list of traces or ``EventLog``
+    :param min_support: minimum support, between 0 and 1
+    :param min_confidence: minimum confidence, between 0 and 1
+    :param templates: names of the templates, see MINED
+    :param single_occurrence: single-occurrence variant of precedence and
+    response
+    :param by: case attribute, e.g. "item_type", to mine the traces of every
+    value separately
+    :return: one row per constraint with the columns COLUMNS, and the value of
+    the attribute first if by is given
+    """
+
+    for template in templates:
+        if template not in MINED:
+            raise ValueError("Unknown template %r" % template)
+
+    if not isinstance(log, EventLog):
+        log = EventLog.from_traces(log)
+
+    variants = log.variants()
+    arguments = templates, min_support, min_confidence, single_occurrence
+
+    if by is None:
+        return _mine(variants.log, variants.counts, *arguments)
+
+    groups, values = pd.factorize(log.attributes[by], sort=True)
+    frames = []
+    for group, value in enumerate(values):
+        weights = np.bincount(
+            variants.inverse[groups == group], minlength=len(variants)
+        )
+        frame = _mine(variants.log, weights, *arguments)
+        frame.insert(0, by, value)
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=(by,) + COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _mine(log, weights, templates, min_support, min_confidence, single_occurrence):
+    """
+    Mine the traces of the log, every trace counting weights times.
+    """
+
+    n = int(weights.sum())
+    together = log.co_occurrences(weights)
+    present = np.diagonal(together)
+
+    # level 1: frequent activities; level 2: pairs of them whose co-occurrence
+    # bounds the support of the templates of two activities but exclusive
+    frequent = (present > 0) & (present >= min_support * n)
+    pairs = frequent[:, None] & frequent[None, :]
+    np.fill_diagonal(pairs, False)
+    supported = pairs & (together >= min_support * n)
+
+    rows = []
+    for template in templates:
+        if template == "cardinality":
+            rows += _mine_cardinality(
+                log, weights, np.flatnonzero(frequent), min_support, min_confidence
+            )
+            continue
+
+        if template == "exclusive":
+            # symmetric, once per pair with the activities sorted by name
+            rank = np.argsort(np.argsort(log.activities))
+            first, second = np.nonzero(pairs & (rank[:, None] < rank[None, :]))
+            activated = present[first] + present[second] - together[first, second]
+            satisfied = activated - together[first, second]
+        else:
+            survivors = supported.copy()
+            if template == "precedence":
+                # activated by the second activity, satisfied only with both
+                survivors &= together >= min_confidence * present[None, :]
+            elif template == "response":
+                survivors &= together >= min_confidence * present[:, None]
+
+            first, second = np.nonzero(survivors)
+            counts = _evaluate(log, weights, template, single_occurrence, survivors)
+            activated = counts.candidates[first, second]
+            satisfied = activated - counts.violated[first, second]
+
+        keep = (
+            (activated > 0)
+            & (satisfied >= min_support * n)
+            & (satisfied >= min_confidence * activated)
+        )
+        for a, b, s, c in zip(
+            first[keep], second[keep], satisfied[keep], activated[keep]
+        ):
+            rows.append(
+                (
+                    template,
+                    log.activities[a],
+                    log.activities[b],
+                    None,
+                    None,
+                    s / n,
+                    s / c,
+                )
+            )
+
+    return pd.DataFrame(rows, columns=COLUMNS).astype(
+        {"lower": "Int64", "upper": "Int64"}
+    )
+
+
+def _mine_cardinality(log, weights, codes, min_support, min_confidence) -> list:
+    """
+    The lower bound is the highest one with enough confidence, the upper bound
+    the lowest one above it with enough confidence for both bounds.
+    """
+
+    n = int(weights.sum())
+    rows = []
+    for code in codes:
+        histogram = np.bincount(log.count_matrix()[:, code], weights=weights)
+        histogram = np.rint(histogram).astype(np.int64)
+        below = np.concatenate(([0], np.cumsum(histogram)))
+
+        lower = np.count_nonzero(n - below >= min_confidence * n) - 1
+        lower = min(lower, len(histogram) - 1)
+        within = below[max(lower, 1) + 1 :] - below[lower]
+        upper = max(lower, 1) + np.argmax(within >= min_confidence * n)
+
+        satisfied = below[upper + 1] - below[lower]
+        support = below[upper + 1] - below[max(lower, 1)]
+        if satisfied >= min_confidence * n and support >= min_support * n:
+            rows.append(
+                (
+                    "cardinality",
+                    log.activities[code],
+                    None,
+                    lower,
+                    upper,
+                    support / n,
+                    satisfied / n,
+                )
+            )
+    return rows
+
+
+def _evaluate(log, weights, template, single_occurrence, survivors) -> PairCounts:
+    """
+    Evaluate the surviving pairs in one batch on the traces and events of
+    their activities only; the events of other activities do not change the
+    state of the automata. The tables are 0 outside of the batch.
+    """
+
+    m = len(log.activities)
+    tables = np.zeros((3, m, m), dtype=np.int64)
+
+    codes = np.flatnonzero(survivors.any(axis=0) | survivors.any(axis=1))
+    traces = np.flatnonzero(
+        (weights > 0) & (log.count_matrix()[:, codes] > 0).any(axis=1)
+    )
+    if len(traces):
+        restricted = _restrict(log, traces, codes)
+        if single_occurrence and template in ("precedence", "response"):
+            counts = _single_occurrence(restricted, weights[traces], template)
+        else:
+            rule = FACTORIES[template]("a", "b")
+            counts = automaton.evaluate_pairs(rule, restricted, weights[traces])
+        tables[(slice(None),) + np.ix_(codes, codes)] = counts
+
+    return PairCounts(template, log.activities, len(log), *tables)
+
+
+def _restrict(log: EventLog, traces: np.ndarray, codes: np.ndarray) -> EventLog:
+    """
+    :param log: event log
+    :param traces: indices of the traces to keep
+    :param codes: activity codes to keep, their position is the new code
+    :return: log of the given traces with the events of the given activities
+    """
+
+    lookup = np.full(len(log.activities), -1, dtype=np.int64)
+    lookup[codes] = np.arange(len(codes))
+
+    lengths = log.trace_lengths()[traces]
+    offsets = np.zeros(len(traces) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    # gather the events of the traces, then drop those of other activities
+    starts = np.repeat(log.offsets[:-1][traces] - offsets[:-1], lengths)
+    events = starts + np.arange(offsets[-1], dtype=np.int64)
+    remapped = lookup[log.codes[events]]
+    kept = remapped >= 0
+
+    owners = np.repeat(np.arange(len(traces)), lengths)
+    np.cumsum(np.bincount(owners[kept], minlength=len(traces)), out=offsets[1:])
+
+    return EventLog(
+        [log.activities[code] for code in codes],
+        remapped[kept].astype(log.codes.dtype),
+        offsets,
+        log.timestamps[events][kept],
+        log.case_ids[traces],
+        utc_offsets=log.utc_offsets[events][kept],
+    )
@@ -0,0 +1,146 @@
+"""
+Bulk export of violated cases.
+
+Checks collect the indices of the violated traces as an integer array. The
+exported columns (case id, case attributes, trace length, ...) are gathered for
+all of them at once and handed to a writer, which renders the whole table in
+one go: CSV with a header, or Parquet and Arrow IPC if pyarrow is installed.
+"""
+
+import numpy as np
+import pandas as pd
+
+from util import EventLog
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional, only needed for Parquet and Arrow exports
+    pyarrow = None
+
+# pseudo column of case_table, the number of events of the trace
+LENGTH = "length"
+
+# case id and case attributes, see util.import_xes_log
+CASE_ATTRIBUTES = ("trace_id", "vendor", "value", "spend_area", "item_type")
+
+
+def case_table(log, cases, columns: tuple) -> dict:
+    """
+    Gather the columns of the given traces.
+
+    :param log: event log, list of traces or ``EventLog``
+    :param cases: indices of the traces
+    :param columns: trace keys, e.g. "trace_id" or case attributes, or LENGTH
+    :return: column name -> values of the traces
+    """
+
+    cases = np.asarray(cases, dtype=np.int64)
+    table = {}
+
+    if isinstance(log, EventLog):
+        for name in columns:
+            if name == LENGTH:
+                table[name] = log.trace_lengths()[cases]
+            elif name == "trace_id":
+                table[name] = log.case_ids[cases]
+            else:
+                table[name] = log.attributes[name][cases]
+    else:
+        traces = [log[i] for i in cases.tolist()]
+        for name in columns:
+            if name == LENGTH:
+                table[name] = [len(trace["events"]) for trace in traces]
+            else:
+                table[name] = [trace[name] for trace in traces]
+
+    return table
+
+
+class CsvWriter:
+    """
+    Writes tables as CSV files with a header line.
+    """
+
+    extension = ".csv"
+
+    def __init__(self, header=True):
+        self.header = header
+
+    def write(self, file: str, table: dict) -> str:
+        """
+        :param file: path of the export without extension
+        :param table: column name -> values
+        :return: path of the written file
+        """
+
+        path = file + self.extension
+        pd.DataFrame(table).to_csv(path, index=False, header=self.header)
+        return path
+
+
+class ParquetWriter:
+    """
+    Writes tables as Parquet files, requires pyarrow.
+    """
+
+    extension = ".parquet"
+
+    def __init__(self, compression="zstd"):
+        _require_pyarrow("Parquet")
+        self.compression = compression
+
+    def write(self, file: str, table: dict) -> str:
+        path = file + self.extension
+        pyarrow.parquet.write_table(
+            _arrow_table(table), path, compression=self.compression
+        )
+        return path
+
+
+class ArrowWriter:
+    """
+    Writes tables as Arrow IPC files, requires pyarrow.
+    """
+
+    extension = ".arrow"
+
+    def __init__(self):
+        _require_pyarrow("Arrow")
+
+    def write(self, file: str, table: dict) -> str:
+        path = file + self.extension
+        table = _arrow_table(table)
+        with pyarrow.ipc.new_file(path, table.schema) as writer:
+            writer.write_table(table)
+        return path
+
+
+WRITERS = {
+    "csv": CsvWriter,
+    "parquet": ParquetWriter,
+    "arrow": ArrowWriter,
+}
+
+
+def get_writer(export_format: str):
+    """
+    :param export_format: "csv", "parquet" or "arrow"
+    :return: writer for the format
+    """
+
+    try:
+        return WRITERS[export_format]()
+    except KeyError:
+        raise ValueError("Unknown export format %r" % export_format) from None
+
+
+def _require_pyarrow(name: str):
+    if pyarrow is None:
+        raise ImportError("%s exports require the 'pyarrow' package" % name)
+
+
+def _arrow_table(table: dict):
+    return pyarrow.table(
+        {name: pyarrow.array(np.asarray(values)) for name, values in table.items()}
+    )
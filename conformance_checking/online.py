@@ -0,0 +1,190 @@
+"""
+Incremental rule checking for logs that grow over time.
+
+``OnlineChecker`` runs the counter automaton of every rule (see
+``conformance_checking.automaton``) over every case seen so far and keeps its
+state, counter and emitted violations per rule and case, plus the last
+outcome. A new event only steps the automata of the rules referring to its
+activity, so the cost of a batch scales with the batch and not with the
+history, and the memory per case with the number of rules.
+
+The rules are the ones of ``conformance_checking.rule_set`` and the reports
+are the same as those of ``RuleSet.evaluate`` on the complete log.
+"""
+
+from .rule_base import Rule_Checker
+
+
+class _Case:
+    """
+    State of a single case: the number of events and per rule the state,
+    counter and emitted violations of its automaton and the last outcome.
+    """
+
+    __slots__ = ("length", "states", "counters", "emitted", "outcomes")
+
+    def __init__(self, outcomes: list):
+        self.length = 0
+        self.states = [0] * len(outcomes)
+        self.counters = [0] * len(outcomes)
+        self.emitted = [0] * len(outcomes)
+        self.outcomes = outcomes
+
+
+class OnlineChecker:
+    """
+    Check a fixed set of rules against a stream of events.
+
+    Example::
+
+        checker = OnlineChecker([
+            Precedence("Record Goods Receipt", "Clear Invoice"),
+            RirCi(),
+        ])
+        checker.update([("4507000322_00090", "Record Goods Receipt"), ...])
+        reports = checker.reports()
+    """
+
+    def __init__(self, rules: list):
+        self.rules = list(rules)
+        self.rc = Rule_Checker()
+
+        self.automata = [rule.automaton() for rule in self.rules]
+        # transition tables as nested lists, indexing them per event is much
+        # cheaper than indexing the NumPy arrays
+        self.tables = [
+            (
+                automaton.next_state.tolist(),
+                automaton.counter_delta.tolist(),
+                automaton.emit.tolist(),
+            )
+            for automaton in self.automata
+        ]
+
+        # activity -> (index, class) of the rules referring to it
+        self.rules_of = {}
+        for i, automaton in enumerate(self.automata):
+            for c, activity in enumerate(automaton.activities, 1):
+                # a repeated activity has the class of its first occurrence
+                if automaton.activities.index(activity) == c - 1:
+                    self.rules_of.setdefault(activity, []).append((i, c))
+
+        self.empty = [
+            rule.outcome_of(*automaton.result(0, 0, 0))
+            for rule, automaton in zip(self.rules, self.automata)
+        ]
+        self.totals = [[0] * len(outcome) for outcome in self.empty]
+        # case ids of the violated cases per rule
+        self.violated = [set() for _ in self.rules]
+
+        self.cases = {}
+
+    def __len__(self) -> int:
+        return len(self.cases)
+
+    def update(self, events) -> set:
+        """
+        Append a batch of events to their cases and update the rule outcomes.
+
+        :param events: iterable of (case id, activity, ...) tuples in the order
+        they happened, further fields (e.g. the timestamp) are ignored
+        :return: ids of the cases whose outcome of at least one rule changed
+        """
+
+        # rules to re-evaluate per touched case
+        dirty = {}
+
+        for event in events:
+            case_id, activity = event[0], event[1]
+
+            case = self.cases.get(case_id)
+            if case is None:
+                case = self.cases[case_id] = self._open(case_id)
+
+            case.length += 1
+            rules = self.rules_of.get(activity)
+            if rules is None:
+                continue
+
+            indices = dirty.setdefault(case_id, set())
+            for i, c in rules:
+                next_state, counter_delta, emit = self.tables[i]
+                s = case.states[i]
+                z = 1 if case.counters[i] > 0 else 0
+                case.emitted[i] += emit[s][c][z]
+                case.counters[i] += counter_delta[s][c][z]
+                case.states[i] = next_state[s][c][z]
+                indices.add(i)
+
+        changed = set()
+        for case_id, indices in dirty.items():
+            case = self.cases[case_id]
+            for i in indices:
+                if self._evaluate(case_id, case, i):
+                    changed.add(case_id)
+
+        return changed
+
+    def add_log(self, log) -> set:
+        """
+        Append complete traces, e.g. the history loaded from an XES file.
+
+        :param log: event log, list of traces or ``EventLog``
+        :return: see :meth:`update`
+        """
+
+        return self.update(
+            (trace["trace_id"], event) for trace in log for event in trace["events"]
+        )
+
+    def reports(self) -> list:
+        """
+        :return: one report per rule for all events so far, in the order of the
+        rules, see ``RuleSet.evaluate``
+        """
+
+        return [
+            rule.report(self.rc, totals, len(self.cases))
+            for rule, totals in zip(self.rules, self.totals)
+        ]
+
+    def _open(self, case_id) -> _Case:
+        """
+        Start a new case, it counts with the outcomes of an empty trace.
+        """
+
+        for i, outcome in enumerate(self.empty):
+            self._add(i, outcome)
+            if self.rules[i].is_violated(outcome):
+                self.violated[i].add(case_id)
+
+        return _Case(list(self.empty))
+
+    def _evaluate(self, case_id, case: _Case, i: int) -> bool:
+        """
+        Re-evaluate rule i on the case.
+
+        :return: whether the outcome changed
+        """
+
+        rule = self.rules[i]
+        old = case.outcomes[i]
+        new = rule.outcome_of(
+            *self.automata[i].result(case.states[i], case.counters[i], case.emitted[i])
+        )
+        if new == old:
+            return False
+
+        self._add(i, old, -1)
+        self._add(i, new)
+        case.outcomes[i] = new
+
+        if rule.is_violated(new):
+            self.violated[i].add(case_id)
+        else:
+            self.violated[i].discard(case_id)
+
+        return True
+
+    def _add(self, i: int, outcome: tuple, sign=1):
+        self.totals[i] = [t + sign * o for t, o in zip(self.totals[i], outcome)]
@@ -0,0 +1,122 @@
+"""
+Sharded, multi-process evaluation of a ``RuleSet``.
+
+Traces are independent for every rule, so the log is split into contiguous
+trace ranges which are evaluated in a process pool. The encoded events are
+handed to the workers as memory-mapped arrays instead of pickled traces, every
+worker only sends back the summed counters and violated trace indices of its
+shard, which are merged into the usual reports.
+
+Only ``RuleSet.evaluate`` has a process mode. The ``Rule_Checker`` checks run
+in the calling process, vectorized on an ``EventLog``; to shard them, put the
+corresponding rules into a ``RuleSet``. ``check_rir_ci`` with throughput time
+and ``make_throughout_analysis`` depend on statistics of the whole log and are
+not sharded, the ``RirCi`` rule covers ``check_rir_ci`` without throughput.
+"""
+
+import os
+import tempfile
+from multiprocessing import Pool
+
+import numpy as np
+
+from util import EventLog
+
+# per worker process, set by _init_worker
+_worker = {}
+
+
+def accumulate_parallel(rule_set, log: EventLog, processes=None, shards=None):
+    """
+    Run all rules of the rule set over the log in a process pool.
+
+    :param rule_set: rule set to evaluate
+    :param log: event log
+    :param processes: number of worker processes, all cores if None
+    :param shards: number of trace ranges, 4 per process if None
+    :return: summed outcomes per rule, violated trace indices per rule and
+    the number of traces, see ``RuleSet.accumulate``
+    """
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if shards is None:
+        shards = processes * 4
+
+    bounds = shard_bounds(log, shards)
+    if len(bounds) == 0:
+        return rule_set.accumulate((), {})
+
+    with tempfile.TemporaryDirectory() as directory:
+        arrays = {}
+        for name in ("codes", "offsets"):
+            arrays[name] = os.path.join(directory, name + ".npy")
+            np.save(arrays[name], getattr(log, name))
+
+        with Pool(
+            processes,
+            initializer=_init_worker,
+            initargs=(rule_set, rule_set.lookup_for(log), arrays),
+        ) as pool:
+            results = pool.map(_run_shard, bounds)
+
+    return merge(results)
+
+
+def shard_bounds(log: EventLog, shards: int) -> list:
+    """
+    Split the log into contiguous trace ranges with about the same number of
+    events each.
+
+    :param log: event log
+    :param shards: max. number of ranges
+    :return: list of (first trace, last trace + 1)
+    """
+
+    targets = np.linspace(0, log.n_events, shards + 1)
+    cuts = np.unique(np.searchsorted(log.offsets, targets).clip(0, len(log)))
+    cuts[0], cuts[-1] = 0, len(log)
+    cuts = np.unique(cuts)
+
+    return [(int(start), int(end)) for start, end in zip(cuts, cuts[1:])]
+
+
+def merge(results: list):
+    """
+    Merge the results of ``RuleSet.accumulate`` over consecutive shards.
+
+    :param results: results in the order of the shards
+    :return: merged result
+    """
+
+    totals, violated, traces = None, None, 0
+
+    for shard_totals, shard_violated, shard_traces in results:
+        if totals is None:
+            totals = [list(t) for t in shard_totals]
+            violated = [list(v) for v in shard_violated]
+        else:
+            for i, (t, v) in enumerate(zip(shard_totals, shard_violated)):
+                totals[i] = [a + b for a, b in zip(totals[i], t)]
+                violated[i].extend(v)
+        traces += shard_traces
+
+    return totals, violated, traces
+
+
+def _init_worker(rule_set, lookup: dict, arrays: dict):
+    _worker["rule_set"] = rule_set
+    _worker["lookup"] = lookup
+    for name, path in arrays.items():
+        _worker[name] = np.load(path, mmap_mode="r")
+
+
+def _run_shard(bounds: tuple):
+    start, end = bounds
+    offsets = _worker["offsets"][start : end + 1].tolist()
+    codes = _worker["codes"][offsets[0] : offsets[-1]].tolist()
+
+    first = offsets[0]
+    sequences = (codes[a - first : b - first] for a, b in zip(offsets, offsets[1:]))
+
+    return _worker["rule_set"].accumulate(sequences, _worker["lookup"], start)
@@ -1,17 +1,60 @@
-from datetime import datetime
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import weakref
 import numpy as np
 
+from util import EventLog
+from util.event_log import DAY, MINUTE, to_nanoseconds
+from . import automaton, export, vectorized
+
 
 class Rule_Checker:
+    # number of lists of traces whose throughput times are memoized at once
+    memoized_lists = 4
+
+    def __init__(self, variants=False, export_format="csv"):
+        """
+        :param variants: run the control-flow checks on an ``EventLog`` once per
+        distinct activity sequence and weight the results by the number of
+        traces, see ``util.EventLog.variants``
+        :param export_format: format of the exported violated cases, "csv",
+        "parquet" or "arrow", see ``conformance_checking.export``
+        """
+
+        self.variants = variants
+        self.writer = export.get_writer(export_format)
+
+        # memoized throughput times, see _throughput_times
+        # EventLog -> {(first, second, precise): (times, pairs)}
+        self._throughput = weakref.WeakKeyDictionary()
+        # id(list) -> (list, len(list), {(first, second, precise): (times, pairs)})
+        self._throughput_lists = OrderedDict()
+
     def get_percentage(self, total: int, observations: int) -> float:
+        if total == 0:
+            # e.g. no candidate traces (yet), see conformance_checking.stream
+            return 0.0
         return round((100 / total) * observations, 4)
 
     def export_case_ids(self, file: str, ids: list):
         file = file + ".csv"
         with open(file, "w") as f:
-            for case_id in ids:
-                f.write("%s\n" % case_id)
-            f.close()
+            f.writelines("%s\n" % case_id for case_id in ids)
+
+    def export_cases(
+        self, file: str, log, cases, columns=("trace_id", export.LENGTH)
+    ) -> str:
+        """
+        Export columns of the given traces in bulk.
+
+        :param file: path of the export without extension
+        :param log: event log
+        :param cases: indices of the traces
+        :param columns: exported columns, see ``export.case_table``
+        :return: path of the written file
+        """
+
+        return self.writer.write(file, export.case_table(log, cases, columns))
 
     def check_cardinality(self, log, activity: str, upper: int, lower: int) -> dict:
         """
@@ -27,15 +70,22 @@ class Rule_Checker:
         violation_upper = 0
         violation_lower = 0
 
-        for trace in log:
+        if isinstance(log, EventLog):
+            above, below = vectorized.cardinality_violations(
+                self._encoded(log), activity, upper, lower
+            )
+            violation_upper = self._total(log, above)
+            violation_lower = self._total(log, below)
+        else:
+            for trace in log:
 
-            events = trace["events"]
-            counter = events.count(activity)
+                events = trace["events"]
+                counter = events.count(activity)
 
-            if counter < lower:
-                violation_lower += 1
-            elif counter > upper != -1:
-                violation_upper += 1
+                if counter < lower:
+                    violation_lower += 1
+                elif counter > upper != -1:
+                    violation_upper += 1
 
         return {
             "activity": activity,
@@ -51,33 +101,40 @@ class Rule_Checker:
 
     def check_order_loop_count(self, log, first: str, second: str, file="") -> dict:
 
-        trace_ids = []
+        violated = []
 
         violations = 0
         traces = 0
 
-        for trace in log:
-            events = trace["events"]
+        if isinstance(log, EventLog):
+            mask = vectorized.loop_count_violations(self._encoded(log), first, second)
+            violations = self._total(log, mask)
+            traces = len(log)
+            if len(file) > 0:
+                violated = self._cases(log, mask)
+        else:
+            for trace in log:
+                events = trace["events"]
 
-            first_counter = 0
-            second_counter = 0
+                first_counter = 0
+                second_counter = 0
 
-            for event in events:
-                if event == first:
-                    first_counter += 1
-                if event == second:
-                    second_counter += 1
+                for event in events:
+                    if event == first:
+                        first_counter += 1
+                    if event == second:
+                        second_counter += 1
 
-            if first_counter != second_counter:
-                violations += 1
+                if first_counter != second_counter:
+                    violations += 1
 
-                trace_ids.append(",".join([trace["trace_id"]]))
+                    violated.append(traces)
 
-            traces += 1
+                traces += 1
 
         if len(file) > 0:
             file = "_".join([file, "order_loop_count", first, second])
-            self.export_case_ids(file, trace_ids)
+            self.export_cases(file, log, violated, ("trace_id",))
 
         return {
             "first": first,
@@ -89,38 +146,41 @@ class Rule_Checker:
         first = "Record Goods Receipt"
         second = "Record Invoice Receipt"
 
-        trace_ids = []
+        violated = []
 
         violations = 0
         traces = 0
 
-        for trace in log:
-            events = trace["events"]
+        if isinstance(log, EventLog):
+            violations, violated, traces = self._balanced_order_encoded(
+                log, first, second, len(file) > 0
+            )
+        else:
+            for trace in log:
+                events = trace["events"]
 
-            first_counter = 0
-            second_counter = 0
+                first_counter = 0
+                second_counter = 0
 
-            failed = False
+                failed = False
 
-            for event in events:
-                if event == first:
-                    if second_counter > first_counter:
-                        violations += 1
-                        trace_ids.append(
-                            ",".join([trace["trace_id"], str(len(events))])
-                        )
-                        failed = True
-                        break
-                    else:
-                        first_counter += 1
-                elif event == second:
-                    second_counter += 1
+                for event in events:
+                    if event == first:
+                        if second_counter > first_counter:
+                            violations += 1
+                            violated.append(traces)
+                            failed = True
+                            break
+                        else:
+                            first_counter += 1
+                    elif event == second:
+                        second_counter += 1
 
-            traces += 1
+                traces += 1
 
         if len(file) > 0:
             file = "_".join([file, "order_RIR_before_RGR"])
-            self.export_case_ids(file, trace_ids)
+            self.export_cases(file, log, violated)
 
         return {
             "first": first,
@@ -132,38 +192,41 @@ class Rule_Checker:
         first = "Record Goods Receipt"
         second = "Clear Invoice"
 
-        trace_ids = []
+        violated = []
 
         violations = 0
         traces = 0
 
-        for trace in log:
-            events = trace["events"]
+        if isinstance(log, EventLog):
+            violations, violated, traces = self._balanced_order_encoded(
+                log, first, second, len(file) > 0
+            )
+        else:
+            for trace in log:
+                events = trace["events"]
 
-            first_counter = 0
-            second_counter = 0
+                first_counter = 0
+                second_counter = 0
 
-            failed = False
+                failed = False
 
-            for event in events:
-                if event == first:
-                    if second_counter > first_counter:
-                        violations += 1
-                        trace_ids.append(
-                            ",".join([trace["trace_id"], str(len(events))])
-                        )
-                        failed = True
-                        break
-                    else:
-                        first_counter += 1
-                elif event == second:
-                    second_counter += 1
+                for event in events:
+                    if event == first:
+                        if second_counter > first_counter:
+                            violations += 1
+                            violated.append(traces)
+                            failed = True
+                            break
+                        else:
+                            first_counter += 1
+                    elif event == second:
+                        second_counter += 1
 
-            traces += 1
+                traces += 1
 
         if len(file) > 0:
             file = "_".join([file, "order_RGR_before_CI"])
-            self.export_case_ids(file, trace_ids)
+            self.export_cases(file, log, violated)
 
         return {
             "first": first,
@@ -171,13 +234,28 @@ class Rule_Checker:
             "violations": (violations, self.get_percentage(traces, violations)),
         }
 
-    def check_rir_ci(self, log, file="", with_throughput=False) -> dict:
+    def check_rir_ci(
+        self, log, file="", with_throughput=False, throughput: tuple = None
+    ) -> dict:
+        """
+        Check that every Record Invoice Receipt is followed by a Clear Invoice.
+
+        :param log: event log
+        :param file: path prefix to export the violated traces
+        :param with_throughput: only count open invoices as violations if they
+        are older than the usual throughput time
+        :param throughput: precomputed statistics of the throughput time from
+        Record Invoice Receipt to Clear Invoice, see
+        :meth:`make_throughout_analysis`, computed (once per log) if None
+        :return: report
+        """
+
         first = "Record Invoice Receipt"
         second = "Clear Invoice"
 
-        avg, median, _, _ = self.make_throughout_analysis(log, first, second)[
-            "throughput"
-        ]
+        if throughput is None:
+            throughput = self.make_throughout_analysis(log, first, second)["throughput"]
+        avg, median, _, _ = throughput
 
         if avg > median:
             throughput_time = avg
@@ -188,71 +266,70 @@ class Rule_Checker:
             if with_throughput:
                 print("Take throughput time (median) into account: ", throughput_time)
 
-        trace_ids = []
+        violated = []
 
         violations = 0
         traces = 0
 
-        for trace in log:
-            events = trace["events"]
+        if isinstance(log, EventLog):
+            violations, violated, traces = self._check_rir_ci_encoded(
+                log, first, second, throughput_time, with_throughput
+            )
+        else:
+            for trace in log:
+                events = trace["events"]
 
-            first_counter = 0
-            second_counter = 0
+                first_counter = 0
+                second_counter = 0
 
-            first_stack = []
-            second_stack = []
+                first_stack = []
+                second_stack = []
 
-            failed = False
-            hadCI = False
-            lastCI = False
+                failed = False
+                hadCI = False
+                lastCI = False
 
-            for i, event in enumerate(events):
-                if event == first:
-                    lastCI = False
-                    if second_counter > first_counter:
-                        violations += 1
-                        trace_ids.append(
-                            ",".join([trace["trace_id"], str(len(events))])
-                        )
-                        failed = True
-                        break
-                    else:
-                        first_counter += 1
-                        first_stack.append(trace["events_with_ts"][i]["timestamp"])
-                elif event == second:
-                    hadCI = True
-                    lastCI = True
-                    second_counter += 1
-                    second_stack.append(trace["events_with_ts"][i]["timestamp"])
+                for i, event in enumerate(events):
+                    if event == first:
+                        lastCI = False
+                        if second_counter > first_counter:
+                            violations += 1
+                            violated.append(traces)
+                            failed = True
+                            break
+                        else:
+                            first_counter += 1
+                            first_stack.append(trace["events_with_ts"][i]["timestamp"])
+                    elif event == second:
+                        hadCI = True
+                        lastCI = True
+                        second_counter += 1
+                        second_stack.append(trace["events_with_ts"][i]["timestamp"])
+
+                if not failed:
+                    if with_throughput:
+                        if first_counter > second_counter:
+                            max_datetime = datetime(2018, 12, 31, 23, 59, 59).replace(
+                                tzinfo=None
+                            )
 
-            if not failed:
-                if with_throughput:
-                    if first_counter > second_counter:
-                        max_datetime = datetime(2018, 12, 31, 23, 59, 59).replace(
-                            tzinfo=None
-                        )
+                            days = (
+                                max_datetime.replace(tzinfo=None)
+                                - first_stack[-1].replace(tzinfo=None)
+                            ).days
 
-                        days = (
-                            max_datetime.replace(tzinfo=None)
-                            - first_stack[-1].replace(tzinfo=None)
-                        ).days
+                            if days <= int(throughput_time):
+                                violations += 1
+                                violated.append(traces)
 
-                        if days <= int(throughput_time):
+                        elif first_counter != second_counter:
                             violations += 1
-                            trace_ids.append(
-                                ",".join([trace["trace_id"], str(len(events))])
-                            )
-
-                    elif first_counter != second_counter:
+                            violated.append(traces)
+                    elif first_counter != second_counter and hadCI:
                         violations += 1
-                        trace_ids.append(
-                            ",".join([trace["trace_id"], str(len(events))])
-                        )
-                elif first_counter != second_counter and hadCI:
-                    violations += 1
-                    trace_ids.append(",".join([trace["trace_id"], str(len(events))]))
+                        violated.append(traces)
 
-            traces += 1
+                traces += 1
 
         if len(file) > 0:
             file = "_".join(
@@ -263,7 +340,7 @@ class Rule_Checker:
                 ]
             )
             print("File-Name: ", file)
-            self.export_case_ids(file, trace_ids)
+            self.export_cases(file, log, violated)
 
         return {
             "first": first,
@@ -271,76 +348,290 @@ class Rule_Checker:
             "violations": (violations, self.get_percentage(traces, violations)),
         }
 
-    def make_throughout_analysis(self, log, first: str, second: str, file = "") -> dict:
+    def make_throughout_analysis(
+        self, log, first: str, second: str, file="", precise=False
+    ) -> dict:
+        """
+        Analyse the throughput times between paired occurrences of two
+        activities, see ``vectorized.throughput``.
+
+        :param log: event log
+        :param first: activity
+        :param second: activity
+        :param file: path prefix to export the throughput time of every pair
+        :param precise: fractions of days instead of whole days
+        :return: report with average, median, standard deviation and variance
+        """
+
+        throughput, pairs = self._throughput_times(log, first, second, precise)
+
+        if len(file) > 0:
+            file = "_".join([file, "throughput", first, second])
+            print("File-Name: ", file)
+            self.writer.write(file, pairs)
+
+        return {
+            "first": first,
+            "second": second,
+            "throughput": (
+                np.average(throughput),
+                np.median(throughput),
+                np.std(throughput),
+                np.var(throughput),
+            ),
+        }
+
+    def invalidate_throughput(self, log=None):
+        """
+        Drop memoized throughput times, e.g. after a list of traces was
+        modified in place without changing its length.
+
+        :param log: log to drop the throughput times of, all logs if None
+        """
+
+        if log is None:
+            self._throughput.clear()
+            self._throughput_lists.clear()
+        elif isinstance(log, EventLog):
+            self._throughput.pop(log, None)
+        else:
+            self._throughput_lists.pop(id(log), None)
+
+    def _throughput_times(self, log, first: str, second: str, precise: bool):
+        """
+        Throughput times of :meth:`make_throughout_analysis`, memoized per log
+        and pair of activities.
+
+        An ``EventLog`` is immutable, its throughput times are kept as long as
+        the log is alive. Lists of traces cannot be referenced weakly, only the
+        ``memoized_lists`` most recently used ones are kept and they are
+        recomputed if the number of traces changed; other modifications need a
+        call of :meth:`invalidate_throughput`.
+
+        :return: throughput times and the table of all pairs for the export
+        """
+
+        key = (first, second, precise)
+        memo = self._throughput_memo(log)
+        cached = memo.get(key)
+        if cached is not None:
+            return cached
+
+        memo[key] = self._compute_throughput(log, first, second, precise)
+        return memo[key]
+
+    def _throughput_memo(self, log) -> dict:
+        """
+        :return: memoized throughput times of the log, see
+        :meth:`_throughput_times`
+        """
+
+        if isinstance(log, EventLog):
+            return self._throughput.setdefault(log, {})
+
+        entry = self._throughput_lists.get(id(log))
+        if entry is None or entry[0] is not log or entry[1] != len(log):
+            # the list keeps its id valid while memoized
+            entry = self._throughput_lists[id(log)] = (log, len(log), {})
+        self._throughput_lists.move_to_end(id(log))
+        while len(self._throughput_lists) > self.memoized_lists:
+            self._throughput_lists.popitem(last=False)
+        return entry[2]
+
+    def _compute_throughput(self, log, first: str, second: str, precise: bool):
         violations = 0
         traces = 0
 
         throughput = []
 
-        output = []
+        trace_ids = []
+        pairs = []
+        cases = []
+
+        if isinstance(log, EventLog):
+            result = vectorized.throughput(log, first, second)
+            throughput = result.times(precise=precise)
+            trace_ids = log.case_ids[result.cases]
+            pairs = result.ranks
+            cases = result.cases
+        else:
+            for trace in log:
+                events = trace["events_with_ts"]
+
+                first_stack = []
+                second_stack = []
+
+                first_counter = 0
+                second_counter = 0
 
-        for trace in log:
-            events = trace["events_with_ts"]
+                failed = False
+                hadCI = False
 
-            first_stack = []
-            second_stack = []
+                for event_ts in events:
+                    event = event_ts["name"]
+                    timestamp = event_ts["timestamp"]
+                    if event == first:
+                        if second_counter > first_counter:
+                            violations += 1
+                            failed = True
+                            break
+                        else:
+                            first_counter += 1
+                            first_stack.append(timestamp)
+                    elif event == second and first_counter > second_counter:
+                        hadCI = True
+                        second_counter += 1
+                        second_stack.append(timestamp)
+
+                        delta = (
+                            second_stack[second_counter - 1]
+                            - first_stack[second_counter - 1]
+                        )
+
+                        time = delta / timedelta(days=1) if precise else delta.days
+
+                        throughput.append(time)
+                        trace_ids.append(trace["trace_id"])
+                        pairs.append(second_counter)
+                        cases.append(traces)
+
+                if not failed and hadCI:
+                    if first_counter != second_counter:
+                        violations += 1
 
+                traces += 1
+
+        return throughput, {
+            "trace_id": trace_ids,
+            "days": throughput,
+            "pair": pairs,
+            "trace": cases,
+        }
+
+    def _check_rir_ci_encoded(
+        self, log: EventLog, first: str, second: str, throughput_time, with_throughput
+    ):
+        """
+        ``check_rir_ci`` on the integer codes and nanosecond timestamps of an
+        ``EventLog``.
+
+        :return: violations, violated trace indices and number of traces
+        """
+
+        first_code = log.code(first)
+        second_code = log.code(second)
+
+        # local time like the check on trace dicts: the naive cutoff against
+        # the timestamps shifted by their UTC offset
+        max_timestamp = to_nanoseconds(datetime(2018, 12, 31, 23, 59, 59))
+
+        # traces without either activity never violate, only visit the
+        # occurrences of the two activities
+        relevant = log.inverted_index().union((first, second))
+        codes = log.codes[relevant].tolist()
+        cases = log.event_cases[relevant]
+        timestamps = log.timestamps[relevant]
+        utc_offsets = log.utc_offsets[relevant]
+
+        starts = np.ones(len(cases), dtype=bool)
+        np.not_equal(cases[1:], cases[:-1], out=starts[1:])
+        candidates = cases[starts].tolist()
+        bounds = np.append(np.flatnonzero(starts), len(cases)).tolist()
+
+        violated = []
+
+        violations = 0
+        traces = len(log)
+
+        for trace, start, end in zip(candidates, bounds, bounds[1:]):
             first_counter = 0
             second_counter = 0
 
+            last_first = None
+
             failed = False
             hadCI = False
 
-            for event_ts in events:
-                event = event_ts["name"]
-                timestamp = event_ts["timestamp"]
-                if event == first:
+            for i in range(start, end):
+                event = codes[i]
+                if event == first_code:
                     if second_counter > first_counter:
                         violations += 1
+                        violated.append(trace)
                         failed = True
                         break
                     else:
                         first_counter += 1
-                        first_stack.append(timestamp)
-                elif event == second and first_counter > second_counter:
+                        last_first = i
+                elif event == second_code:
                     hadCI = True
                     second_counter += 1
-                    second_stack.append(timestamp)
 
-                    delta = (
-                        second_stack[second_counter - 1]
-                        - first_stack[second_counter - 1]
-                    )
+            if not failed:
+                if with_throughput:
+                    if first_counter > second_counter:
+                        local = int(timestamps[last_first])
+                        local += int(utc_offsets[last_first]) * MINUTE
+                        days = (max_timestamp - local) // DAY
 
-                    throughput.append(delta.days)
-                    output.append(",".join([trace["trace_id"], str(delta.days), str(second_counter), str(traces)]))
+                        if days <= int(throughput_time):
+                            violations += 1
+                            violated.append(trace)
 
-            if not failed and hadCI:
-                if first_counter != second_counter:
+                    elif first_counter != second_counter:
+                        violations += 1
+                        violated.append(trace)
+                elif first_counter != second_counter and hadCI:
                     violations += 1
+                    violated.append(trace)
 
-            traces += 1
+        return violations, violated, traces
 
-        if len(file) > 0:
-            file = "_".join(
-                [
-                    file,
-                    "throughput", first, second
-                ]
-            )
-            print("File-Name: ", file)
-            self.export_case_ids(file, output)
+    def _balanced_order_encoded(
+        self, log: EventLog, first: str, second: str, with_cases: bool
+    ):
+        """
+        ``check_rir_rgr`` and ``check_rgr_ci`` on an ``EventLog``.
 
-        return {
-            "first": first,
-            "second": second,
-            "throughput": (
-                np.average(throughput),
-                np.median(throughput),
-                np.std(throughput),
-                np.var(throughput),
-            ),
-        }
+        :return: violations, violated trace indices (only if with_cases) and number
+        of traces
+        """
+
+        _, counts = automaton.evaluate(
+            automaton.balanced_order(first, second), self._encoded(log)
+        )
+
+        violated = self._cases(log, counts) if with_cases else []
+
+        return self._total(log, counts != 0), violated, len(log)
+
+    def _encoded(self, log: EventLog) -> EventLog:
+        """
+        :return: log the per-trace results of control-flow checks are computed
+        on, the variants of the log if enabled
+        """
+
+        return log.variants().log if self.variants else log
+
+    def _total(self, log: EventLog, values: np.ndarray) -> int:
+        """
+        :param values: per-trace values computed on ``self._encoded(log)``
+        :return: sum of the values over all traces of the log
+        """
+
+        if self.variants:
+            return log.variants().total(values)
+        return int(np.sum(values, dtype=np.int64))
+
+    def _cases(self, log: EventLog, mask: np.ndarray) -> np.ndarray:
+        """
+        :param mask: per-trace mask computed on ``self._encoded(log)``
+        :return: indices of the selected traces of the log
+        """
+
+        if self.variants:
+            return log.variants().cases(mask)
+        return np.flatnonzero(mask)
 
     # Legacy methods
 
@@ -357,18 +648,25 @@ class Rule_Checker:
         violations = 0
         traces = 0
 
-        for trace in log:
-            events = trace["events"]
-            first_stack = []
+        if isinstance(log, EventLog):
+            candidate, counts = automaton.evaluate(
+                automaton.order(first, second), self._encoded(log)
+            )
+            violations = self._total(log, counts)
+            traces = self._total(log, candidate)
+        else:
+            for trace in log:
+                events = trace["events"]
+                first_stack = []
 
-            if first in events and second in events:
-                traces += 1
+                if first in events and second in events:
+                    traces += 1
 
-                for event in events:
-                    if event == first:
-                        first_stack.append(event)
-                    elif event == second and len(first_stack) == 0:
-                        violations += 1
+                    for event in events:
+                        if event == first:
+                            first_stack.append(event)
+                        elif event == second and len(first_stack) == 0:
+                            violations += 1
 
         return {
             "first": first,
@@ -395,33 +693,47 @@ class Rule_Checker:
         candidate_traces = 0
         violated_traces = 0
 
-        for trace in log:
-            events = trace["events"]
-            req_stack = []
-
-            tracked = False
-
-            if request in events:
-                candidate_traces += 1
-                if single_occurrence:
-                    if response in events:
-                        req_idx = events[::-1].index(request)
-                        res_idx = events[::-1].index(response)
-                        if req_idx < res_idx:
-                            violations += 1
+        if isinstance(log, EventLog):
+            if single_occurrence:
+                # compares the last positions of the two activities
+                candidate, counts = vectorized.response_single_violations(
+                    self._encoded(log), request, response
+                )
+            else:
+                candidate, counts = automaton.evaluate(
+                    automaton.response(request, response), self._encoded(log)
+                )
+            violations = self._total(log, counts)
+            violated_traces = self._total(log, counts != 0)
+            candidate_traces = self._total(log, candidate)
+        else:
+            for trace in log:
+                events = trace["events"]
+                req_stack = []
+
+                tracked = False
+
+                if request in events:
+                    candidate_traces += 1
+                    if single_occurrence:
+                        if response in events:
+                            req_idx = events[::-1].index(request)
+                            res_idx = events[::-1].index(response)
+                            if req_idx < res_idx:
+                                violations += 1
+                                violated_traces += 1
+                        else:
                             violated_traces += 1
+                            violations += 1
                     else:
-                        violated_traces += 1
-                        violations += 1
-                else:
-                    for event in events:
-                        if event == request:
-                            req_stack.append(event)
-                        elif event == response and len(req_stack) > 0:
-                            req_stack.pop()
-                    if len(req_stack) > 0:
-                        violated_traces += 1
-                        violations += len(req_stack)
+                        for event in events:
+                            if event == request:
+                                req_stack.append(event)
+                            elif event == response and len(req_stack) > 0:
+                                req_stack.pop()
+                        if len(req_stack) > 0:
+                            violated_traces += 1
+                            violations += len(req_stack)
 
         return {
             "request": request,
@@ -450,75 +762,63 @@ class Rule_Checker:
 
         violations = 0
         candidate_traces = 0
-        trace_ids = []
+        violated = []
         violated_traces = 0
 
-        for trace in log:
-            events = trace["events"]
-            pre_stack = []
-            tracked = False
-
-            if request in events:
-                candidate_traces += 1
-                if single_occurrence:
-                    if preceding in events:
-                        request_idx = events.index(request)
-                        preceding_idx = events.index(preceding)
-                        if request_idx < preceding_idx:
+        if isinstance(log, EventLog):
+            if single_occurrence:
+                # compares the first positions of the two activities
+                candidate, counts = vectorized.precedence_single_violations(
+                    self._encoded(log), preceding, request
+                )
+            else:
+                candidate, counts = automaton.evaluate(
+                    automaton.precedence(preceding, request), self._encoded(log)
+                )
+            violations = self._total(log, counts)
+            violated_traces = self._total(log, counts != 0)
+            candidate_traces = self._total(log, candidate)
+            # the member traces are only looked up for the export
+            if len(file) > 0:
+                violated = self._cases(log, counts)
+        else:
+            for index, trace in enumerate(log):
+                events = trace["events"]
+                pre_stack = []
+                tracked = False
+
+                if request in events:
+                    candidate_traces += 1
+                    if single_occurrence:
+                        if preceding in events:
+                            request_idx = events.index(request)
+                            preceding_idx = events.index(preceding)
+                            if request_idx < preceding_idx:
+                                violations += 1
+                                violated_traces += 1
+                                violated.append(index)
+                        else:
+                            violated.append(index)
                             violations += 1
                             violated_traces += 1
-                            trace_ids.append(
-                                ",".join(
-                                    [
-                                        trace["trace_id"],
-                                        trace["vendor"],
-                                        trace["value"],
-                                        trace["spend_area"],
-                                        trace["item_type"],
-                                    ]
-                                )
-                            )
                     else:
-                        trace_ids.append(
-                            ",".join(
-                                [
-                                    trace["trace_id"],
-                                    trace["vendor"],
-                                    trace["value"],
-                                    trace["spend_area"],
-                                    trace["item_type"],
-                                ]
-                            )
-                        )
-                        violations += 1
-                        violated_traces += 1
-                else:
-                    for event in events:
-                        if event == preceding:
-                            pre_stack.append(event)
-                        elif event == request and len(pre_stack) > 0:
-                            pre_stack.pop()
-                        elif event == request:
-                            violations += 1
-                            if not tracked:
-                                trace_ids.append(
-                                    ",".join(
-                                        [
-                                            trace["trace_id"],
-                                            trace["vendor"],
-                                            trace["value"],
-                                            trace["spend_area"],
-                                            trace["item_type"],
-                                        ]
-                                    )
-                                )
-                                violated_traces += 1
-                                tracked = True
+                        for event in events:
+                            if event == preceding:
+                                pre_stack.append(event)
+                            elif event == request and len(pre_stack) > 0:
+                                pre_stack.pop()
+                            elif event == request:
+                                violations += 1
+                                if not tracked:
+                                    violated.append(index)
+                                    violated_traces += 1
+                                    tracked = True
+
         if len(file) > 0:
             file = "_".join(
                 [file, "precedence", preceding, request, str(single_occurrence)]
             )
-            self.export_case_ids(file, trace_ids)
+            self.export_cases(file, log, violated, export.CASE_ATTRIBUTES)
 
         return {
             "preceding": preceding,
@@ -545,12 +845,20 @@ class Rule_Checker:
         violations = 0
         violated_traces = 0
 
-        for trace in log:
-            events = trace["events"]
+        if isinstance(log, EventLog):
+            violated_traces = violations = self._total(
+                log,
+                vectorized.exclusive_violations(
+                    self._encoded(log), first_activity, second_activity
+                ),
+            )
+        else:
+            for trace in log:
+                events = trace["events"]
 
-            if first_activity in events and second_activity in events:
-                violated_traces += 1
-                violations += 1
+                if first_activity in events and second_activity in events:
+                    violated_traces += 1
+                    violations += 1
 
         return {
             "first activity": first_activity,
@@ -0,0 +1,572 @@
+"""
+Single-pass evaluation of many rules at once.
+
+Rules are declared up front and compiled into a table of the activities any of
+them refers to. ``RuleSet.evaluate`` then walks every trace exactly once,
+collecting the positions of these activities, and every rule works on the
+positions of its own activities only. N rules cost about one scan of the log
+instead of N.
+
+Every rule returns the same report as the matching ``Rule_Checker`` check.
+"""
+
+from bisect import bisect_left
+
+from util import EventLog
+from . import automaton, export, parallel
+from .rule_base import Rule_Checker
+
+
+class Rule:
+    """
+    Base class of the rules of a ``RuleSet``.
+
+    ``outcome`` gets the positions of the rule's ``activities`` in one trace and
+    returns a tuple of counters, which are summed up over all traces. ``report``
+    builds the report of the matching ``Rule_Checker`` check from these sums.
+
+    For incremental checking the rule is also compiled into a counter
+    automaton, ``outcome_of`` turns its result for a trace into the same
+    counters.
+    """
+
+    file = ""
+
+    # columns of the exported violated traces, see export.case_table
+    export_columns = ("trace_id", export.LENGTH)
+
+    def activities(self) -> tuple:
+        raise NotImplementedError
+
+    def outcome(self, positions: dict) -> tuple:
+        """
+        :param positions: activity -> sorted positions in the trace, activities
+        not occurring in the trace are missing
+        :return: counters of the trace
+        """
+
+        raise NotImplementedError
+
+    def automaton(self) -> automaton.Automaton:
+        """
+        :return: the rule as counter automaton, see ``automaton``
+        """
+
+        raise NotImplementedError
+
+    def outcome_of(self, candidate: bool, violations: int) -> tuple:
+        """
+        :param candidate: whether the trace is a candidate of the automaton
+        :param violations: violations of the trace reported by the automaton
+        :return: counters of the trace, see :meth:`outcome`
+        """
+
+        raise NotImplementedError
+
+    def is_violated(self, outcome: tuple) -> bool:
+        return outcome[-1] > 0
+
+    def report(self, rc: Rule_Checker, totals: list, traces: int) -> dict:
+        raise NotImplementedError
+
+    def export_name(self, file: str) -> str:
+        raise NotImplementedError
+
+
+class Cardinality(Rule):
+    """
+    See ``Rule_Checker.check_cardinality``.
+    """
+
+    def __init__(self, activity: str, upper: int, lower: int):
+        self.activity = activity
+        self.upper = upper
+        self.lower = lower
+
+    def activities(self) -> tuple:
+        return (self.activity,)
+
+    def outcome(self, positions: dict) -> tuple:
+        counter = len(positions.get(self.activity, ()))
+        if counter < self.lower:
+            return 0, 1
+        if counter > self.upper != -1:
+            return 1, 0
+        return 0, 0
+
+    def automaton(self) -> automaton.Automaton:
+        return automaton.cardinality(self.activity)
+
+    def outcome_of(self, candidate: bool, violations: int) -> tuple:
+        # the violations of the automaton are the occurrences
+        return self.outcome({self.activity: range(violations)})
+
+    def is_violated(self, outcome: tuple) -> bool:
+        return outcome[0] > 0 or outcome[1] > 0
+
+    def report(self, rc: Rule_Checker, totals: list, traces: int) -> dict:
+        violation_upper, violation_lower = totals
+        return {
+            "activity": self.activity,
+            "violation upper": (
+                violation_upper,
+                rc.get_percentage(traces, violation_upper),
+            ),
+            "violation lower": (
+                violation_lower,
+                rc.get_percentage(traces, violation_lower),
+            ),
+        }
+
+
+class Exclusive(Rule):
+    """
+    See ``Rule_Checker.check_exclusive``.
+    """
+
+    def __init__(self, first_activity: str, second_activity: str):
+        self.first_activity = first_activity
+        self.second_activity = second_activity
+
+    def activities(self) -> tuple:
+        return self.first_activity, self.second_activity
+
+    def outcome(self, positions: dict) -> tuple:
+        return (
+            int(self.first_activity in positions and self.second_activity in positions),
+        )
+
+    def automaton(self) -> automaton.Automaton:
+        return automaton.exclusive(self.first_activity, self.second_activity)
+
+    def outcome_of(self, candidate: bool, violations: int) -> tuple:
+        return (violations,)
+
+    def report(self, rc: Rule_Checker, totals: list, traces: int) -> dict:
+        (violations,) = totals
+        return {
+            "first activity": self.first_activity,
+            "second activity": self.second_activity,
+            "violations": (violations, rc.get_percentage(traces, violations)),
+        }
+
+
+class Order(Rule):
+    """
+    See ``Rule_Checker.check_order``.
+    """
+
+    def __init__(self, first: str, second: str):
+        self.first = first
+        self.second = second
+
+    def activities(self) -> tuple:
+        return self.first, self.second
+
+    def outcome(self, positions: dict) -> tuple:
+        if self.first not in positions or self.second not in positions:
+            return 0, 0
+        if self.first == self.second:
+            return 1, 0
+
+        # occurrences of second before the first occurrence of first
+        return 1, bisect_left(positions[self.second], positions[self.first][0])
+
+    def automaton(self) -> automaton.Automaton:
+        return automaton.order(self.first, self.second)
+
+    def outcome_of(self, candidate: bool, violations: int) -> tuple:
+        return int(candidate), violations
+
+    def report(self, rc: Rule_Checker, totals: list, traces: int) -> dict:
+        candidates, violations = totals
+        return {
+            "first": self.first,
+            "second": self.second,
+            "violations": (violations, rc.get_percentage(candidates, violations)),
+        }
+
+
+class Response(Rule):
+    """
+    See ``Rule_Checker.check_response``.
+    """
+
+    def __init__(self, request: str, response: str, single_occurrence=False):
+        self.request = request
+        self.response = response
+        self.single_occurrence = single_occurrence
+
+    def activities(self) -> tuple:
+        return self.request, self.response
+
+    def outcome(self, positions: dict) -> tuple:
+        requests = positions.get(self.request)
+        if requests is None:
+            return 0, 0, 0
+        if self.request == self.response:
+            if self.single_occurrence:
+                return 1, 0, 0
+            return 1, len(requests), 1
+
+        responses = positions.get(self.response, ())
+
+        if self.single_occurrence:
+            if len(responses) == 0 or requests[-1] > responses[-1]:
+                return 1, 1, 1
+            return 1, 0, 0
+
+        # every response answers one of the open requests before it
+        answered = 0
+        for response in responses:
+            if bisect_left(requests, response) > answered:
+                answered += 1
+
+        pending = len(requests) - answered
+        return 1, pending, int(pending > 0)
+
+    def automaton(self) -> automaton.Automaton:
+        return automaton.response(self.request, self.response, self.single_occurrence)
+
+    def outcome_of(self, candidate: bool, violations: int) -> tuple:
+        return int(candidate), violations, int(violations > 0)
+
+    def report(self, rc: Rule_Checker, totals: list, traces: int) -> dict:
+        candidate_traces, violations, violated_traces = totals
+        return {
+            "request": self.request,
+            "response": self.response,
+            "violations": (
+                violations,
+                violated_traces,
+                rc.get_percentage(candidate_traces, violated_traces),
+            ),
+            "single": self.single_occurrence,
+        }
+
+
+class Precedence(Rule):
+    """
+    See ``Rule_Checker.check_precedence``.
+    """
+
+    export_columns = export.CASE_ATTRIBUTES
+
+    def __init__(self, preceding: str, request: str, single_occurrence=False, file=""):
+        self.preceding = preceding
+        self.request = request
+        self.single_occurrence = single_occurrence
+        self.file = file
+
+    def activities(self) -> tuple:
+        return self.preceding, self.request
+
+    def outcome(self, positions: dict) -> tuple:
+        requests = positions.get(self.request)
+        if requests is None:
+            return 0, 0, 0
+        if self.preceding == self.request:
+            return 1, 0, 0
+
+        preceding = positions.get(self.preceding, ())
+
+        if self.single_occurrence:
+            if len(preceding) == 0 or requests[0] < preceding[0]:
+                return 1, 1, 1
+            return 1, 0, 0
+
+        # every request consumes one of the open preceding activities before it
+        consumed = 0
+        violations = 0
+        for request in requests:
+            if bisect_left(preceding, request) > consumed:
+                consumed += 1
+            else:
+                violations += 1
+
+        return 1, violations, int(violations > 0)
+
+    def automaton(self) -> automaton.Automaton:
+        return automaton.precedence(
+            self.preceding, self.request, self.single_occurrence
+        )
+
+    def outcome_of(self, candidate: bool, violations: int) -> tuple:
+        return int(candidate), violations, int(violations > 0)
+
+    def report(self, rc: Rule_Checker, totals: list, traces: int) -> dict:
+        candidate_traces, violations, violated_traces = totals
+        return {
+            "preceding": self.preceding,
+            "request": self.request,
+            "violations": (
+                violations,
+                violated_traces,
+                rc.get_percentage(candidate_traces, violated_traces),
+            ),
+            "single": self.single_occurrence,
+        }
+
+    def export_name(self, file: str) -> str:
+        return "_".join(
+            [
+                file,
+                "precedence",
+                self.preceding,
+                self.request,
+                str(self.single_occurrence),
+            ]
+        )
+
+
+class OrderLoopCount(Rule):
+    """
+    See ``Rule_Checker.check_order_loop_count``.
+    """
+
+    export_columns = ("trace_id",)
+
+    def __init__(self, first: str, second: str, file=""):
+        self.first = first
+        self.second = second
+        self.file = file
+
+    def activities(self) -> tuple:
+        return self.first, self.second
+
+    def outcome(self, positions: dict) -> tuple:
+        return (
+            int(
+                len(positions.get(self.first, ()))
+                != len(positions.get(self.second, ()))
+            ),
+        )
+
+    def automaton(self) -> automaton.Automaton:
+        return automaton.order_loop_count(self.first, self.second)
+
+    def outcome_of(self, candidate: bool, violations: int) -> tuple:
+        return (violations,)
+
+    def report(self, rc: Rule_Checker, totals: list, traces: int) -> dict:
+        (violations,) = totals
+        return {
+            "first": self.first,
+            "second": self.second,
+            "violations": (violations, rc.get_percentage(traces, violations)),
+        }
+
+    def export_name(self, file: str) -> str:
+        return "_".join([file, "order_loop_count", self.first, self.second])
+
+
+class BalancedOrder(Rule):
+    """
+    No occurrence of ``first`` may follow more ``second`` than ``first`` events,
+    see ``Rule_Checker.check_rir_rgr`` and ``Rule_Checker.check_rgr_ci``.
+    """
+
+    name = "order"
+
+    def __init__(self, first: str, second: str, file=""):
+        self.first = first
+        self.second = second
+        self.file = file
+
+    def activities(self) -> tuple:
+        return self.first, self.second
+
+    def outcome(self, positions: dict) -> tuple:
+        if self.first == self.second or self.second not in positions:
+            return (0,)
+
+        seconds = positions[self.second]
+        for counter, first in enumerate(positions.get(self.first, ())):
+            if bisect_left(seconds, first) > counter:
+                return (1,)
+        return (0,)
+
+    def automaton(self) -> automaton.Automaton:
+        return automaton.balanced_order(self.first, self.second)
+
+    def outcome_of(self, candidate: bool, violations: int) -> tuple:
+        return (violations,)
+
+    def report(self, rc: Rule_Checker, totals: list, traces: int) -> dict:
+        (violations,) = totals
+        return {
+            "first": self.first,
+            "second": self.second,
+            "violations": (violations, rc.get_percentage(traces, violations)),
+        }
+
+    def export_name(self, file: str) -> str:
+        return "_".join([file, self.name])
+
+
+class RirRgr(BalancedOrder):
+    """
+    See ``Rule_Checker.check_rir_rgr``.
+    """
+
+    name = "order_RIR_before_RGR"
+
+    def __init__(self, file=""):
+        super().__init__("Record Goods Receipt", "Record Invoice Receipt", file)
+
+
+class RgrCi(BalancedOrder):
+    """
+    See ``Rule_Checker.check_rgr_ci``.
+    """
+
+    name = "order_RGR_before_CI"
+
+    def __init__(self, file=""):
+        super().__init__("Record Goods Receipt", "Clear Invoice", file)
+
+
+class RirCi(BalancedOrder):
+    """
+    See ``Rule_Checker.check_rir_ci`` without throughput time.
+    """
+
+    name = "order_RIR_before_CI_without_throughput"
+
+    def __init__(self, file=""):
+        super().__init__("Record Invoice Receipt", "Clear Invoice", file)
+
+    def outcome(self, positions: dict) -> tuple:
+        if super().outcome(positions)[0]:
+            return (1,)
+
+        seconds = positions.get(self.second, ())
+        firsts = positions.get(self.first, ())
+        return (int(len(seconds) > 0 and len(firsts) != len(seconds)),)
+
+    def automaton(self) -> automaton.Automaton:
+        return automaton.balanced_count(self.first, self.second)
+
+
+class RuleSet:
+    """
+    Evaluate a fixed set of rules in a single traversal of the log.
+
+    Example::
+
+        rules = RuleSet([
+            Precedence("Record Goods Receipt", "Clear Invoice"),
+            Response("Record Invoice Receipt", "Clear Invoice", True),
+            Cardinality("Clear Invoice", 1, 1),
+        ])
+        reports = rules.evaluate(log)
+    """
+
+    def __init__(self, rules: list):
+        self.rules = list(rules)
+        self.rc = Rule_Checker()
+
+        activities = {}
+        for rule in self.rules:
+            for activity in rule.activities():
+                activities.setdefault(activity)
+        self.activities = tuple(activities)
+
+    def evaluate(self, log, processes=1) -> list:
+        """
+        Check all rules against the log.
+
+        :param log: event log, list of traces or ``EventLog``
+        :param processes: number of worker processes, all cores if None; with
+        more than one the log is sharded by trace ranges, see
+        ``conformance_checking.parallel`` for what runs in parallel
+        :return: one report per rule, in the order of the rules
+        """
+
+        if processes == 1:
+            totals, violated, traces = self.accumulate(
+                self.traces(log), self.lookup_for(log)
+            )
+        else:
+            if not isinstance(log, EventLog):
+                log = EventLog.from_traces(log)
+            totals, violated, traces = parallel.accumulate_parallel(
+                self, log, processes
+            )
+
+        for rule, cases in zip(self.rules, violated):
+            if len(rule.file) > 0:
+                self.rc.export_cases(
+                    rule.export_name(rule.file), log, cases, rule.export_columns
+                )
+
+        return [
+            rule.report(self.rc, rule_totals, traces)
+            for rule, rule_totals in zip(self.rules, totals)
+        ]
+
+    def lookup_for(self, log) -> dict:
+        """
+        :param log: event log, list of traces or ``EventLog``
+        :return: event of ``traces(log)`` -> activity name, for the activities
+        of the rules only
+        """
+
+        if isinstance(log, EventLog):
+            # the sequences of an EventLog hold activity codes
+            return {log.code(a): a for a in self.activities if log.code(a) >= 0}
+        return {a: a for a in self.activities}
+
+    @staticmethod
+    def traces(log):
+        """
+        :param log: event log, list of traces or ``EventLog``
+        :return: generator of the activity sequences of the traces
+        """
+
+        if isinstance(log, EventLog):
+            codes = log.codes.tolist()
+            offsets = log.offsets.tolist()
+            for start, end in zip(offsets, offsets[1:]):
+                yield codes[start:end]
+        else:
+            for trace in log:
+                yield trace["events"]
+
+    def accumulate(self, sequences, lookup: dict, first_index=0):
+        """
+        Run all rules over the given activity sequences.
+
+        :param sequences: iterable of activity sequences, see ``traces``
+        :param lookup: activity names of the events, see ``lookup_for``
+        :param first_index: index of the first sequence in the log
+        :return: summed outcomes per rule, violated trace indices per rule and
+        the number of traces
+        """
+
+        rules = self.rules
+        empty = [rule.outcome({}) for rule in rules]
+        totals = [[0] * len(outcome) for outcome in empty]
+        violated = [[] for _ in rules]
+        traces = 0
+
+        for index, events in enumerate(sequences, first_index):
+            positions = {}
+            for position, event in enumerate(events):
+                activity = lookup.get(event)
+                if activity is not None:
+                    if activity in positions:
+                        positions[activity].append(position)
+                    else:
+                        positions[activity] = [position]
+
+            for i, rule in enumerate(rules):
+                outcome = rule.outcome(positions) if positions else empty[i]
+                if any(outcome):
+                    totals[i] = [t + o for t, o in zip(totals[i], outcome)]
+                    if rule.is_violated(outcome):
+                        violated[i].append(index)
+
+            traces += 1
+
+        return totals, violated, traces
@@ -0,0 +1,268 @@
+"""
+Asynchronous ingestion of event streams into an ``OnlineChecker``.
+
+Events are (case id, activity, timestamp, attributes) tuples. They come from
+an async iterator, a local socket or a growing JSONL file, are buffered in a
+bounded queue and handed to the checker in batches. A full queue suspends the
+source, which in turn stops reading from the socket or file, so a slow
+checker throttles the producer instead of buffering without limit.
+
+On the wire and in files every event is one JSON object per line with the
+columns of ``util.load_event_table``, further keys are the attributes::
+
+    {"case:concept:name": "4507000322_00090", "concept:name": "Clear Invoice",
+     "time:timestamp": "2018-03-08T23:59:00+01:00", "vendor": "vendorID_0104"}
+"""
+
+import asyncio
+import heapq
+import inspect
+import json
+
+from util.event_log import (
+    ACTIVITY_COLUMN,
+    CASE_COLUMN,
+    NAT,
+    TIMESTAMP_COLUMN,
+    parse_timestamp,
+    to_nanoseconds,
+)
+
+
+async def consume(
+    checker,
+    source,
+    on_snapshot=None,
+    interval=1.0,
+    batch_size=1000,
+    queue_size=10000,
+) -> list:
+    """
+    Feed the events of a source to the checker until the source is exhausted.
+
+    :param checker: ``OnlineChecker``
+    :param source: async iterable of events, e.g. :func:`read_socket`
+    :param on_snapshot: called with the reports of the checker every interval
+    seconds and once at the end, may be a coroutine function
+    :param interval: seconds between snapshots, None for the final one only
+    :param batch_size: maximum number of events per checker update
+    :param queue_size: maximum number of buffered events
+    :return: final reports, see ``OnlineChecker.reports``
+    """
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(queue_size)
+    producer = asyncio.ensure_future(_produce(source, queue))
+    getter = None
+
+    deadline = None if interval is None else loop.time() + interval
+
+    try:
+        while True:
+            if getter is None:
+                getter = asyncio.ensure_future(queue.get())
+
+            timeout = None if deadline is None else max(deadline - loop.time(), 0)
+            await asyncio.wait(
+                {getter, producer}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+
+            if getter.done():
+                batch = [getter.result()]
+                getter = None
+                while len(batch) < batch_size and not queue.empty():
+                    batch.append(queue.get_nowait())
+                checker.update(batch)
+            elif producer.done() and queue.empty():
+                break
+
+            if deadline is not None and loop.time() >= deadline:
+                await _emit(on_snapshot, checker.reports())
+                deadline = loop.time() + interval
+    finally:
+        if getter is not None:
+            getter.cancel()
+        if not producer.done():
+            producer.cancel()
+
+    # raises the error of a failed source
+    producer.result()
+
+    reports = checker.reports()
+    await _emit(on_snapshot, reports)
+    return reports
+
+
+async def _produce(source, queue: asyncio.Queue):
+    async for event in source:
+        await queue.put(event)
+
+
+async def _emit(on_snapshot, reports: list):
+    if on_snapshot is not None:
+        result = on_snapshot(reports)
+        if inspect.isawaitable(result):
+            await result
+
+
+async def read_lines(reader: asyncio.StreamReader):
+    """
+    :param reader: stream of JSON lines
+    :return: async iterator of the events
+    """
+
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if line.strip():
+            yield from_json(line)
+
+
+async def read_socket(host="127.0.0.1", port: int = None, path: str = None):
+    """
+    Connect to a producer and read its events until it closes the connection.
+
+    :param host: host of the producer
+    :param port: TCP port of the producer
+    :param path: path of a Unix socket, used instead of host and port
+    :return: async iterator of the events
+    """
+
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    try:
+        async for event in read_lines(reader):
+            yield event
+    finally:
+        writer.close()
+
+
+async def tail_jsonl(file: str, poll=0.5, follow=True):
+    """
+    Read the events of a JSONL file and, like ``tail -f``, those appended later.
+
+    :param file: path of the file
+    :param poll: seconds to wait for new lines at the end of the file
+    :param follow: False to stop at the end of the file
+    :return: async iterator of the events
+    """
+
+    with open(file, "rb") as f:
+        partial = b""
+        while True:
+            line = f.readline()
+            if line.endswith(b"\n") or (line and not follow):
+                line, partial = partial + line, b""
+                if line.strip():
+                    yield from_json(line)
+            elif line:
+                # the writer has not finished the line yet
+                partial += line
+            elif follow:
+                await asyncio.sleep(poll)
+            else:
+                break
+
+
+def from_json(line) -> tuple:
+    """
+    :param line: JSON object of an event
+    :return: (case id, activity, timestamp, attributes)
+    """
+
+    attributes = json.loads(line)
+    timestamp = attributes.pop(TIMESTAMP_COLUMN, None)
+    return (
+        attributes.pop(CASE_COLUMN),
+        attributes.pop(ACTIVITY_COLUMN),
+        None if timestamp is None else parse_timestamp(timestamp),
+        attributes,
+    )
+
+
+def to_json(event: tuple) -> str:
+    """
+    :param event: (case id, activity, timestamp, attributes)
+    :return: JSON object of the event, without line break
+    """
+
+    case_id, activity, timestamp, attributes = event
+    line = {CASE_COLUMN: case_id, ACTIVITY_COLUMN: activity}
+    if timestamp is not None:
+        line[TIMESTAMP_COLUMN] = timestamp.isoformat()
+    line.update(attributes)
+    return json.dumps(line, default=str)
+
+
+def log_events(log):
+    """
+    Events of a log in the order they happened, e.g. to replay a log as a
+    stream. The events of every trace keep their order.
+
+    :param log: event log, list of traces or ``EventLog``
+    :return: iterator of (case id, activity, timestamp, attributes)
+    """
+
+    def trace_events(trace):
+        attributes = {
+            key: value
+            for key, value in trace.items()
+            if key not in ("trace_id", "events", "events_with_ts")
+        }
+        if "events_with_ts" in trace:
+            for event in trace["events_with_ts"]:
+                yield (trace["trace_id"], event["name"], event["timestamp"], attributes)
+        else:
+            for event in trace["events"]:
+                yield (trace["trace_id"], event, None, attributes)
+
+    def key(event):
+        return NAT if event[2] is None else to_nanoseconds(event[2])
+
+    return heapq.merge(*(trace_events(trace) for trace in log), key=key)
+
+
+async def replay(events, delay=0.0):
+    """
+    Stand-in producer yielding the given events.
+
+    :param events: iterable of events, e.g. :func:`log_events`
+    :param delay: seconds between two events
+    :return: async iterator of the events
+    """
+
+    for event in events:
+        yield event
+        await asyncio.sleep(delay)
+
+
+async def serve_events(events, host="127.0.0.1", port=0, path: str = None):
+    """
+    Stand-in producer sending the given events as JSON lines to every client
+    connecting to it and closing the connection afterwards.
+
+    :param events: iterable of events, e.g. ``list(log_events(log))``
+    :param host: host to listen on
+    :param port: TCP port to listen on, 0 for any free port
+    :param path: path of a Unix socket, used instead of host and port
+    :return: started ``asyncio.Server``
+    """
+
+    events = list(events)
+
+    async def send(reader, writer):
+        try:
+            for event in events:
+                writer.write(to_json(event).encode() + b"\n")
+                # waits while the client does not keep up
+                await writer.drain()
+        finally:
+            writer.close()
+
+    if path is not None:
+        return await asyncio.start_unix_server(send, path)
+    return await asyncio.start_server(send, host, port)
@@ -0,0 +1,55 @@
+from unittest import TestCase
+
+from conformance_checking import automaton
+from conformance_checking.automaton import Automaton
+from conformance_checking.rule_base import Rule_Checker
+from util import EventLog
+
+
+class TestAutomaton(TestCase):
+
+	def setUp(self):
+		self.rc = Rule_Checker()
+		rgr, rir, ci = 'Record Goods Receipt', 'Record Invoice Receipt', 'Clear Invoice'
+		self.log = [
+				{'trace_id': '1', 'events': ['A', rgr, rir, ci]},
+				{'trace_id': '2', 'events': ['A', rir, rgr, ci]}, # RIR before RGR
+				{'trace_id': '3', 'events': [rgr, rir, rgr, rir, ci, ci]},
+				{'trace_id': '4', 'events': [ci, rgr, rir]}, # CI before RGR
+				{'trace_id': '5', 'events': []},
+				{'trace_id': '6', 'events': ['A', 'B', rgr, rir, rir, rgr, 'C']}, # RIR before RGR
+			]
+		self.event_log = EventLog.from_traces(self.log)
+
+	def test_rir_rgr(self):
+		self.assertEqual(self.rc.check_rir_rgr(self.event_log), self.rc.check_rir_rgr(self.log))
+		self.assertEqual(self.rc.check_rir_rgr(self.event_log)['violations'][0], 2)
+
+	def test_rgr_ci(self):
+		self.assertEqual(self.rc.check_rgr_ci(self.event_log), self.rc.check_rgr_ci(self.log))
+		self.assertEqual(self.rc.check_rgr_ci(self.event_log)['violations'][0], 1)
+
+	def test_kernels_agree(self):
+		aut = automaton.precedence('Record Goods Receipt', 'Record Invoice Receipt')
+		classes = aut.classes(self.event_log)[self.event_log.codes]
+		tables = (aut.next_state, aut.counter_delta, aut.emit)
+
+		batched = automaton._run_batched(classes, self.event_log.offsets, *tables)
+		loop = automaton._run_loop(classes, self.event_log.offsets, *tables)
+		for b, l in zip(batched, loop):
+			self.assertEqual(b.tolist(), l.tolist())
+
+	def test_compile_custom_rule(self):
+		# violated if 'A' occurs more than twice
+		def step(s, c, z):
+			return min(s + 1, 3), 0, 0
+
+		aut = Automaton.compile(('A',), 4, step, [0, 1, 1, 1], final_emit=[0, 0, 0, 1])
+		log = EventLog.from_traces([
+			{'events': ['A', 'B', 'A', 'A']},
+			{'events': ['A', 'A']},
+			{'events': ['B']},
+		])
+		candidate, violations = automaton.evaluate(aut, log)
+		self.assertEqual(candidate.tolist(), [True, True, False])
+		self.assertEqual(violations.tolist(), [1, 0, 0])
@@ -0,0 +1,112 @@
+from unittest import TestCase
+
+from conformance_checking import discovery
+from conformance_checking.rule_base import Rule_Checker
+from util import EventLog
+
+
+class TestDiscovery(TestCase):
+
+	def setUp(self):
+		self.log = [
+				{'trace_id': '1', 'events': ['A', 'B', 'D', 'C', 'E']},
+				{'trace_id': '2', 'events': ['A', 'B', 'D', 'B', 'F']},
+				{'trace_id': '3', 'events': ['B', 'C', 'E', 'A']},
+				{'trace_id': '4', 'events': ['B', 'E', 'A', 'C']},
+				{'trace_id': '5', 'events': ['A', 'B', 'C', 'E', 'C', 'D', 'C']},
+				{'trace_id': '6', 'events': ['A', 'C', 'B', 'E', 'C', 'D']},
+				{'trace_id': '7', 'events': ['A', 'B', 'D', 'C', 'E']},
+				{'trace_id': '8', 'events': ['E', 'E', 'B', 'E', 'D', 'F', 'F', 'D']},
+			]
+		self.activities = ['A', 'B', 'C', 'D', 'E', 'F']
+
+	def expected(self, template, first, second, single_occurrence):
+		rc = Rule_Checker()
+		if template == 'precedence':
+			return rc.check_precedence(self.log, first, second, single_occurrence)['violations'][2]
+		if template == 'response':
+			return rc.check_response(self.log, first, second, single_occurrence)['violations'][2]
+		if template == 'exclusive':
+			return rc.check_exclusive(self.log, first, second)['violations'][1]
+		return rc.check_order(self.log, first, second)['violations'][1]
+
+	def test_discover(self):
+		for single_occurrence in (False, True):
+			for variants in (False, True):
+				rates = discovery.discover(self.log, single_occurrence=single_occurrence, variants=variants)
+				self.assertEqual(set(rates), set(discovery.TEMPLATES))
+				for template, table in rates.items():
+					self.assertEqual(sorted(table.index), self.activities)
+					for first in self.activities:
+						for second in self.activities:
+							self.assertEqual(table.loc[first, second], self.expected(template, first, second, single_occurrence), (template, first, second, single_occurrence, variants))
+
+	def test_pair_counts(self):
+		counts = discovery.pair_counts(EventLog.from_traces(self.log), 'order')
+		a, b = counts.activities.index('A'), counts.activities.index('B')
+		self.assertEqual(counts.traces, 8)
+		self.assertEqual(counts.candidates[a, b], 7)
+		self.assertEqual(counts.violations[a, b], 2)
+		self.assertEqual(counts.violated[a, b], 2)
+
+	def test_unknown_template(self):
+		with self.assertRaises(ValueError):
+			discovery.pair_counts(EventLog.from_traces(self.log), 'succession')
+
+	def expected_constraints(self, log, min_support, min_confidence, single_occurrence):
+		# every pair evaluated, then filtered
+		n = len(log)
+		present = {a: sum(a in trace['events'] for trace in log) for a in self.activities}
+		constraints = set()
+		for template in discovery.TEMPLATES:
+			counts = discovery.pair_counts(EventLog.from_traces(log), template, single_occurrence)
+			for a in self.activities:
+				for b in self.activities:
+					if a == b or min(present[a], present[b]) < max(min_support * n, 1):
+						continue
+					i, j = counts.activities.index(a), counts.activities.index(b)
+					if template == 'exclusive':
+						if a > b:
+							continue
+						activated = present[a] + present[b] - counts.violated[i, j]
+					else:
+						activated = counts.candidates[i, j]
+					satisfied = activated - counts.violated[i, j]
+					if activated and satisfied >= min_support * n and satisfied >= min_confidence * activated:
+						constraints.add((template, a, b, satisfied / n, satisfied / activated))
+		return constraints
+
+	def test_mine(self):
+		for single_occurrence in (False, True):
+			for min_support, min_confidence in ((0.2, 0.6), (0.5, 0.9), (0.0, 0.0)):
+				mined = discovery.mine(self.log, min_support, min_confidence, single_occurrence=single_occurrence)
+				pairs = mined[mined.template != 'cardinality']
+				self.assertEqual(
+						set(zip(pairs.template, pairs['first'], pairs.second, pairs.support, pairs.confidence)),
+						self.expected_constraints(self.log, min_support, min_confidence, single_occurrence))
+
+	def test_mine_cardinality(self):
+		mined = discovery.mine(self.log, 0.5, 0.7, templates=('cardinality',))
+		self.assertEqual(sorted(mined['first']), ['A', 'B', 'C', 'D', 'E'])
+		for row in mined.itertuples():
+			report = Rule_Checker().check_cardinality(self.log, row.first, row.upper, row.lower)
+			violations = report['violation upper'][0] + report['violation lower'][0]
+			self.assertEqual(row.confidence, 1 - violations / 8)
+			self.assertGreaterEqual(row.confidence, 0.7)
+		c = mined[mined['first'] == 'C'].iloc[0]
+		self.assertEqual((c.lower, c.upper), (1, 3))
+
+	def test_mine_by(self):
+		for trace in self.log:
+			trace['item_type'] = 'Standard' if int(trace['trace_id']) % 2 else 'Service'
+		mined = discovery.mine(self.log, 0.5, 0.9, by='item_type')
+		self.assertEqual(list(mined.columns[:2]), ['item_type', 'template'])
+		for item_type in ('Service', 'Standard'):
+			group = [trace for trace in self.log if trace['item_type'] == item_type]
+			expected = discovery.mine(group, 0.5, 0.9)
+			got = mined[mined.item_type == item_type].drop(columns='item_type')
+			self.assertEqual(set(got.itertuples(index=False)), set(expected.itertuples(index=False)), item_type)
+
+	def test_unknown_mined_template(self):
+		with self.assertRaises(ValueError):
+			discovery.mine(self.log, templates=('succession',))
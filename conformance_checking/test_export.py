@@ -0,0 +1,40 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import pandas as pd
+
+from conformance_checking import export
+from conformance_checking.rule_base import Rule_Checker
+from util import EventLog
+
+
+class TestExport(TestCase):
+
+	def setUp(self):
+		self.log = [
+				{'trace_id': '1', 'vendor': 'V1', 'value': '10', 'spend_area': 'a', 'item_type': 'x', 'events': ['A', 'B']},
+				{'trace_id': '2', 'vendor': 'V2', 'value': '20', 'spend_area': 'b', 'item_type': 'y', 'events': ['B']},
+				{'trace_id': '3', 'vendor': 'V1', 'value': '30', 'spend_area': 'a', 'item_type': 'x', 'events': ['B', 'A', 'B']},
+			]
+		self.event_log = EventLog.from_traces(self.log)
+
+	def test_case_table(self):
+		columns = ('trace_id', 'vendor', export.LENGTH)
+		expected = {'trace_id': ['2', '3'], 'vendor': ['V2', 'V1'], 'length': [1, 3]}
+		for log in (self.log, self.event_log):
+			table = export.case_table(log, [1, 2], columns)
+			self.assertEqual({name: list(values) for name, values in table.items()}, expected)
+
+	def test_export_precedence(self):
+		with TemporaryDirectory() as directory:
+			file = os.path.join(directory, 'check')
+			for log in (self.log, self.event_log):
+				Rule_Checker().check_precedence(log, 'A', 'B', file=file)
+				res = pd.read_csv(file + '_precedence_A_B_False.csv', dtype=str)
+				self.assertEqual(list(res.columns), list(export.CASE_ATTRIBUTES))
+				self.assertEqual(res['trace_id'].tolist(), ['2', '3'])
+
+	def test_unknown_format(self):
+		with self.assertRaises(ValueError):
+			Rule_Checker(export_format='xlsx')
@@ -0,0 +1,107 @@
+from unittest import TestCase
+
+from conformance_checking.online import OnlineChecker, _Case
+from conformance_checking.rule_base import Rule_Checker
+from conformance_checking.rule_set import (
+	Cardinality,
+	BalancedOrder,
+	Exclusive,
+	Order,
+	OrderLoopCount,
+	Precedence,
+	Response,
+	RgrCi,
+	RirCi,
+	RirRgr,
+	RuleSet,
+)
+from util import EventLog
+
+
+class TestOnlineChecker(TestCase):
+
+	def setUp(self):
+		rir, ci = 'Record Invoice Receipt', 'Clear Invoice'
+		self.log = [
+				{'trace_id': '1', 'events': ['A', 'B', 'D', 'C', 'E']},
+				{'trace_id': '2', 'events': ['A', 'B', 'D', 'B', 'F']},
+				{'trace_id': '3', 'events': ['B', 'C', 'E', rir]},
+				{'trace_id': '4', 'events': ['B', 'E', rir, ci]},
+				{'trace_id': '5', 'events': ['A', 'B', 'C', 'E', 'C', 'D', ci]},
+				{'trace_id': '6', 'events': ['A', 'C', 'B', 'E', 'C', 'D']},
+				{'trace_id': '7', 'events': ['G', 'G', 'E', 'T', 'G', rir, rir, ci]},
+				{'trace_id': '8', 'events': ['A', 'R', 'P', 'R', 'P']},
+			]
+		self.rules = [
+			Cardinality('B', 1, 0),
+			Order('A', 'B'),
+			Response('B', 'E'),
+			Response('G', 'T', True),
+			Precedence('P', 'R'),
+			Precedence('C', 'E', True),
+			Exclusive('A', 'B'),
+			OrderLoopCount('B', 'C'),
+			RirCi(),
+		]
+
+	def events(self):
+		# the k-th events of all traces, for k = 0, 1, ...
+		for k in range(max(len(trace['events']) for trace in self.log)):
+			yield [(trace['trace_id'], trace['events'][k]) for trace in self.log if k < len(trace['events'])]
+
+	def test_batches(self):
+		checker = OnlineChecker(self.rules)
+		for batch in self.events():
+			checker.update(batch)
+
+		self.assertEqual(len(checker), 8)
+		self.assertEqual(checker.reports(), RuleSet(self.rules).evaluate(self.log))
+		self.assertEqual(checker.reports()[-1], Rule_Checker().check_rir_ci(EventLog.from_traces(self.log), throughput=(0, 0, 0, 0)))
+
+	def test_violated_cases(self):
+		checker = OnlineChecker([Response('B', 'E')])
+
+		changed = checker.update([('1', 'A'), ('1', 'B'), ('2', 'B'), ('2', 'E')])
+		self.assertEqual(changed, {'1', '2'})
+		self.assertEqual(checker.violated[0], {'1'})
+
+		changed = checker.update([('1', 'E'), ('2', 'X')])
+		self.assertEqual(changed, {'1'})
+		self.assertEqual(checker.violated[0], set())
+
+	def test_add_log(self):
+		checker = OnlineChecker(self.rules)
+		checker.add_log(self.log[:4])
+		checker.add_log(self.log[4:])
+		self.assertEqual(checker.reports(), RuleSet(self.rules).evaluate(self.log))
+
+	def test_single_events(self):
+		rules = self.rules + [
+			Cardinality('C', -1, 2),
+			Order('B', 'B'),
+			Response('B', 'B'),
+			Response('C', 'C', True),
+			Precedence('E', 'E'),
+			Precedence('D', 'D', True),
+			Exclusive('C', 'C'),
+			OrderLoopCount('G', 'G'),
+			BalancedOrder('C', 'E'),
+			BalancedOrder('R', 'R'),
+			RirRgr(),
+			RgrCi(),
+			RirCi(),
+		]
+		checker = OnlineChecker(rules)
+		self.assertEqual(checker.empty, [rule.outcome({}) for rule in rules])
+
+		prefix = {}
+		for batch in self.events():
+			for case_id, activity in batch:
+				checker.update([(case_id, activity)])
+				prefix.setdefault(case_id, []).append(activity)
+				log = [{'trace_id': t, 'events': events} for t, events in prefix.items()]
+				self.assertEqual(checker.reports(), RuleSet(rules).evaluate(log))
+
+		# only the automaton state is kept, not the events
+		self.assertFalse(hasattr(_Case, 'positions'))
+		self.assertEqual(len(checker.cases['7'].states), len(rules))
@@ -1,6 +1,14 @@
-from unittest import TestCase
+import gc
+import os
+from datetime import datetime, timedelta, timezone
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+import pandas as pd
 
 from conformance_checking.rule_base import Rule_Checker
+from util import DEFAULT_SCHEMA, Attribute, EventLog, Schema, generator, iter_xes_log, load_event_log
+from util import cache as log_cache
 
 
 class TestRule_Checker(TestCase):
@@ -95,3 +103,466 @@ class TestRule_Checker(TestCase):
 		res = self.rc.check_exclusive(self.log, 'A', 'B')
 		self.assertEqual(res['violations'][0], 4)
 
+
+class TestRule_CheckerEventLog(TestCase):
+
+	def setUp(self):
+		self.rc = Rule_Checker()
+		self.log = [
+				{'trace_id': '1', 'vendor': 'A', 'value': 'a', 'spend_area': 'a', 'item_type': 'a', 'events': ['A', 'B', 'D', 'C', 'E']},
+				{'trace_id': '2', 'vendor': 'A', 'value': 'a', 'spend_area': 'a', 'item_type': 'a', 'events': ['A', 'B', 'D', 'B', 'F']},
+				{'trace_id': '3', 'vendor': 'A', 'value': 'a', 'spend_area': 'a', 'item_type': 'a', 'events': ['B', 'C', 'E']},
+				{'trace_id': '4', 'vendor': 'A', 'value': 'a', 'spend_area': 'a', 'item_type': 'a', 'events': ['B', 'E']},
+				{'trace_id': '5', 'vendor': 'A', 'value': 'a', 'spend_area': 'a', 'item_type': 'a', 'events': ['A', 'B', 'C', 'E', 'C', 'D']},
+				{'trace_id': '6', 'vendor': 'A', 'value': 'a', 'spend_area': 'a', 'item_type': 'a', 'events': ['A', 'C', 'B', 'E', 'C', 'D']},
+				{'trace_id': '7', 'vendor': 'A', 'value': 'a', 'spend_area': 'a', 'item_type': 'a', 'events': ['G', 'G', 'E', 'T', 'G']},
+			]
+		self.event_log = EventLog.from_traces(self.log)
+
+	def test_encoding(self):
+		self.assertEqual(len(self.event_log), 7)
+		self.assertEqual(self.event_log.n_events, 32)
+		self.assertEqual(self.event_log.code('A'), 0)
+		self.assertEqual(self.event_log.code('X'), -1)
+		self.assertEqual(self.event_log[4]['events'], self.log[4]['events'])
+		self.assertEqual(self.event_log[-1]['trace_id'], '7')
+
+	def test_inverted_index(self):
+		index = self.event_log.inverted_index()
+		self.assertIs(self.event_log.inverted_index(), index)
+		self.assertEqual(index.cases('C').tolist(), [0, 2, 4, 4, 5, 5])
+		self.assertEqual(index.positions('C').tolist(), [3, 1, 2, 4, 1, 4])
+		self.assertEqual(index.traces('C').tolist(), [0, 2, 4, 5])
+		self.assertEqual(index.count('G'), 3)
+		self.assertEqual(index.traces('X').tolist(), [])
+		for i in index.union(['E', 'T', 'E']).tolist():
+			self.assertIn(self.event_log.activities[self.event_log.codes[i]], ('E', 'T'))
+		self.assertEqual(len(index.union(['E', 'T'])), index.count('E') + index.count('T'))
+		self.assertEqual(self.event_log.activity_counts('B').tolist(), [1, 2, 1, 1, 1, 1, 0])
+
+	def test_count_matrix(self):
+		counts = self.event_log.count_matrix()
+		for i, trace in enumerate(self.log):
+			self.assertEqual(counts[i].tolist(), [trace['events'].count(a) for a in self.event_log.activities])
+
+		together = self.event_log.co_occurrences()
+		a, b, c = (self.event_log.code(x) for x in 'ABC')
+		self.assertEqual(together[a, b], 4)
+		self.assertEqual(together[b, c], 4)
+		self.assertEqual(together[c, c], 4)
+		self.assertTrue((together == together.T).all())
+
+		variants = self.event_log.variants()
+		weighted = variants.log.co_occurrences(variants.counts)
+		self.assertTrue((weighted == together).all())
+
+	def test_occurrence_positions(self):
+		c = self.event_log.code('C')
+		self.assertEqual(self.event_log.first_positions()[:, c].tolist(), [3, -1, 1, -1, 2, 1, -1])
+		self.assertEqual(self.event_log.last_positions()[:, c].tolist(), [3, -1, 1, -1, 4, 4, -1])
+		for i, trace in enumerate(self.log):
+			for code, activity in enumerate(self.event_log.activities):
+				events = trace['events']
+				first = events.index(activity) if activity in events else -1
+				last = len(events) - 1 - events[::-1].index(activity) if activity in events else -1
+				self.assertEqual(self.event_log.first_positions()[i, code], first)
+				self.assertEqual(self.event_log.last_positions()[i, code], last)
+
+	checks = [
+		('check_cardinality', ('B', 1, 0)),
+		('check_cardinality', ('C', -1, 1)),
+		('check_cardinality', ('X', 2, 1)),
+		('check_order', ('A', 'B')),
+		('check_response', ('B', 'E')),
+		('check_response', ('G', 'T', True)),
+		('check_precedence', ('A', 'E')),
+		('check_precedence', ('C', 'E', True)),
+		('check_precedence', ('E', 'C', True)),
+		('check_precedence', ('X', 'G', True)),
+		('check_response', ('C', 'D', True)),
+		('check_response', ('B', 'X', True)),
+		('check_response', ('C', 'C', True)),
+		('check_exclusive', ('A', 'B')),
+		('check_exclusive', ('E', 'F')),
+		('check_exclusive', ('A', 'X')),
+		('check_order_loop_count', ('B', 'C')),
+	]
+
+	def test_checks_accept_event_log(self):
+		for name, args in self.checks:
+			expected = getattr(self.rc, name)(self.log, *args)
+			res = getattr(self.rc, name)(self.event_log, *args)
+			self.assertEqual(res, expected, name)
+
+	def test_from_frame(self):
+		# interleave the cases, the events of a case keep their order
+		rows = sorted(
+			(j, trace['trace_id'], event, trace['vendor'])
+			for trace in self.log
+			for j, event in enumerate(trace['events'])
+		)
+		rows = [row[1:] for row in rows]
+		frame = pd.DataFrame(rows, columns=['case:concept:name', 'concept:name', 'case:Vendor'])
+		event_log = EventLog.from_frame(frame)
+
+		self.assertEqual(len(event_log), 7)
+		self.assertEqual([trace['events'] for trace in event_log], [trace['events'] for trace in self.log])
+		self.assertEqual(event_log[0]['vendor'], 'A')
+		self.assertEqual(event_log[0]['item_type'], 'N/A')
+		for name, args in self.checks:
+			self.assertEqual(getattr(self.rc, name)(event_log, *args), getattr(self.rc, name)(self.log, *args), name)
+
+	def test_from_frame_schema(self):
+		xes = '\n'.join([
+			'<log><trace>',
+			'<string key="concept:name" value="1"/>',
+			'<string key="(case) Vendor" value="vendor_1"/>',
+			'<event><string key="concept:name" value="A"/><string key="Cumulative net worth (EUR)" value="Start"/></event>',
+			'<event><string key="concept:name" value="B"/><float key="Cumulative net worth (EUR)" value="557.0"/></event>',
+			'</trace><trace>',
+			'<string key="concept:name" value="2"/>',
+			'<event><string key="concept:name" value="A"/></event>',
+			'</trace></log>',
+		])
+		frame = pd.DataFrame(
+			[('1', 'A', 'vendor_1', 'Start'), ('1', 'B', 'vendor_1', 557.0), ('2', 'A', None, None)],
+			columns=['case:concept:name', 'concept:name', 'case:Vendor', 'Cumulative net worth (EUR)'])
+
+		with TemporaryDirectory() as directory:
+			file = os.path.join(directory, 'log.xes')
+			with open(file, 'w') as f:
+				f.write(xes)
+			expected = load_event_log(file)
+
+		event_log = EventLog.from_frame(frame, schema=DEFAULT_SCHEMA)
+		for name in ('vendor', 'value', 'spend_area', 'item_type'):
+			self.assertEqual(list(event_log.attributes[name]), list(expected.attributes[name]), name)
+		self.assertEqual(event_log[0]['value'], 557.0)
+		self.assertIsNone(event_log[1]['value'])
+		self.assertEqual(event_log[1]['vendor'], 'N/A')
+
+		# without schema every attribute is a string
+		self.assertEqual(EventLog.from_frame(frame)[0]['value'], 'Start')
+
+	def test_import_where(self):
+		xes = ['<log>']
+		for i, category in enumerate(['consignment', '2-way match', 'consignment']):
+			xes += [
+				'<trace><string key="concept:name" value="%s"/>' % i,
+				'<string key="(case) Item Category" value="%s"/>' % category,
+				'<event><string key="concept:name" value="A"/><date key="time:timestamp" value="2018-01-01T00:00:00.000+01:00"/></event>',
+				'</trace>',
+			]
+		xes.append('</log>')
+
+		with TemporaryDirectory() as directory:
+			file = os.path.join(directory, 'log.xes')
+			with open(file, 'w') as f:
+				f.write('\n'.join(xes))
+
+			traces = list(iter_xes_log(file, where={'(case) Item Category': 'consignment'}))
+			self.assertEqual([trace['trace_id'] for trace in traces], ['0', '2'])
+			self.assertEqual(traces[0]['events'], ['A'])
+
+			event_log = load_event_log(file, where=lambda attributes: attributes['concept:name'] != '0')
+			self.assertEqual(list(event_log.case_ids), ['1', '2'])
+
+	def test_import_schema(self):
+		xes = '\n'.join([
+			'<log><trace>',
+			'<string key="concept:name" value="1"/>',
+			'<string key="(case) Vendor" value="vendor_1"/>',
+			'<boolean key="(case) Goods Receipt" value="true"/>',
+			'<event><string key="concept:name" value="Start"/><string key="Cumulative net worth (EUR)" value="Start"/></event>',
+			'<event><string key="concept:name" value="A"/><float key="Cumulative net worth (EUR)" value="557.0"/></event>',
+			'<event><string key="concept:name" value="B"/><string key="(case)_Item_Type" value="Service"/></event>',
+			'</trace></log>',
+		])
+
+		with TemporaryDirectory() as directory:
+			file = os.path.join(directory, 'log.xes')
+			with open(file, 'w') as f:
+				f.write(xes)
+
+			trace = next(iter_xes_log(file))
+			self.assertEqual(trace['vendor'], 'vendor_1')
+			self.assertEqual(trace['value'], 557.0)
+			self.assertEqual(trace['item_type'], 'Service')
+			self.assertEqual(trace['spend_area'], 'N/A')
+
+			value = Attribute('first_value', 'Cumulative net worth (EUR)', 'float', level='event')
+			schema = Schema([Attribute('goods_receipt', '(case) Goods Receipt', 'boolean'), value])
+			trace = next(iter_xes_log(file, schema=schema))
+			self.assertEqual(set(trace) - {'events', 'events_with_ts'}, {'trace_id', 'goods_receipt', 'first_value'})
+			self.assertIs(trace['goods_receipt'], True)
+			self.assertEqual(trace['first_value'], 557.0)
+
+			# "Start" is no float
+			with self.assertRaises(ValueError):
+				next(iter_xes_log(file, schema=Schema([value], ignored=())))
+
+	def test_variants(self):
+		log = self.log + [dict(trace, trace_id=trace['trace_id'] + 'b') for trace in self.log[::2]]
+		event_log = EventLog.from_traces(log)
+
+		variants = event_log.variants()
+		self.assertEqual(len(variants), 7)
+		self.assertEqual(variants.counts.tolist(), [2, 1, 2, 1, 2, 1, 2])
+		self.assertEqual(variants.cases([True, False, False, False, False, False, True]).tolist(), [0, 6, 7, 10])
+
+		rc = Rule_Checker(variants=True)
+		for name, args in self.checks:
+			expected = getattr(self.rc, name)(log, *args)
+			res = getattr(rc, name)(event_log, *args)
+			self.assertEqual(res, expected, name)
+
+	def test_throughput_event_log(self):
+		start = datetime(2018, 1, 1, tzinfo=timezone(timedelta(hours=1)))
+		log = []
+		for i, events in enumerate([
+				['RIR', 'CI', 'RIR', 'X', 'CI'],
+				['CI', 'RIR', 'RIR', 'CI'],
+				['RIR', 'RIR'],
+				['RIR', 'CI', 'CI'],
+			]):
+			events = ['Record Invoice Receipt' if e == 'RIR' else 'Clear Invoice' if e == 'CI' else e for e in events]
+			log.append({
+				'trace_id': str(i),
+				'events': events,
+				'events_with_ts': [
+					{'name': e, 'timestamp': start + timedelta(days=3 * i + 7 * j, hours=j)}
+					for j, e in enumerate(events)
+				],
+			})
+		event_log = EventLog.from_traces(log)
+
+		expected = self.rc.make_throughout_analysis(log, 'Record Invoice Receipt', 'Clear Invoice')
+		res = self.rc.make_throughout_analysis(event_log, 'Record Invoice Receipt', 'Clear Invoice')
+		self.assertEqual(res, expected)
+
+		for with_throughput in (False, True):
+			expected = self.rc.check_rir_ci(log, with_throughput=with_throughput)
+			res = self.rc.check_rir_ci(event_log, with_throughput=with_throughput)
+			self.assertEqual(res, expected)
+
+	def test_rir_ci_cutoff_local_time(self):
+		# the cutoff is local time: 2018-12-31T00:30+01:00 is on the last day,
+		# although it is 2018-12-30 in UTC
+		rir, ci = 'Record Invoice Receipt', 'Clear Invoice'
+		xes = ['<log>']
+		log = []
+		for i, (events, stamp) in enumerate([
+				([rir], '2018-12-31T00:30:00.000+01:00'),
+				([rir, ci], '2018-12-30T22:30:00.000-01:00'),
+				([rir], '2018-12-30T23:30:00.000+00:00'),
+			]):
+			xes.append('<trace><string key="concept:name" value="%s"/>' % i)
+			xes += [
+				'<event><string key="concept:name" value="%s"/><date key="time:timestamp" value="%s"/></event>' % (e, stamp)
+				for e in events
+			]
+			xes.append('</trace>')
+			log.append({
+				'trace_id': str(i),
+				'events': events,
+				'events_with_ts': [{'name': e, 'timestamp': datetime.fromisoformat(stamp)} for e in events],
+			})
+		xes.append('</log>')
+
+		with TemporaryDirectory() as directory:
+			file = os.path.join(directory, 'log.xes')
+			with open(file, 'w') as f:
+				f.write('\n'.join(xes))
+			loaded = load_event_log(file)
+
+		frame = pd.DataFrame(
+			[(t['trace_id'], e['name'], e['timestamp'].isoformat()) for t in log for e in t['events_with_ts']],
+			columns=['case:concept:name', 'concept:name', 'time:timestamp'])
+
+		expected = self.rc.check_rir_ci(log, throughput=(0, 0, 0, 0), with_throughput=True)
+		self.assertEqual(expected['violations'], (1, 33.3333))
+		for event_log in (EventLog.from_traces(log), loaded, EventLog.from_frame(frame)):
+			self.assertEqual(self.rc.check_rir_ci(event_log, throughput=(0, 0, 0, 0), with_throughput=True), expected)
+			self.assertEqual(event_log[0]['events_with_ts'][0]['timestamp'].utcoffset(), timedelta(hours=1))
+
+	def test_throughput_memoized(self):
+		start = datetime(2018, 1, 1)
+		events = ['Record Invoice Receipt', 'Clear Invoice', 'Record Invoice Receipt']
+		log = [{
+			'trace_id': '1',
+			'events': events,
+			'events_with_ts': [{'name': e, 'timestamp': start + timedelta(days=j)} for j, e in enumerate(events)],
+		}]
+		event_log = EventLog.from_traces(log)
+
+		for log in (log, event_log):
+			rc = Rule_Checker()
+			with mock.patch.object(rc, '_compute_throughput', wraps=rc._compute_throughput) as compute:
+				throughput = rc.make_throughout_analysis(log, 'Record Invoice Receipt', 'Clear Invoice')['throughput']
+				res = rc.check_rir_ci(log)
+				rc.check_rir_ci(log, with_throughput=True)
+				self.assertEqual(compute.call_count, 1)
+
+				self.assertEqual(rc.check_rir_ci(log, throughput=throughput), res)
+				self.assertEqual(compute.call_count, 1)
+
+				rc.invalidate_throughput(log)
+				rc.check_rir_ci(log)
+				self.assertEqual(compute.call_count, 2)
+
+	def test_throughput_memo_bounded(self):
+		start = datetime(2018, 1, 1)
+		events = ['Record Invoice Receipt', 'Clear Invoice']
+
+		def make_log(n):
+			return [{
+				'trace_id': str(i),
+				'events': events,
+				'events_with_ts': [{'name': e, 'timestamp': start + timedelta(days=i + j)} for j, e in enumerate(events)],
+			} for i in range(n)]
+
+		rc = Rule_Checker()
+		event_log = EventLog.from_traces(make_log(3))
+		rc.check_rir_ci(event_log)
+		self.assertEqual(len(rc._throughput), 1)
+		# the memo does not keep the log alive
+		del event_log
+		gc.collect()
+		self.assertEqual(len(rc._throughput), 0)
+
+		logs = [make_log(n) for n in range(1, 8)]
+		for log in logs:
+			rc.check_rir_ci(log)
+		self.assertEqual(len(rc._throughput_lists), rc.memoized_lists)
+
+		log = logs[-1]
+		with mock.patch.object(rc, '_compute_throughput', wraps=rc._compute_throughput) as compute:
+			rc.check_rir_ci(log)
+			self.assertEqual(compute.call_count, 0)
+			log.extend(make_log(2))
+			rc.check_rir_ci(log)
+			self.assertEqual(compute.call_count, 1)
+			rc.check_rir_ci(logs[0])
+			self.assertEqual(compute.call_count, 2)
+
+	def test_generator(self):
+		model = generator.ProcessModel()
+		log = EventLog.from_traces(generator.generate(2000, model))
+		self.assertEqual(self.rc.check_rir_rgr(log)['violations'][0], 0)
+		self.assertEqual(self.rc.check_rir_ci(log, throughput=(0, 0, 0, 0))['violations'][0], 0)
+
+		violations = {'rir_before_rgr': 0.2, 'unmatched_ci': 0.1}
+		log = EventLog.from_traces(generator.generate(2000, model, violations))
+		self.assertAlmostEqual(self.rc.check_rir_rgr(log)['violations'][1], 20, delta=3)
+		self.assertAlmostEqual(self.rc.check_rir_ci(log, throughput=(0, 0, 0, 0))['violations'][1], 10, delta=3)
+		self.assertEqual(self.rc.check_rgr_ci(log)['violations'][0], 0)
+
+		sample = list(generator.generate(50, generator.LogSample(log), seed=1))
+		self.assertEqual(len(sample), 50)
+		variants = {tuple(trace['events']) for trace in log.variants().log}
+		self.assertTrue(all(tuple(trace['events']) in variants for trace in sample))
+
+		with TemporaryDirectory() as directory:
+			file = os.path.join(directory, 'synthetic.xes.gz')
+			generator.write_xes(sample, file)
+			self.assertEqual(list(iter_xes_log(file, '{http://www.xes-standard.org}')), sample)
+
+
+class TestLogCache(TestCase):
+
+	def setUp(self):
+		directory = TemporaryDirectory()
+		self.addCleanup(directory.cleanup)
+		self.file = os.path.join(directory.name, 'log.xes')
+		self.write_log('A')
+		self.schema = Schema([
+			Attribute('vendor', '(case) Vendor'),
+			Attribute('created', '(case) Created', 'date'),
+		])
+
+	def write_log(self, activity):
+		xes = ['<log>']
+		for i, created in enumerate(['2018-12-31T00:30:00.000+01:00', None, '2018-12-31T00:30:00.000+01:00']):
+			xes += [
+				'<trace><string key="concept:name" value="%s"/>' % i,
+				'<string key="(case) Vendor" value="vendor_%s"/>' % i,
+				'<date key="(case) Created" value="%s"/>' % created if created else '',
+				'<event><string key="concept:name" value="%s"/><date key="time:timestamp" value="2018-01-01T00:00:00.000+01:00"/></event>' % activity,
+				'</trace>',
+			]
+		xes.append('</log>')
+		with open(self.file, 'w') as f:
+			f.write('\n'.join(xes))
+
+	def load(self, **kwargs):
+		# returns whether the log was parsed, i.e. the cache missed
+		with mock.patch.object(EventLog, 'from_traces', wraps=EventLog.from_traces) as parse:
+			log = load_event_log(self.file, cache=True, **kwargs)
+		return log, parse.called
+
+	def test_hit(self):
+		log, parsed = self.load()
+		self.assertTrue(parsed)
+		cached, parsed = self.load()
+		self.assertFalse(parsed)
+		self.assertEqual(list(cached), list(log))
+
+	def test_size_change(self):
+		self.load()
+		self.write_log('AB')
+		log, parsed = self.load()
+		self.assertTrue(parsed)
+		self.assertEqual(log[0]['events'], ['AB'])
+
+	def test_mtime_change(self):
+		self.load()
+		stat = os.stat(self.file)
+		os.utime(self.file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+		with mock.patch('util.cache.file_hash', wraps=log_cache.file_hash) as file_hash:
+			_, parsed = self.load()
+			self.assertFalse(parsed)
+			self.assertEqual(file_hash.call_count, 1)
+			# the new mtime is remembered
+			_, parsed = self.load()
+			self.assertFalse(parsed)
+			self.assertEqual(file_hash.call_count, 1)
+
+		# same size and new mtime, but another content
+		self.write_log('C')
+		os.utime(self.file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+		log, parsed = self.load()
+		self.assertTrue(parsed)
+		self.assertEqual(log[0]['events'], ['C'])
+
+	def test_key_change(self):
+		self.load()
+		where = {'(case) Vendor': 'vendor_1'}
+		log, parsed = self.load(where=where)
+		self.assertTrue(parsed)
+		self.assertEqual(list(log.case_ids), ['1'])
+		self.assertFalse(self.load(where=where)[1])
+		# the entries of the full and the filtered log are kept side by side
+		self.assertFalse(self.load()[1])
+
+		log, parsed = self.load(schema=self.schema)
+		self.assertTrue(parsed)
+		self.assertEqual(set(log.attributes), {'vendor', 'created'})
+		self.assertFalse(self.load(schema=self.schema)[1])
+
+	def test_version_change(self):
+		self.load()
+		with mock.patch('util.cache.CACHE_VERSION', log_cache.CACHE_VERSION + 1):
+			self.assertTrue(self.load()[1])
+			self.assertFalse(self.load()[1])
+
+	def test_date_attribute(self):
+		log = load_event_log(self.file, cache=True, schema=self.schema)
+		with mock.patch('util.EventLog.from_traces') as parse:
+			cached = load_event_log(self.file, cache=True, schema=self.schema)
+			parse.assert_not_called()
+
+		self.assertEqual(list(cached), list(log))
+		created = cached[0]['created']
+		self.assertEqual(created, datetime(2018, 12, 31, 0, 30, tzinfo=timezone(timedelta(hours=1))))
+		self.assertEqual(created.utcoffset(), timedelta(hours=1))
+		self.assertIsNone(cached[1]['created'])
@@ -0,0 +1,98 @@
+from unittest import TestCase
+
+from conformance_checking import parallel
+from conformance_checking.rule_base import Rule_Checker
+from conformance_checking.rule_set import (
+	Cardinality,
+	Exclusive,
+	Order,
+	OrderLoopCount,
+	Precedence,
+	Response,
+	RirCi,
+	RuleSet,
+)
+from util import EventLog
+
+
+class TestRuleSet(TestCase):
+
+	def setUp(self):
+		self.rc = Rule_Checker()
+		self.log = [
+				{'trace_id': '1', 'vendor': 'A', 'value': 'a', 'spend_area': 'a', 'item_type': 'a', 'events': ['A', 'B', 'D', 'C', 'E']},
+				{'trace_id': '2', 'vendor': 'A', 'value': 'a', 'spend_area': 'a', 'item_type': 'a', 'events': ['A', 'B', 'D', 'B', 'F']},
+				{'trace_id': '3', 'vendor': 'A', 'value': 'a', 'spend_area': 'a', 'item_type': 'a', 'events': ['B', 'C', 'E']},
+				{'trace_id': '4', 'vendor': 'A', 'value': 'a', 'spend_area': 'a', 'item_type': 'a', 'events': ['B', 'E']},
+				{'trace_id': '5', 'vendor': 'A', 'value': 'a', 'spend_area': 'a', 'item_type': 'a', 'events': ['A', 'B', 'C', 'E', 'C', 'D']},
+				{'trace_id': '6', 'vendor': 'A', 'value': 'a', 'spend_area': 'a', 'item_type': 'a', 'events': ['A', 'C', 'B', 'E', 'C', 'D']},
+				{'trace_id': '7', 'vendor': 'A', 'value': 'a', 'spend_area': 'a', 'item_type': 'a', 'events': ['G', 'G', 'E', 'T', 'G']},
+				{'trace_id': '8', 'vendor': 'A', 'value': 'a', 'spend_area': 'a', 'item_type': 'a', 'events': ['A', 'R', 'P', 'R', 'P']},
+			]
+		self.rules = RuleSet([
+			Cardinality('B', 1, 0),
+			Order('A', 'B'),
+			Response('B', 'E'),
+			Response('G', 'T', True),
+			Precedence('P', 'R'),
+			Precedence('C', 'E', True),
+			Exclusive('A', 'B'),
+			OrderLoopCount('B', 'C'),
+		])
+		self.expected = [
+			self.rc.check_cardinality(self.log, 'B', 1, 0),
+			self.rc.check_order(self.log, 'A', 'B'),
+			self.rc.check_response(self.log, 'B', 'E'),
+			self.rc.check_response(self.log, 'G', 'T', True),
+			self.rc.check_precedence(self.log, 'P', 'R'),
+			self.rc.check_precedence(self.log, 'C', 'E', True),
+			self.rc.check_exclusive(self.log, 'A', 'B'),
+			self.rc.check_order_loop_count(self.log, 'B', 'C'),
+		]
+
+	def test_evaluate(self):
+		self.assertEqual(self.rules.evaluate(self.log), self.expected)
+
+	def test_evaluate_event_log(self):
+		log = EventLog.from_traces(self.log)
+		self.assertEqual(self.rules.evaluate(log), self.expected)
+
+	def test_single_pass(self):
+		calls = []
+
+		class Spy(list):
+			def __iter__(self):
+				calls.append(1)
+				return super().__iter__()
+
+		self.rules.evaluate(Spy(self.log))
+		self.assertEqual(len(calls), 1)
+
+	def test_evaluate_parallel(self):
+		log = EventLog.from_traces(self.log)
+		self.assertEqual(self.rules.evaluate(log, processes=2), self.expected)
+		self.assertEqual(self.rules.evaluate(self.log, processes=2), self.expected)
+
+	def test_shard_bounds(self):
+		# one long trace among short ones
+		log = EventLog.from_traces(self.log[:3] + [{'trace_id': 'long', 'events': ['A', 'B'] * 50}] + self.log[3:])
+		for shards in (1, 2, 3, 5, 8, 9, 50):
+			bounds = parallel.shard_bounds(log, shards)
+			self.assertLessEqual(len(bounds), min(shards, len(log)))
+			self.assertEqual(bounds[0][0], 0)
+			self.assertEqual(bounds[-1][1], len(log))
+			for (start, end), (next_start, _) in zip(bounds, bounds[1:]):
+				self.assertLess(start, end)
+				self.assertEqual(end, next_start)
+
+		self.assertEqual(parallel.shard_bounds(EventLog.from_traces([]), 4), [])
+
+	def test_accumulate_parallel_uneven(self):
+		log = EventLog.from_traces(self.log[:3] + [{'trace_id': 'long', 'events': ['A', 'B', 'C', 'E'] * 50}] + self.log[3:])
+		rules = RuleSet(self.rules.rules + [RirCi()])
+		expected = rules.accumulate(rules.traces(log), rules.lookup_for(log))
+		for processes, shards in ((2, 3), (3, 5), (3, 50)):
+			self.assertEqual(parallel.accumulate_parallel(rules, log, processes, shards), expected, (processes, shards))
+
+		# more processes than traces
+		self.assertEqual(self.rules.evaluate(log, processes=len(log) + 3), self.rules.evaluate(log))
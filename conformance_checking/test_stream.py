@@ -0,0 +1,103 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from conformance_checking import stream
+from conformance_checking.online import OnlineChecker
+from conformance_checking.rule_set import Cardinality, Order, Precedence, Response, RuleSet
+
+
+class TestStream(TestCase):
+
+	def setUp(self):
+		start = datetime(2018, 1, 1, tzinfo=timezone.utc)
+		self.log = [
+				{'trace_id': '1', 'vendor': 'V1', 'events': ['A', 'B', 'D', 'C', 'E']},
+				{'trace_id': '2', 'vendor': 'V2', 'events': ['A', 'B', 'D', 'B', 'F']},
+				{'trace_id': '3', 'vendor': 'V1', 'events': ['B', 'C', 'E']},
+				{'trace_id': '4', 'vendor': 'V3', 'events': ['B', 'E', 'A']},
+			]
+		for k, trace in enumerate(self.log):
+			trace['events_with_ts'] = [
+					{'name': event, 'timestamp': start + timedelta(hours=i, minutes=k)}
+					for i, event in enumerate(trace['events'])
+				]
+		self.rules = [
+			Cardinality('B', 1, 0),
+			Order('A', 'B'),
+			Response('B', 'E'),
+			Precedence('C', 'E', True),
+		]
+		self.expected = RuleSet(self.rules).evaluate(self.log)
+
+	def consume(self, source, **kwargs):
+		return asyncio.run(stream.consume(OnlineChecker(self.rules), source, **kwargs))
+
+	def test_log_events(self):
+		events = list(stream.log_events(self.log))
+		self.assertEqual(len(events), 16)
+		self.assertEqual([e[0] for e in events[:5]], ['1', '2', '3', '4', '1'])
+		self.assertEqual(events[0][3], {'vendor': 'V1'})
+
+	def test_json(self):
+		event = next(iter(stream.log_events(self.log)))
+		self.assertEqual(stream.from_json(stream.to_json(event)), event)
+
+	def test_async_iterator(self):
+		snapshots = []
+		reports = self.consume(stream.replay(stream.log_events(self.log)), on_snapshot=snapshots.append, interval=0, batch_size=2)
+		self.assertEqual(reports, self.expected)
+		self.assertGreater(len(snapshots), 1)
+		self.assertEqual(snapshots[-1], self.expected)
+
+	def test_socket(self):
+		async def run():
+			server = await stream.serve_events(stream.log_events(self.log))
+			port = server.sockets[0].getsockname()[1]
+			try:
+				return await stream.consume(OnlineChecker(self.rules), stream.read_socket(port=port))
+			finally:
+				server.close()
+				await server.wait_closed()
+
+		self.assertEqual(asyncio.run(run()), self.expected)
+
+	def test_tail(self):
+		with TemporaryDirectory() as directory:
+			file = os.path.join(directory, 'events.jsonl')
+			lines = [stream.to_json(event) for event in stream.log_events(self.log)]
+
+			with open(file, 'w') as f:
+				f.write('\n'.join(lines[:10]) + '\n' + lines[10][:20])
+
+			async def append():
+				await asyncio.sleep(0.05)
+				with open(file, 'a') as f:
+					f.write(lines[10][20:] + '\n' + '\n'.join(lines[11:]) + '\n')
+
+			async def run():
+				checker = OnlineChecker(self.rules)
+				task = asyncio.ensure_future(stream.consume(checker, stream.tail_jsonl(file, poll=0.01)))
+				await append()
+				while sum(case.length for case in checker.cases.values()) < len(lines):
+					await asyncio.sleep(0.01)
+				task.cancel()
+				return checker.reports()
+
+			self.assertEqual(asyncio.run(run()), self.expected)
+			reports = self.consume(stream.tail_jsonl(file, follow=False))
+			self.assertEqual(reports, self.expected)
+
+	def test_backpressure(self):
+		checker = OnlineChecker(self.rules)
+		ahead = []
+
+		async def source():
+			for n, event in enumerate(stream.log_events(self.log)):
+				ahead.append(n - sum(case.length for case in checker.cases.values()))
+				yield event
+
+		asyncio.run(stream.consume(checker, source(), queue_size=2, batch_size=1))
+		self.assertLessEqual(max(ahead), 4)
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+from conformance_checking import vectorized
+from util import EventLog
+
+
+class TestVectorized(TestCase):
+
+	def setUp(self):
+		start = datetime(2018, 1, 1, tzinfo=timezone.utc)
+		self.log = EventLog.from_traces([
+				{'trace_id': str(i), 'events': events, 'events_with_ts': [
+					{'name': e, 'timestamp': start + timedelta(hours=12 * j)} for j, e in enumerate(events)
+				]}
+				for i, events in enumerate([
+					['A', 'B', 'A', 'A', 'B', 'B', 'B'],
+					['B', 'A', 'X', 'B'],
+					['A', 'A'],
+					[],
+					['B', 'B', 'A', 'B', 'A', 'B'],
+				])
+			])
+
+	def test_throughput(self):
+		res = vectorized.throughput(self.log, 'A', 'B')
+		self.assertEqual(res.cases.tolist(), [0, 0, 0, 1, 4, 4])
+		self.assertEqual(res.ranks.tolist(), [1, 2, 3, 1, 1, 2])
+		self.assertEqual(res.times(precise=True).tolist(), [0.5, 1.0, 1.0, 1.0, 0.5, 0.5])
+		self.assertEqual(res.times().tolist(), [0, 1, 1, 1, 0, 0])
+		self.assertEqual(res.statistics()[:2], (0.5, 0.5))
+
+	def test_throughput_unknown_activity(self):
+		self.assertEqual(len(vectorized.throughput(self.log, 'A', 'Y')), 0)
+		self.assertEqual(len(vectorized.throughput(self.log, 'A', 'A')), 0)
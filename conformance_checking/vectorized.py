@@ -0,0 +1,223 @@
+"""
+Vectorized NumPy backend for checks that are simple per-case aggregations.
+
+The functions operate on the integer-encoded ``util.EventLog``, mostly on
+columns of its activity count matrix and position tables, and return the
+per-trace violations, ``Rule_Checker`` counts them (once per variant if
+enabled) and wraps them into its usual reports.
+"""
+
+import numpy as np
+
+from util import EventLog
+from util.event_log import DAY
+
+
+def cardinality_violations(log: EventLog, activity: str, upper: int, lower: int):
+    """
+    Find the traces violating the cardinality of the given activity.
+
+    :param log: event log
+    :param activity: name of the activity
+    :param upper: max. number of occurrence in one trace, -1 if infinite
+    :param lower: min. number of occurrence in one trace
+    :return: per trace, whether it violates the upper and the lower bound
+    """
+
+    counts = log.activity_counts(activity)
+
+    below = counts < lower
+    above = ~below & (counts > upper) if upper != -1 else np.zeros_like(below)
+
+    return above, below
+
+
+def exclusive_violations(log: EventLog, first_activity: str, second_activity: str):
+    """
+    Find the traces containing both of the given activities.
+
+    :param log: event log
+    :param first_activity: activity
+    :param second_activity: activity
+    :return: per trace, whether it contains both activities
+    """
+
+    return (log.activity_counts(first_activity) > 0) & (
+        log.activity_counts(second_activity) > 0
+    )
+
+
+def loop_count_violations(log: EventLog, first: str, second: str):
+    """
+    Find the traces with different numbers of the given activities, see
+    ``Rule_Checker.check_order_loop_count``.
+
+    :param log: event log
+    :param first: activity
+    :param second: activity
+    :return: per trace, whether the numbers of occurrences differ
+    """
+
+    return log.activity_counts(first) != log.activity_counts(second)
+
+
+def precedence_single_violations(log: EventLog, preceding: str, request: str):
+    """
+    Single-occurrence precedence: the first ``request`` of a trace must come
+    after the first ``preceding``, see ``Rule_Checker.check_precedence``.
+
+    :param log: event log
+    :param preceding: activity
+    :param request: activity
+    :return: per trace, whether it is a candidate (contains the request) and
+    whether it violates the rule
+    """
+
+    requests = _column(log.first_positions(), log.code(request))
+    precedings = _column(log.first_positions(), log.code(preceding))
+
+    candidate = requests >= 0
+    return candidate, candidate & ((precedings < 0) | (requests < precedings))
+
+
+def response_single_violations(log: EventLog, request: str, response: str):
+    """
+    Single-occurrence response: the last ``request`` of a trace must be
+    followed by a ``response``, see ``Rule_Checker.check_response``.
+
+    :param log: event log
+    :param request: activity
+    :param response: activity
+    :return: per trace, whether it is a candidate (contains the request) and
+    whether it violates the rule
+    """
+
+    requests = _column(log.last_positions(), log.code(request))
+    responses = _column(log.last_positions(), log.code(response))
+
+    candidate = requests >= 0
+    return candidate, candidate & ((responses < 0) | (requests > responses))
+
+
+def _column(table: np.ndarray, code: int) -> np.ndarray:
+    if code < 0:
+        return np.full(len(table), -1, dtype=table.dtype)
+    return table[:, code]
+
+
+class Throughput:
+    """
+    Throughput times between paired occurrences of two activities.
+
+    The k-th paired ``second`` of a trace is matched with the k-th ``first`` of
+    the trace, see ``Rule_Checker.make_throughout_analysis``.
+    """
+
+    def __init__(self, cases: np.ndarray, ranks: np.ndarray, deltas: np.ndarray):
+        """
+        :param cases: trace of every pair
+        :param ranks: k of every pair, starting at 1
+        :param deltas: nanoseconds between the two events of every pair
+        """
+
+        self.cases = cases
+        self.ranks = ranks
+        self.deltas = deltas
+
+    def __len__(self) -> int:
+        return len(self.deltas)
+
+    def times(self, unit: int = DAY, precise=False) -> np.ndarray:
+        """
+        :param unit: nanoseconds per unit, days by default
+        :param precise: return fractions of units instead of rounding down to
+        whole units like ``timedelta.days``
+        :return: throughput time of every pair
+        """
+
+        if precise:
+            return self.deltas / unit
+        return self.deltas // unit
+
+    def statistics(self, unit: int = DAY, precise=False) -> tuple:
+        """
+        :return: average, median, standard deviation and variance of the
+        throughput times, see :meth:`times`
+        """
+
+        times = self.times(unit, precise)
+        return np.average(times), np.median(times), np.std(times), np.var(times)
+
+
+def throughput(log: EventLog, first: str, second: str) -> Throughput:
+    """
+    Pair the occurrences of two activities within every trace.
+
+    A ``second`` is paired if more ``first`` than paired ``second`` events
+    precede it. With j the rank of a ``second`` in its trace and F_i the number
+    of ``first`` events before the i-th ``second``, the number of pairs after
+    the j-th ``second`` is j + min(0, min over i <= j of F_i - i), a running
+    minimum per trace. The k-th pair of a trace is then joined with the k-th
+    ``first`` of the trace.
+
+    :param log: event log
+    :param first: activity
+    :param second: activity
+    :return: throughput times of all pairs, ordered by trace and rank
+    """
+
+    n = len(log)
+    first_code = log.code(first)
+    second_code = log.code(second)
+
+    if first_code < 0 or second_code < 0 or first_code == second_code:
+        # no second can be paired
+        empty = np.empty(0, dtype=np.int64)
+        return Throughput(empty, empty, empty)
+
+    relevant = log.inverted_index().union((first, second))
+    cases = log.event_cases[relevant]
+    firsts = log.codes[relevant] == first_code
+
+    # number of first events up to every relevant event of a trace
+    first_starts = _starts(cases[firsts], n)
+    first_counts = np.cumsum(firsts) - first_starts[cases]
+
+    seconds = ~firsts
+    second_events = relevant[seconds]
+    second_cases = cases[seconds]
+    ranks = (
+        np.arange(1, len(second_events) + 1) - _starts(second_cases, n)[second_cases]
+    )
+
+    # segmented running minimum: shift every trace below all earlier ones
+    values = first_counts[seconds] - ranks
+    shift = (n - second_cases) * (2 * int(log.trace_lengths().max(initial=0)) + 2)
+    running = np.minimum.accumulate(values + shift) - shift
+    pairs = ranks + np.minimum(running, 0)
+
+    previous = np.zeros_like(pairs)
+    previous[1:] = pairs[:-1]
+    previous[ranks == 1] = 0
+    paired = pairs > previous
+
+    cases = second_cases[paired]
+    ranks = pairs[paired]
+    first_events = relevant[firsts][first_starts[cases] + ranks - 1]
+
+    timestamps = log.timestamps
+    deltas = timestamps[second_events[paired]] - timestamps[first_events]
+
+    return Throughput(cases, ranks, deltas)
+
+
+def _starts(cases: np.ndarray, n: int) -> np.ndarray:
+    """
+    :param cases: sorted trace indices of some events
+    :param n: number of traces
+    :return: position of the first of these events of every trace
+    """
+
+    starts = np.zeros(n, dtype=np.int64)
+    np.cumsum(np.bincount(cases, minlength=n)[:-1], out=starts[1:])
+    return starts
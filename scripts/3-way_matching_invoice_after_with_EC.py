@@ -8,7 +8,13 @@ path_root = Path(__file__).parents[1]
 os.chdir(path_root)
 sys.path.append(str(path_root))
 
-from conformance_checking.rule_base import Rule_Checker
+from conformance_checking.rule_set import (
+    Cardinality,
+    Order,
+    Precedence,
+    Response,
+    RuleSet,
+)
 from util import import_xes_log
 
 # %%
@@ -24,98 +30,63 @@ log = import_xes_log(log_file, "{http://www.xes-standard.org}")
 print("length: %s" % len(log))
 print(log[0])
 
-rc = Rule_Checker()
+# all rules are checked in a single pass over the log
+order_rules = [
+    # Order("SRM: Change was Transmitted", "Create Purchase Order Item"),
+    Order("Record Service Entry Sheet", "Record Invoice Receipt"),
+    Order("Record Goods Receipt", "Record Invoice Receipt"),
+]
+response_rules = [
+    Response("Record Goods Receipt", "Record Invoice Receipt"),
+    Response("Record Invoice Receipt", "Clear Invoice"),
+    Response("Record Invoice Receipt", "Clear Invoice", True),
+]
+precedence_rules = [
+    Precedence("Record Goods Receipt", "Clear Invoice", file=log_file_short),
+    Precedence("Record Invoice Receipt", "Clear Invoice", file=log_file_short),
+    Precedence("Record Goods Receipt", "Clear Invoice", True, file=log_file_short),
+    Precedence("Record Goods Receipt", "Record Invoice Receipt", file=log_file_short),
+    Precedence("Record Invoice Receipt", "Clear Invoice", True, file=log_file_short),
+    Precedence(
+        "Vendor creates invoice", "Record Invoice Receipt", True, file=log_file_short
+    ),
+    Precedence(
+        "Create Purchase Order Item",
+        "Vendor creates invoice",
+        True,
+        file=log_file_short,
+    ),
+]
+cardinality_rules = [
+    Cardinality("Create Purchase Order Item", 1, 1),
+    Cardinality("Record Goods Receipt", 1, 1),
+    Cardinality("Record Invoice Receipt", 1, 1),
+    Cardinality("Clear Invoice", 1, 1),
+    Cardinality("Vendor creates invoice", 1, 1),
+]
+
+reports = iter(
+    RuleSet(
+        order_rules + response_rules + precedence_rules + cardinality_rules
+    ).evaluate(log)
+)
 # %%
 print("####### order rules ########")
-# res = rc.check_order(log, "SRM: Change was Transmitted", "Create Purchase Order Item")
-# pprint(res)
-# print()
-
-res = rc.check_order(log, "Record Service Entry Sheet", "Record Invoice Receipt")
-pprint(res)
-print()
-
-res = rc.check_order(log, "Record Goods Receipt", "Record Invoice Receipt")
-pprint(res)
-print()
+for _ in order_rules:
+    pprint(next(reports))
+    print()
 # %%
 print("####### response rules ########")
-res = rc.check_response(log, "Record Goods Receipt", "Record Invoice Receipt")
-pprint(res)
-print()
-
-res = rc.check_response(log, "Record Invoice Receipt", "Clear Invoice")
-pprint(res)
-print()
-
-res = rc.check_response(log, "Record Invoice Receipt", "Clear Invoice", True)
-pprint(res)
-print()
+for _ in response_rules:
+    pprint(next(reports))
+    print()
 # %%
 print("####### precedence rules ########")
-res = rc.check_precedence(
-    log, "Record Goods Receipt", "Clear Invoice", file=log_file_short
-)
-pprint(res)
-print()
-
-res = rc.check_precedence(
-    log, "Record Invoice Receipt", "Clear Invoice", file=log_file_short
-)
-pprint(res)
-print()
-
-res = rc.check_precedence(
-    log, "Record Goods Receipt", "Clear Invoice", True, file=log_file_short
-)
-pprint(res)
-print()
-
-res = rc.check_precedence(
-    log, "Record Goods Receipt", "Record Invoice Receipt", file=log_file_short
-)
-pprint(res)
-print()
-
-res = rc.check_precedence(
-    log, "Record Invoice Receipt", "Clear Invoice", True, file=log_file_short
-)
-pprint(res)
-print()
-
-res = rc.check_precedence(
-    log, "Vendor creates invoice", "Record Invoice Receipt", True, file=log_file_short
-)
-pprint(res)
-print()
-
-res = rc.check_precedence(
-    log,
-    "Create Purchase Order Item",
-    "Vendor creates invoice",
-    True,
-    file=log_file_short,
-)
-pprint(res)
-print()
+for _ in precedence_rules:
+    pprint(next(reports))
+    print()
 # %%
 print("####### cardinality rules ########")
-
-res = rc.check_cardinality(log, "Create Purchase Order Item", 1, 1)
-pprint(res)
-print()
-
-res = rc.check_cardinality(log, "Record Goods Receipt", 1, 1)
-pprint(res)
-print()
-
-res = rc.check_cardinality(log, "Record Invoice Receipt", 1, 1)
-pprint(res)
-print()
-
-res = rc.check_cardinality(log, "Clear Invoice", 1, 1)
-pprint(res)
-print()
-
-res = rc.check_cardinality(log, "Vendor creates invoice", 1, 1)
-pprint(res)
+for _ in cardinality_rules:
+    pprint(next(reports))
+    print()
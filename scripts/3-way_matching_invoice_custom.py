@@ -9,7 +9,7 @@ os.chdir(path_root)
 sys.path.append(str(path_root))
 
 from conformance_checking.rule_base import Rule_Checker
-from util import import_xes_log
+from util import load_event_log
 
 # %%
 working_dir = Path("data")
@@ -17,11 +17,12 @@ working_dir = Path("data")
 os.chdir(working_dir)
 print("changed directory to: %s" % os.getcwd())
 
-# Unpack the xes.gz file using zip manager
-log_file = Path("BPI_Challenge_2019-3-w-after.xes")
+# compressed logs are read directly, no need to unpack them first
+log_file = Path("BPI_Challenge_2019-3-w-after.xes.gz")
 log_file_short = str(log_file).split(".xes")[0]
 
-log = import_xes_log(log_file, "{http://www.xes-standard.org}")
+# the parsed log is cached next to the file, later runs skip the XML parsing
+log = load_event_log(log_file, "{http://www.xes-standard.org}", cache=True)
 print("length: %s" % len(log))
 print(log[0])
 
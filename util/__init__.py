@@ -1,99 +1,396 @@
+import bz2
+import gzip
+import lzma
 import pandas as pd
 import xml.etree.ElementTree as xmlTree
 
-from datetime import datetime
+from . import cache as log_cache
+from .event_log import (
+    ACTIVITY_COLUMN,
+    ATTRIBUTE_COLUMNS,
+    CASE_COLUMN,
+    TIMESTAMP_COLUMN,
+    EventLog,
+    InvertedIndex,
+    Variants,
+    parse_timestamp,
+)
+from .schema import DEFAULT_SCHEMA, Attribute, Schema
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for .zst logs
+    zstandard = None
+
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.parquet
+except ImportError:  # optional, only needed for Parquet and Arrow logs
+    pyarrow = None
+
+
+# magic bytes of the supported compression formats
+GZIP_MAGIC = b"\x1f\x8b"
+BZIP2_MAGIC = b"BZh"
+XZ_MAGIC = b"\xfd7zXZ\x00"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+PARQUET_MAGIC = b"PAR1"
+ARROW_FILE_MAGIC = b"ARROW1"
+ARROW_STREAM_MAGIC = b"\xff\xff\xff\xff"
 
 
 def import_csv_log(file: str):
     return pd.read_csv(file)
 
 
-def import_xes_log(file, prefix=""):
-    log = []
-
-    tree = xmlTree.parse(file)
-    root = tree.getroot()
-    # find all traces
-    print(root)
-    traces = root.findall("".join([prefix, "trace"]))
-
-    for t in traces:
-        trace_id = None
-        vendor = None
-        value = None
-        spend_area = None
-        item_type = None
-
-        # get trace id
-        for a in t.findall("".join([prefix, "string"])):
-            if a.attrib["key"] == "concept:name":
-                trace_id = a.attrib["value"]
-
-        events = []
-        events_withts = []
-        # events
-        for event in t.iter("".join([prefix, "event"])):
-            single_event = {"name": "", "timestamp": None}
-
-            for a in event: 
-                if a.attrib["key"] == "concept:name":
-                    single_event["name"] = a.attrib["value"]
-                    events.append(a.attrib["value"])
-
-                if a.attrib["key"] == "time:timestamp":
-                    single_event["timestamp"] = datetime.strptime(
-                        a.attrib["value"], "%Y-%m-%dT%H:%M:%S.%f%z"
-                    )
-
-                # case attributes
-                if (
-                    a.attrib["key"] == "(case)_Vendor"
-                    and (a.attrib["value"] != "Start" and a.attrib["value"] != "End")
-                    and vendor is None
-                ):
-                    vendor = a.attrib["value"]
-                if (
-                    a.attrib["key"] == "Cumulative_net_worth_(EUR)"
-                    and (a.attrib["value"] != "Start" and a.attrib["value"] != "End")
-                    and value is None
-                ):
-                    value = a.attrib["value"]
-                if (
-                    a.attrib["key"] == "(case)_Spend_area_text"
-                    and (a.attrib["value"] != "Start" and a.attrib["value"] != "End")
-                    and spend_area is None
-                ):
-                    spend_area = a.attrib["value"]
-                if (
-                    a.attrib["key"] == "(case)_Item_Type"
-                    and (a.attrib["value"] != "Start" and a.attrib["value"] != "End")
-                    and item_type is None
-                ):
-                    item_type = a.attrib["value"]
-            
-            events_withts.append(single_event)
-
-        if vendor is None:
-            vendor = "N/A"
-        if value is None:
-            value = "N/A"
-        if spend_area is None:
-            spend_area = "N/A"
-        if item_type is None:
-            item_type = "N/A"
-            spend_area = "N/A"
-
-        log.append(
-            {
-                "trace_id": trace_id,
-                "vendor": vendor,
-                "value": value,
-                "spend_area": spend_area,
-                "item_type": item_type,
-                "events": events,
-                "events_with_ts": events_withts,
+def open_log(file):
+    """
+    Open a log file for binary reading, decompressing it on the fly.
+
+    Gzip, bzip2, xz and zstd compressed files are detected by their magic
+    bytes, anything else is returned as a plain file.
+
+    :param file: path to the (compressed) log file
+    :return: binary file object
+    """
+
+    with open(file, "rb") as f:
+        magic = f.read(6)
+
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(file, "rb")
+    if magic.startswith(BZIP2_MAGIC):
+        return bz2.open(file, "rb")
+    if magic.startswith(XZ_MAGIC):
+        return lzma.open(file, "rb")
+    if magic.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise ImportError(
+                "Reading zstd compressed logs requires the 'zstandard' package"
+            )
+        return zstandard.ZstdDecompressor().stream_reader(
+            open(file, "rb"), closefd=True
+        )
+
+    return open(file, "rb")
+
+
+def import_xes_log(file, prefix="", where=None, schema=DEFAULT_SCHEMA):
+    """
+    Import an XES event log into a list of traces.
+
+    The file may be gzip, bzip2, xz or zstd compressed, see :func:`open_log`.
+
+    Thin wrapper around :func:`iter_xes_log`, which keeps the whole log in
+    memory. Prefer the generator for large logs.
+
+    :param file: path to the (compressed) XES file
+    :param prefix: XML namespace prefix of the tags, e.g. "{http://www.xes-standard.org}"
+    :param where: keep only the matching traces, see :func:`trace_predicate`
+    :param schema: case attributes to import, see ``util.schema``
+    :return: list of traces
+    """
+
+    log = list(iter_xes_log(file, prefix, where=where, schema=schema))
+
+    print("Found %s traces" % (len(log)))
+    return log
+
+
+def load_event_log(
+    file, prefix="", cache=False, where=None, schema=DEFAULT_SCHEMA
+) -> EventLog:
+    """
+    Import an XES event log straight into a columnar ``EventLog``.
+
+    The traces are streamed from :func:`iter_xes_log` and encoded one at a time,
+    so the list of trace dicts is never built.
+
+    :param file: path to the (compressed) XES file
+    :param prefix: XML namespace prefix of the tags, e.g. "{http://www.xes-standard.org}"
+    :param cache: reuse the binary cache next to the file if it is still valid,
+    and create it otherwise, see ``util.cache``; logs filtered by a callable
+    are never cached
+    :param where: keep only the matching traces, see :func:`trace_predicate`
+    :param schema: case attributes to import, see ``util.schema``
+    :return: event log
+    """
+
+    key = {"prefix": prefix, "schema": schema.key()}
+    if where is not None:
+        if callable(where):
+            cache = False
+        else:
+            key["where"] = {
+                k: [v] if isinstance(v, str) else sorted(v) for k, v in where.items()
             }
+
+    log = log_cache.read_cache(file, key) if cache else None
+    if log is None:
+        # the timestamps are converted in bulk while encoding
+        log = EventLog.from_traces(
+            iter_xes_log(file, prefix, False, where, schema), schema.names
         )
+        if cache:
+            log_cache.write_cache(file, log, key)
 
-    print("Found %s traces" % (len(traces)))
+    print("Found %s traces" % (len(log)))
     return log
+
+
+def load_event_table(
+    file,
+    case_column=CASE_COLUMN,
+    activity_column=ACTIVITY_COLUMN,
+    timestamp_column=TIMESTAMP_COLUMN,
+    attributes: dict = None,
+    where: dict = None,
+    schema=DEFAULT_SCHEMA,
+) -> EventLog:
+    """
+    Import a Parquet or Arrow IPC event table (one row per event) into an
+    ``EventLog``, see ``EventLog.from_frame``.
+
+    :param file: path to the Parquet or Arrow IPC file
+    :param case_column: column of the case ids
+    :param activity_column: column of the activity names
+    :param timestamp_column: column of the timestamps
+    :param attributes: case attribute name -> column, ``ATTRIBUTE_COLUMNS`` by
+    default
+    :param where: keep only the events whose columns match, dict of column ->
+    accepted value or collection of accepted values; meant for case attribute
+    columns, which keeps or drops whole cases
+    :param schema: types and defaults of the case attributes, like those of
+    :func:`load_event_log`
+    :return: event log
+    """
+
+    if attributes is None:
+        attributes = ATTRIBUTE_COLUMNS
+
+    columns = [case_column, activity_column, timestamp_column]
+    columns += list(attributes.values())
+
+    table = read_event_table(file, columns, where)
+    log = EventLog.from_frame(
+        table.to_pandas(),
+        case_column,
+        activity_column,
+        timestamp_column,
+        attributes,
+        schema,
+    )
+
+    print("Found %s traces" % (len(log)))
+    return log
+
+
+def read_event_table(file, columns: list = None, where: dict = None):
+    """
+    Read the given columns of a Parquet or Arrow IPC file.
+
+    Only the requested columns are read, columns missing in the file are
+    skipped. Parquet files are read through a memory map, Arrow IPC files are
+    memory-mapped without copying.
+
+    :param file: path to the Parquet or Arrow IPC (file or stream format) file
+    :param columns: names of the columns, all if None
+    :param where: keep only the rows whose columns match, dict of column ->
+    accepted value or collection of accepted values; pushed down into the
+    Parquet reader, which skips non-matching row groups
+    :return: pyarrow table
+    """
+
+    if pyarrow is None:
+        raise ImportError(
+            "Reading Parquet and Arrow logs requires the 'pyarrow' package"
+        )
+
+    with open(file, "rb") as f:
+        magic = f.read(6)
+
+    accepted = {
+        column: [value] if isinstance(value, str) else list(value)
+        for column, value in (where or {}).items()
+    }
+
+    if magic.startswith(PARQUET_MAGIC):
+        if columns is not None:
+            names = pyarrow.parquet.read_schema(file).names
+            columns = [c for c in columns if c in names]
+        filters = [(column, "in", values) for column, values in accepted.items()]
+        return pyarrow.parquet.read_table(
+            file, columns=columns, memory_map=True, filters=filters or None
+        )
+
+    # the table references the mapped memory, the map is closed with it
+    source = pyarrow.memory_map(str(file))
+    if magic.startswith(ARROW_FILE_MAGIC):
+        table = pyarrow.ipc.open_file(source).read_all()
+    elif magic.startswith(ARROW_STREAM_MAGIC):
+        table = pyarrow.ipc.open_stream(source).read_all()
+    else:
+        raise ValueError("%s is neither a Parquet nor an Arrow IPC file" % file)
+
+    for column, values in accepted.items():
+        table = table.filter(
+            pyarrow.compute.is_in(table[column], pyarrow.array(values))
+        )
+    if columns is not None:
+        table = table.select([c for c in columns if c in table.column_names])
+    return table
+
+
+def iter_xes_log(
+    file, prefix="", parse_timestamps=True, where=None, schema=DEFAULT_SCHEMA
+):
+    """
+    Stream the traces of an XES event log one at a time.
+
+    The file is parsed incrementally and every trace element is cleared as soon
+    as its dict has been built, so memory stays flat regardless of log size.
+
+    :param file: path to the (compressed) XES file
+    :param prefix: XML namespace prefix of the tags, e.g. "{http://www.xes-standard.org}"
+    :param parse_timestamps: convert the timestamps to datetimes, otherwise the
+    raw strings are kept for bulk conversion, see ``util.event_log.parse_timestamps``
+    :param where: keep only the matching traces, see :func:`trace_predicate`;
+    the trace attributes are checked before the events of the trace are built
+    :param schema: case attributes to import, see ``util.schema``
+    :return: generator of traces
+    """
+
+    with open_log(file) as f:
+        yield from _iter_xes_traces(f, prefix, parse_timestamps, where, schema)
+
+
+def _iter_xes_traces(
+    source, prefix, parse_timestamps, where=None, schema=DEFAULT_SCHEMA
+):
+    trace_tag = "".join([prefix, "trace"])
+    event_tag = "".join([prefix, "event"])
+    string_tag = "".join([prefix, "string"])
+
+    selected = trace_predicate(where)
+    trace_keys = schema.trace_keys
+
+    context = xmlTree.iterparse(source, events=("start", "end"))
+    _, root = next(context)
+
+    depth = 0
+    trace = None
+    # trace attributes for the predicate and whether the trace passed it,
+    # None while not yet decided
+    attributes = {}
+    keep = None
+
+    for action, elem in context:
+        if action == "start":
+            depth += 1
+            if depth == 1 and elem.tag == trace_tag:
+                trace = _TraceBuilder(parse_timestamps, schema)
+                attributes = {}
+                keep = True if selected is None else None
+            elif depth == 2 and keep is None and elem.tag == event_tag:
+                # the trace attributes precede the events, decide before the
+                # first event is built
+                keep = selected(attributes)
+            continue
+
+        depth -= 1
+
+        if trace is None:
+            continue
+
+        if depth == 0:
+            if keep is None:
+                keep = selected(attributes)
+            if keep:
+                yield trace.build()
+            # the trace itself is done, drop it from the tree
+            trace = None
+            root.clear()
+        elif depth == 1 and elem.tag == event_tag:
+            if keep:
+                trace.add_event(elem)
+            elem.clear()
+        elif depth == 1:
+            key = elem.attrib.get("key")
+            if keep is None:
+                attributes[key] = elem.attrib.get("value")
+            if key == "concept:name" and elem.tag == string_tag:
+                trace.trace_id = elem.attrib["value"]
+            elif key in trace_keys:
+                trace.add_attribute(trace_keys[key], elem.attrib["value"])
+
+
+def trace_predicate(where):
+    """
+    :param where: None, predicate on the dict of trace attributes (XES key ->
+    raw value) or dict of XES key -> accepted value or collection of accepted
+    values, e.g. {"(case) Item Category": "3-way match, invoice after GR"}
+    :return: predicate on the dict of trace attributes, None to keep all traces
+    """
+
+    if where is None or callable(where):
+        return where
+
+    accepted = {
+        key: {value} if isinstance(value, str) else set(value)
+        for key, value in where.items()
+    }
+
+    def selected(attributes: dict) -> bool:
+        return all(attributes.get(key) in values for key, values in accepted.items())
+
+    return selected
+
+
+class _TraceBuilder:
+    """
+    Collects the events and case attributes of a single trace while parsing.
+    """
+
+    def __init__(self, parse_timestamps=True, schema: Schema = DEFAULT_SCHEMA):
+        self.parse_timestamps = parse_timestamps
+        self.schema = schema
+
+        self.trace_id = None
+        self.attributes = {}
+
+        self.events = []
+        self.events_withts = []
+
+    def add_attribute(self, attribute: Attribute, value: str):
+        if attribute.name not in self.attributes and value not in self.schema.ignored:
+            self.attributes[attribute.name] = attribute.parse(value)
+
+    def add_event(self, event):
+        single_event = {"name": "", "timestamp": None}
+        event_keys = self.schema.event_keys
+
+        for a in event:
+            attrib = a.attrib
+            key = attrib["key"]
+
+            if key == "concept:name":
+                single_event["name"] = attrib["value"]
+                self.events.append(attrib["value"])
+            elif key == "time:timestamp":
+                if self.parse_timestamps:
+                    single_event["timestamp"] = parse_timestamp(attrib["value"])
+                else:
+                    single_event["timestamp"] = attrib["value"]
+            elif key in event_keys:
+                self.add_attribute(event_keys[key], attrib["value"])
+
+        self.events_withts.append(single_event)
+
+    def build(self) -> dict:
+        trace = {"trace_id": self.trace_id}
+        for name, default in self.schema.defaults.items():
+            trace[name] = self.attributes.get(name, default)
+        trace["events"] = self.events
+        trace["events_with_ts"] = self.events_withts
+        return trace
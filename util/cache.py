@@ -0,0 +1,211 @@
+"""
+Persistent binary cache of parsed event logs.
+
+The columns of an ``EventLog`` are stored as plain ``.npy`` files in a
+``<log file>.cache`` directory next to the source, together with a
+``meta.json`` describing the source file. Later runs memory-map the arrays
+instead of parsing the XML again.
+
+A cache entry is valid for the same absolute path, size and mtime of the
+source. If only the mtime differs (e.g. the file was copied or touched) the
+content hash decides, so an unchanged file is never parsed twice.
+
+Case attributes with object values are stored as int32 codes into a list of
+categories kept in ``meta.json``; dates are stored there as ISO strings, which
+keep the UTC offset of the source.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .event_log import EventLog, parse_timestamp
+
+# bump whenever the layout of the cache or of the EventLog changes
+CACHE_VERSION = 4
+
+META_FILE = "meta.json"
+
+
+def cache_dir(file, key: dict = None) -> str:
+    directory = str(file) + ".cache"
+    if key and "where" in key:
+        # logs filtered on import get an entry of their own next to the full log
+        digest = hashlib.blake2b(
+            json.dumps(key["where"], sort_keys=True).encode(), digest_size=8
+        )
+        directory = os.path.join(directory, "where-" + digest.hexdigest())
+    return directory
+
+
+def file_hash(file) -> str:
+    """
+    :param file: path to the file
+    :return: blake2b hex digest of the file content
+    """
+
+    digest = hashlib.blake2b()
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_cache(file, key: dict = None):
+    """
+    Load the cached event log of the given source file.
+
+    :param file: path to the source log file
+    :param key: additional parameters the log was parsed with
+    :return: event log with memory-mapped columns, None if there is no valid
+    cache entry
+    """
+
+    directory = cache_dir(file, key)
+    meta = _read_meta(directory)
+    if meta is None or meta["key"] != _key(key):
+        return None
+
+    stat = os.stat(file)
+    if meta["source"] != os.path.abspath(file) or meta["size"] != stat.st_size:
+        return None
+    if meta["mtime_ns"] != stat.st_mtime_ns:
+        if meta["hash"] != file_hash(file):
+            return None
+        # same content, remember the new mtime to skip hashing next time
+        meta["mtime_ns"] = stat.st_mtime_ns
+        _write_meta(directory, meta)
+
+    def load(name):
+        return np.load(os.path.join(directory, name + ".npy"), mmap_mode="r")
+
+    attributes = {}
+    for name, categories in meta["attributes"].items():
+        column = load("attribute_" + name)
+        if categories is not None:
+            # categorical column, codes into the list of categories
+            values = [_decode(value) for value in categories]
+            column = _object_array(values + [None])[column]
+        attributes[name] = column
+
+    return EventLog(
+        meta["activities"],
+        load("codes"),
+        load("offsets"),
+        load("timestamps"),
+        load("case_ids"),
+        attributes,
+        load("utc_offsets"),
+    )
+
+
+def write_cache(file, log: EventLog, key: dict = None):
+    """
+    Store the event log parsed from the given source file.
+
+    :param file: path to the source log file
+    :param log: event log parsed from the file
+    :param key: additional parameters the log was parsed with
+    """
+
+    # encode the attributes first, nothing is written for a log that cannot
+    # be cached
+    columns = {}
+    attributes = {}
+    for name, column in log.attributes.items():
+        if column.dtype == object:
+            codes, categories = pd.factorize(column, use_na_sentinel=True)
+            columns[name] = codes.astype(np.int32)
+            attributes[name] = [_encode(value) for value in categories]
+        else:
+            columns[name] = column
+            attributes[name] = None
+
+    stat = os.stat(file)
+    meta = {
+        "key": _key(key),
+        "source": os.path.abspath(file),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": file_hash(file),
+        "activities": log.activities,
+        "attributes": attributes,
+    }
+    # fails before writing on values JSON cannot store
+    json.dumps(meta)
+
+    directory = cache_dir(file, key)
+    os.makedirs(directory, exist_ok=True)
+
+    # the meta file marks a complete entry, drop it while writing
+    meta_path = os.path.join(directory, META_FILE)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    def save(name, array):
+        # replace instead of overwriting, earlier entries may still be mapped
+        path = os.path.join(directory, name + ".npy")
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, np.asarray(array))
+        os.replace(path + ".tmp", path)
+
+    save("codes", log.codes)
+    save("offsets", log.offsets)
+    save("timestamps", log.timestamps)
+    save("utc_offsets", log.utc_offsets)
+    save("case_ids", log.case_ids.astype(str))
+
+    for name, column in columns.items():
+        save("attribute_" + name, column)
+
+    # written last, an entry without it is never read
+    _write_meta(directory, meta)
+
+
+def _key(key: dict) -> dict:
+    return {"version": CACHE_VERSION, **(key or {})}
+
+
+def _read_meta(directory: str):
+    try:
+        with open(os.path.join(directory, META_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(directory: str, meta: dict):
+    # replaced atomically, readers never see a partial file
+    path = os.path.join(directory, META_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(path + ".tmp", path)
+
+
+def _encode(value):
+    """
+    :param value: category of an attribute
+    :return: JSON serializable value, dates as {"date": ISO string}
+    """
+
+    if isinstance(value, datetime):
+        return {"date": value.isoformat()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        return parse_timestamp(value["date"])
+    return value
+
+
+def _object_array(values: list) -> np.ndarray:
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
@@ -0,0 +1,812 @@
+import sys
+from array import array
+from collections.abc import Mapping
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+# case attributes imported for every trace by default, see util.schema
+CASE_ATTRIBUTES = ("vendor", "value", "spend_area", "item_type")
+
+# marker for events without timestamp in the int64 timestamp column
+NAT = np.iinfo(np.int64).min
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# nanoseconds per minute and per day
+MINUTE = 60 * 10**9
+DAY = 24 * 60 * MINUTE
+
+# format of the time:timestamp attribute of XES logs
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+
+# number of raw timestamps converted at once while encoding
+TIMESTAMP_BATCH = 1 << 16
+
+# columns of flat event tables (one row per event), see EventLog.from_frame
+CASE_COLUMN = "case:concept:name"
+ACTIVITY_COLUMN = "concept:name"
+TIMESTAMP_COLUMN = "time:timestamp"
+ATTRIBUTE_COLUMNS = {
+    "vendor": "case:Vendor",
+    "value": "Cumulative net worth (EUR)",
+    "spend_area": "case:Spend area text",
+    "item_type": "case:Item Type",
+}
+
+
+class EventLog:
+    """
+    Columnar, integer-encoded event log.
+
+    Activities are interned to small integer codes and the events of all traces
+    are stored in one contiguous array, CSR-style: the events of trace ``i``
+    are ``codes[offsets[i]:offsets[i + 1]]``. Timestamps (UTC nanoseconds since
+    epoch, ``NAT`` if missing) and their UTC offsets (minutes) are stored in
+    parallel columns, case ids and case attributes in one column per attribute.
+
+    Iterating the log yields read-only trace mappings with the same keys as the
+    dicts returned by ``util.import_xes_log``, so every ``Rule_Checker`` check
+    accepts an ``EventLog`` directly.
+    """
+
+    def __init__(
+        self,
+        activities: list,
+        codes: np.ndarray,
+        offsets: np.ndarray,
+        timestamps: np.ndarray = None,
+        case_ids: np.ndarray = None,
+        attributes: dict = None,
+        utc_offsets: np.ndarray = None,
+    ):
+        """
+        :param activities: activity names, the position in the list is the code
+        :param codes: activity code of every event
+        :param offsets: start of every trace in codes, followed by len(codes)
+        :param timestamps: UTC nanoseconds of every event
+        :param case_ids: id of every trace
+        :param attributes: case attribute name -> value of every trace
+        :param utc_offsets: UTC offset of the timestamp of every event in
+        minutes, 0 for naive or missing timestamps
+        """
+
+        self.activities = list(activities)
+        self.activity_index = {a: i for i, a in enumerate(self.activities)}
+
+        self.codes = codes
+        self.offsets = offsets
+
+        if timestamps is None:
+            timestamps = np.full(len(codes), NAT, dtype=np.int64)
+        self.timestamps = timestamps
+
+        if utc_offsets is None:
+            utc_offsets = np.zeros(len(codes), dtype=np.int16)
+        self.utc_offsets = utc_offsets
+
+        if case_ids is None:
+            case_ids = np.full(len(offsets) - 1, None, dtype=object)
+        self.case_ids = case_ids
+
+        self.attributes = {} if attributes is None else attributes
+
+        self._event_cases = None
+        self._variants = None
+        self._inverted_index = None
+        self._first_positions = None
+        self._last_positions = None
+        self._count_matrix = None
+
+    @classmethod
+    def from_traces(cls, traces, attributes=CASE_ATTRIBUTES):
+        """
+        Encode traces as returned by ``util.iter_xes_log`` in a single pass.
+
+        Timestamps may be datetimes or raw XES timestamp strings, they are
+        converted in bulk, see :func:`parse_timestamps` and
+        :func:`parse_utc_offsets`.
+
+        :param traces: iterable of trace dicts
+        :param attributes: names of the case attributes to keep
+        :return: event log
+        """
+
+        activity_index = {}
+        codes = array("i")
+        timestamps = []
+        utc_offsets = []
+        raw_timestamps = []
+        offsets = array("q", [0])
+        case_ids = []
+        attributes = {name: [] for name in attributes}
+
+        for trace in traces:
+            events_with_ts = trace.get("events_with_ts")
+
+            for i, event in enumerate(trace["events"]):
+                code = activity_index.get(event)
+                if code is None:
+                    code = activity_index[event] = len(activity_index)
+                codes.append(code)
+
+                if events_with_ts is None:
+                    raw_timestamps.append(None)
+                else:
+                    raw_timestamps.append(events_with_ts[i]["timestamp"])
+
+            if len(raw_timestamps) >= TIMESTAMP_BATCH:
+                timestamps.append(parse_timestamps(raw_timestamps))
+                utc_offsets.append(parse_utc_offsets(raw_timestamps))
+                raw_timestamps = []
+
+            offsets.append(len(codes))
+            case_ids.append(trace.get("trace_id"))
+            for name, column in attributes.items():
+                value = trace.get(name, "N/A")
+                column.append(sys.intern(value) if isinstance(value, str) else value)
+
+        timestamps.append(parse_timestamps(raw_timestamps))
+        utc_offsets.append(parse_utc_offsets(raw_timestamps))
+
+        dtype = np.int16 if len(activity_index) <= np.iinfo(np.int16).max else np.int32
+
+        return cls(
+            list(activity_index),
+            np.asarray(codes, dtype=dtype),
+            np.asarray(offsets, dtype=np.int64),
+            np.concatenate(timestamps),
+            _object_column(case_ids),
+            {name: _object_column(column) for name, column in attributes.items()},
+            np.concatenate(utc_offsets),
+        )
+
+    @classmethod
+    def from_frame(
+        cls,
+        frame: pd.DataFrame,
+        case_column=CASE_COLUMN,
+        activity_column=ACTIVITY_COLUMN,
+        timestamp_column=TIMESTAMP_COLUMN,
+        attributes: dict = None,
+        schema=None,
+    ):
+        """
+        Encode a flat event table with one row per event.
+
+        The events of a case keep their order in the table, the cases are
+        ordered by their first event. Case attributes take the first value of
+        the case that is not missing. Without a schema they are strings, "N/A"
+        if the column or value is missing. With a schema they get the types,
+        ignored values and defaults of the XES import.
+
+        :param frame: event table
+        :param case_column: column of the case ids
+        :param activity_column: column of the activity names
+        :param timestamp_column: column of the timestamps, naive timestamps are
+        taken as UTC, optional
+        :param attributes: case attribute name -> column, ``ATTRIBUTE_COLUMNS``
+        by default
+        :param schema: ``util.schema.Schema`` of the attributes, e.g.
+        ``DEFAULT_SCHEMA``; attributes it does not name are strings
+        :return: event log
+        """
+
+        if attributes is None:
+            attributes = ATTRIBUTE_COLUMNS
+
+        cases, case_ids = pd.factorize(frame[case_column], sort=False)
+        order = np.argsort(cases, kind="stable")
+        cases = cases[order]
+
+        offsets = np.zeros(len(case_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cases, minlength=len(case_ids)), out=offsets[1:])
+
+        codes, activities = pd.factorize(frame[activity_column].take(order))
+        dtype = np.int16 if len(activities) <= np.iinfo(np.int16).max else np.int32
+
+        if timestamp_column in frame:
+            column = frame[timestamp_column].take(order)
+            stamps = pd.DatetimeIndex(pd.to_datetime(column, utc=True)).tz_convert(None)
+            # NaT is stored as the smallest int64, i.e. NAT
+            timestamps = stamps.to_numpy(dtype="datetime64[ns]").view(np.int64).copy()
+            utc_offsets = _frame_utc_offsets(column, timestamps)
+        else:
+            timestamps = None
+            utc_offsets = None
+
+        columns = {}
+        for name, column in attributes.items():
+            attribute = None if schema is None else schema.by_name.get(name)
+            default = "N/A" if attribute is None else schema.defaults[name]
+
+            if column not in frame:
+                columns[name] = _object_column([default] * len(case_ids))
+                continue
+
+            values = frame[column].take(order).reset_index(drop=True)
+            if attribute is not None:
+                values = values.where(~values.isin(schema.ignored))
+            values = values.groupby(cases).first().reindex(range(len(case_ids)))
+
+            convert = str if attribute is None else attribute.convert
+            columns[name] = _object_column(
+                [default if pd.isna(v) else convert(v) for v in values.tolist()]
+            )
+
+        return cls(
+            [str(a) for a in activities],
+            codes.astype(dtype),
+            offsets,
+            timestamps,
+            _object_column([str(c) for c in case_ids]),
+            columns,
+            utc_offsets,
+        )
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield _TraceView(self, i)
+
+    def __getitem__(self, i: int):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("trace index out of range")
+        return _TraceView(self, i)
+
+    @property
+    def n_events(self) -> int:
+        return len(self.codes)
+
+    def code(self, activity: str) -> int:
+        """
+        :param activity: name of the activity
+        :return: code of the activity, -1 if it does not occur in the log
+        """
+
+        return self.activity_index.get(activity, -1)
+
+    def trace_codes(self, i: int) -> np.ndarray:
+        """
+        :param i: index of the trace
+        :return: activity codes of the events of the trace
+        """
+
+        return self.codes[self.offsets[i] : self.offsets[i + 1]]
+
+    def trace_lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def event_cases(self) -> np.ndarray:
+        """
+        Index of the trace of every event, computed once on first access.
+        """
+
+        if self._event_cases is None:
+            self._event_cases = np.repeat(
+                np.arange(len(self), dtype=np.int64), self.trace_lengths()
+            )
+        return self._event_cases
+
+    def activity_counts(self, activity: str) -> np.ndarray:
+        """
+        :param activity: name of the activity
+        :return: number of occurrences of the activity in every trace
+        """
+
+        code = self.code(activity)
+        if code < 0:
+            return np.zeros(len(self), dtype=self.count_matrix().dtype)
+        return self.count_matrix()[:, code]
+
+    def count_matrix(self) -> np.ndarray:
+        """
+        Number of occurrences of every activity in every trace, computed once
+        from the inverted index on first access.
+
+        :return: table of traces x activity codes, uint16 unless a trace is
+        longer than 65535 events
+        """
+
+        if self._count_matrix is None:
+            longest = int(self.trace_lengths().max(initial=0))
+            dtype = np.uint16 if longest <= np.iinfo(np.uint16).max else np.uint32
+            self._count_matrix = self.inverted_index().count_table(dtype)
+        return self._count_matrix
+
+    def co_occurrences(self, weights: np.ndarray = None) -> np.ndarray:
+        """
+        Number of traces containing both activities, for all pairs at once.
+
+        :param weights: weight of every trace, e.g. the counts of the variants,
+        1 if None
+        :return: int64 table of activity codes x activity codes, the diagonal
+        holds the number of traces containing the activity
+        """
+
+        present = (self.count_matrix() > 0).astype(np.float64)
+        weighted = present if weights is None else present * weights[:, None]
+        # exact as long as the counts stay below 2**53
+        return np.rint(present.T @ weighted).astype(np.int64)
+
+    def variants(self) -> "Variants":
+        """
+        Group the traces by their activity sequence, computed once on first access.
+
+        :return: variants of the log
+        """
+
+        if self._variants is None:
+            self._variants = Variants.of(self)
+        return self._variants
+
+    def inverted_index(self) -> "InvertedIndex":
+        """
+        Occurrences of every activity, computed once on first access.
+
+        :return: inverted index of the log
+        """
+
+        if self._inverted_index is None:
+            self._inverted_index = InvertedIndex.of(self)
+        return self._inverted_index
+
+    def first_positions(self) -> np.ndarray:
+        """
+        Position of the first occurrence of every activity in every trace,
+        computed once on first access.
+
+        :return: int32 table of traces x activity codes, -1 if the activity
+        does not occur in the trace
+        """
+
+        if self._first_positions is None:
+            self._first_positions = self.inverted_index().occurrence_table(last=False)
+        return self._first_positions
+
+    def last_positions(self) -> np.ndarray:
+        """
+        Position of the last occurrence of every activity in every trace,
+        computed once on first access.
+
+        :return: int32 table of traces x activity codes, -1 if the activity
+        does not occur in the trace
+        """
+
+        if self._last_positions is None:
+            self._last_positions = self.inverted_index().occurrence_table(last=True)
+        return self._last_positions
+
+
+class Variants:
+    """
+    Distinct activity sequences of an ``EventLog``.
+
+    ``log`` holds every sequence once, in order of first occurrence, without
+    timestamps and case attributes. Checks that only depend on the sequence
+    run on it and weight their per-variant results by ``counts``; ``inverse``
+    maps every trace of the original log to its variant.
+    """
+
+    def __init__(self, log: EventLog, inverse: np.ndarray, counts: np.ndarray):
+        """
+        :param log: one trace per variant
+        :param inverse: variant of every trace of the original log
+        :param counts: number of traces of every variant
+        """
+
+        self.log = log
+        self.inverse = inverse
+        self.counts = counts
+
+    @classmethod
+    def of(cls, log: EventLog):
+        """
+        :param log: event log
+        :return: variants of the log
+        """
+
+        index = {}
+        representatives = []
+        inverse = np.empty(len(log), dtype=np.int64)
+
+        codes = log.codes
+        bounds = log.offsets.tolist()
+        for i in range(len(log)):
+            key = codes[bounds[i] : bounds[i + 1]].tobytes()
+            variant = index.get(key)
+            if variant is None:
+                variant = index[key] = len(representatives)
+                representatives.append(i)
+            inverse[i] = variant
+
+        representatives = np.asarray(representatives, dtype=np.int64)
+        lengths = log.trace_lengths()[representatives]
+        offsets = np.zeros(len(representatives) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        # gather the events of the representative traces
+        starts = np.repeat(log.offsets[:-1][representatives] - offsets[:-1], lengths)
+        events = starts + np.arange(offsets[-1], dtype=np.int64)
+
+        return cls(
+            EventLog(
+                log.activities,
+                np.asarray(codes)[events],
+                offsets,
+                case_ids=log.case_ids[representatives],
+            ),
+            inverse,
+            np.bincount(inverse, minlength=len(representatives)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def total(self, values: np.ndarray) -> int:
+        """
+        :param values: per-variant values, e.g. violations or a boolean mask
+        :return: sum of the values over all traces of the original log
+        """
+
+        return int(np.dot(np.asarray(values, dtype=np.int64), self.counts))
+
+    def cases(self, mask: np.ndarray) -> np.ndarray:
+        """
+        :param mask: per-variant boolean mask
+        :return: indices of the traces of the original log in a selected variant
+        """
+
+        return np.flatnonzero(np.asarray(mask)[self.inverse])
+
+
+class InvertedIndex:
+    """
+    Occurrences of every activity of an ``EventLog``.
+
+    The events are grouped by activity code, in log order within a group, so
+    the occurrences of an activity are a slice: the event positions in the
+    log, the traces they belong to (sorted) and their positions within the
+    trace. Checks only visit the traces and events of their activities this
+    way, rare activities cost time proportional to their occurrences.
+    """
+
+    def __init__(
+        self,
+        log: EventLog,
+        starts: np.ndarray,
+        events: np.ndarray,
+        cases: np.ndarray,
+        positions: np.ndarray,
+    ):
+        """
+        :param log: event log
+        :param starts: start of the occurrences of every code, followed by the
+        number of events
+        :param events: positions of the grouped events in the log
+        :param cases: trace of every grouped event
+        :param positions: position of every grouped event within its trace
+        """
+
+        self.log = log
+        self.starts = starts
+        self.grouped_events = events
+        self.grouped_cases = cases
+        self.grouped_positions = positions
+
+    @classmethod
+    def of(cls, log: EventLog):
+        """
+        :param log: event log
+        :return: inverted index of the log
+        """
+
+        # stable, so the events of an activity stay in log order
+        events = np.argsort(log.codes, kind="stable")
+
+        starts = np.zeros(len(log.activities) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(log.codes, minlength=len(log.activities)), out=starts[1:])
+
+        cases = log.event_cases[events]
+        positions = events - log.offsets[cases]
+
+        return cls(log, starts, events, cases, positions)
+
+    def _slice(self, activity: str) -> slice:
+        code = self.log.code(activity)
+        if code < 0:
+            return slice(0, 0)
+        return slice(self.starts[code], self.starts[code + 1])
+
+    def count(self, activity: str) -> int:
+        """
+        :return: number of occurrences of the activity in the log
+        """
+
+        occurrences = self._slice(activity)
+        return int(occurrences.stop - occurrences.start)
+
+    def events(self, activity: str) -> np.ndarray:
+        """
+        :return: positions of the occurrences of the activity in the log, sorted
+        """
+
+        return self.grouped_events[self._slice(activity)]
+
+    def cases(self, activity: str) -> np.ndarray:
+        """
+        :return: trace of every occurrence of the activity, sorted
+        """
+
+        return self.grouped_cases[self._slice(activity)]
+
+    def positions(self, activity: str) -> np.ndarray:
+        """
+        :return: position within its trace of every occurrence of the activity
+        """
+
+        return self.grouped_positions[self._slice(activity)]
+
+    def traces(self, activity: str) -> np.ndarray:
+        """
+        :return: indices of the traces containing the activity, sorted
+        """
+
+        cases = self.cases(activity)
+        if len(cases) == 0:
+            return cases
+        first = np.ones(len(cases), dtype=bool)
+        np.not_equal(cases[1:], cases[:-1], out=first[1:])
+        return cases[first]
+
+    def runs(self) -> tuple:
+        """
+        The groups are sorted by code, then trace, then position, so the
+        occurrences of an activity in a trace are a run of grouped events.
+
+        :return: start of every run in the grouped events, followed by the
+        number of events, and the trace and activity code of every run
+        """
+
+        log = self.log
+        codes = np.repeat(
+            np.arange(len(log.activities), dtype=np.int64), np.diff(self.starts)
+        )
+        cases = self.grouped_cases
+
+        edge = np.ones(len(cases), dtype=bool)
+        np.not_equal(cases[1:], cases[:-1], out=edge[1:])
+        edge[1:] |= codes[1:] != codes[:-1]
+
+        starts = np.flatnonzero(edge)
+        return np.append(starts, len(cases)), cases[starts], codes[starts]
+
+    def occurrence_table(self, last=False) -> np.ndarray:
+        """
+        :param last: position of the last instead of the first occurrence
+        :return: int32 table of traces x activity codes holding the position of
+        the first (last) occurrence of the activity in the trace, -1 if absent
+        """
+
+        bounds, cases, codes = self.runs()
+        events = bounds[1:] - 1 if last else bounds[:-1]
+
+        table = np.full((len(self.log), len(self.log.activities)), -1, dtype=np.int32)
+        table[cases, codes] = self.grouped_positions[events]
+        return table
+
+    def count_table(self, dtype=np.int64) -> np.ndarray:
+        """
+        :param dtype: type of the counts
+        :return: table of traces x activity codes holding the number of
+        occurrences of the activity in the trace
+        """
+
+        bounds, cases, codes = self.runs()
+
+        table = np.zeros((len(self.log), len(self.log.activities)), dtype=dtype)
+        table[cases, codes] = np.diff(bounds)
+        return table
+
+    def union(self, activities) -> np.ndarray:
+        """
+        :param activities: names of activities
+        :return: positions of the occurrences of any of the activities in the
+        log, sorted
+        """
+
+        events = [self.events(a) for a in dict.fromkeys(activities)]
+        if len(events) == 1:
+            return events[0]
+        events = np.concatenate(events)
+        events.sort(kind="stable")
+        return events
+
+
+class _TraceView(Mapping):
+    """
+    Read-only dict view of a single trace of an ``EventLog``.
+    """
+
+    __slots__ = ("_log", "_index", "_cache")
+
+    def __init__(self, log: EventLog, index: int):
+        self._log = log
+        self._index = index
+        self._cache = {}
+
+    def _keys(self):
+        return (
+            ("trace_id",) + tuple(self._log.attributes) + ("events", "events_with_ts")
+        )
+
+    def __getitem__(self, key):
+        if key in self._cache:
+            return self._cache[key]
+
+        log = self._log
+        i = self._index
+
+        if key == "trace_id":
+            value = log.case_ids[i]
+            if isinstance(value, np.str_):
+                value = str(value)
+        elif key in log.attributes:
+            value = log.attributes[key][i]
+        elif key == "events":
+            activities = log.activities
+            value = [activities[c] for c in log.trace_codes(i).tolist()]
+        elif key == "events_with_ts":
+            start, end = log.offsets[i], log.offsets[i + 1]
+            value = [
+                {"name": name, "timestamp": to_datetime(ts, offset)}
+                for name, ts, offset in zip(
+                    self["events"],
+                    log.timestamps[start:end].tolist(),
+                    log.utc_offsets[start:end].tolist(),
+                )
+            ]
+        else:
+            raise KeyError(key)
+
+        self._cache[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+
+def parse_timestamps(values: list) -> np.ndarray:
+    """
+    Convert timestamps to UTC nanoseconds since epoch in bulk.
+
+    The values are XES timestamp strings, datetimes or None. Strings in the
+    usual XES format are parsed in one vectorized call, anything else (e.g.
+    "Z" instead of an offset or no fraction of seconds) falls back to a
+    general ISO 8601 parser.
+
+    :param values: timestamps
+    :return: int64 nanoseconds, NAT for missing timestamps
+    """
+
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    try:
+        stamps = pd.to_datetime(values, format=TIMESTAMP_FORMAT, utc=True)
+    except ValueError:
+        stamps = pd.to_datetime(values, format="ISO8601", utc=True)
+
+    return (
+        stamps.tz_convert(None).to_numpy(dtype="datetime64[ns]").view(np.int64).copy()
+    )
+
+
+def parse_utc_offsets(values: list) -> np.ndarray:
+    """
+    UTC offsets of timestamps, the local time of an event is its timestamp
+    plus the offset.
+
+    :param values: XES timestamp strings, datetimes or None
+    :return: int16 minutes, 0 for naive and missing timestamps
+    """
+
+    # XES timestamps end with their offset, e.g. "+01:00", parse one per offset
+    known = {}
+
+    def minutes(value) -> int:
+        if value is None:
+            return 0
+        if not isinstance(value, str):
+            return _offset_minutes(value)
+        suffix = value[-6:]
+        if suffix[:1] in ("+", "-") and suffix[3:4] == ":":
+            offset = known.get(suffix)
+            if offset is None:
+                offset = known[suffix] = _offset_minutes(parse_timestamp(value))
+            return offset
+        return _offset_minutes(parse_timestamp(value))
+
+    return np.fromiter((minutes(v) for v in values), dtype=np.int16, count=len(values))
+
+
+def _offset_minutes(timestamp: datetime) -> int:
+    offset = timestamp.utcoffset()
+    return 0 if offset is None else offset // timedelta(minutes=1)
+
+
+def _frame_utc_offsets(column: pd.Series, timestamps: np.ndarray) -> np.ndarray:
+    """
+    UTC offsets of a timestamp column of an event table, see
+    ``EventLog.from_frame``.
+    """
+
+    if isinstance(column.dtype, pd.DatetimeTZDtype):
+        # local time minus UTC, per row for time zones with daylight saving
+        local = column.dt.tz_localize(None).to_numpy(dtype="datetime64[ns]")
+        minutes = (local.view(np.int64) - timestamps) // MINUTE
+        minutes[timestamps == NAT] = 0
+        return minutes.astype(np.int16)
+    if column.dtype == object or pd.api.types.is_string_dtype(column.dtype):
+        values = [None if pd.isna(v) else v for v in column.tolist()]
+        return parse_utc_offsets(values)
+    return None
+
+
+def parse_timestamp(value: str) -> datetime:
+    """
+    :param value: XES timestamp, e.g. "2018-01-03T09:49:00.000+01:00"
+    :return: timezone aware datetime
+    """
+
+    try:
+        # much faster than strptime and covers the XES format
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, TIMESTAMP_FORMAT)
+
+
+def to_nanoseconds(timestamp: datetime) -> int:
+    """
+    :param timestamp: datetime, naive datetimes are taken as UTC
+    :return: nanoseconds since epoch, NAT if timestamp is None
+    """
+
+    if timestamp is None:
+        return NAT
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return (timestamp - EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def to_datetime(nanoseconds: int, utc_offset=0) -> datetime:
+    """
+    :param nanoseconds: nanoseconds since epoch
+    :param utc_offset: UTC offset of the result in minutes
+    :return: timezone aware datetime, None if nanoseconds is NAT
+    """
+
+    if nanoseconds == NAT:
+        return None
+    timestamp = EPOCH + timedelta(microseconds=nanoseconds // 1000)
+    if utc_offset:
+        timestamp = timestamp.astimezone(timezone(timedelta(minutes=utc_offset)))
+    return timestamp
+
+
+def _object_column(values: list) -> np.ndarray:
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
@@ -0,0 +1,407 @@
+"""
+Synthetic BPIC19-shaped event logs of arbitrary size.
+
+Cases come from a model: either the variant distribution of a source log
+(``LogSample``) or a parameterised 3-way matching process (``ProcessModel``).
+On top of that, violations of the ``Rule_Checker`` checks are injected at
+given rates, see ``VIOLATIONS``.
+
+:func:`generate` yields one trace dict at a time, in the format of
+``util.iter_xes_log``, and the writers consume them one at a time, so
+generating a log of any size takes constant memory::
+
+    traces = generate(1_000_000, ProcessModel(), {"rir_before_rgr": 0.05})
+    write_xes(traces, "synthetic.xes.gz")
+
+``EventLog.from_traces(generate(...))`` builds the log in memory directly.
+"""
+
+import bisect
+import gzip
+import random
+from datetime import datetime, timedelta, timezone
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+
+from .event_log import (
+    ACTIVITY_COLUMN,
+    ATTRIBUTE_COLUMNS,
+    CASE_COLUMN,
+    TIMESTAMP_COLUMN,
+    EventLog,
+    to_datetime,
+)
+from .schema import DEFAULT_SCHEMA, Schema
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional, only needed for Parquet output
+    pyarrow = None
+
+RGR = "Record Goods Receipt"
+RIR = "Record Invoice Receipt"
+CI = "Clear Invoice"
+
+# minutes per day
+MINUTES = 24 * 60
+
+SPEND_AREAS = (
+    "Sales",
+    "Logistics",
+    "Packaging",
+    "Marketing",
+    "Facility Management",
+    "Workforce Services",
+    "Product Inventory",
+)
+
+
+class LogSample:
+    """
+    Cases drawn from the variant distribution of a source log.
+
+    A variant is drawn with its relative frequency, then one of its cases,
+    whose timestamps and case attributes are copied.
+    """
+
+    def __init__(self, source: EventLog, top: int = None):
+        """
+        :param source: log to sample from
+        :param top: draw only from the most frequent variants
+        """
+
+        self.source = source
+
+        variants = source.variants()
+        order = np.argsort(-variants.counts, kind="stable")
+        if top is not None:
+            order = order[:top]
+
+        # cases of every variant, grouped
+        cases = np.argsort(variants.inverse, kind="stable")
+        starts = np.zeros(len(variants) + 1, dtype=np.int64)
+        np.cumsum(variants.counts, out=starts[1:])
+        self.cases = [cases[starts[v] : starts[v + 1]].tolist() for v in order]
+
+        self.cumulative = np.cumsum(variants.counts[order]).tolist()
+
+    def case(self, rng: random.Random) -> tuple:
+        """
+        :param rng: random generator
+        :return: (activities, timestamps, case attributes)
+        """
+
+        variant = bisect.bisect_right(
+            self.cumulative, rng.random() * self.cumulative[-1]
+        )
+        i = rng.choice(self.cases[variant])
+
+        source = self.source
+        start, end = source.offsets[i], source.offsets[i + 1]
+        activities = source.activities
+        events = [activities[c] for c in source.codes[start:end].tolist()]
+        timestamps = [
+            to_datetime(ts, offset)
+            for ts, offset in zip(
+                source.timestamps[start:end].tolist(),
+                source.utc_offsets[start:end].tolist(),
+            )
+        ]
+        attributes = {
+            name: column[i].item() if hasattr(column[i], "item") else column[i]
+            for name, column in source.attributes.items()
+        }
+        return events, timestamps, attributes
+
+
+class ProcessModel:
+    """
+    Parameterised 3-way matching process, invoice after goods receipt.
+
+    Every case creates a purchase order item, optionally after a requisition
+    and followed by a vendor invoice, and then runs one or more blocks of goods
+    receipt, invoice receipt and clear invoice. Without injected violations
+    every case conforms to the balanced order checks; blocks left uncleared
+    (``cleared`` < 1) violate ``check_rir_ci`` like open invoices do.
+    """
+
+    def __init__(
+        self,
+        requisition=0.3,
+        vendor_invoice=0.4,
+        extra_blocks=0.3,
+        payment_block=0.1,
+        cleared=1.0,
+        mean_delay=7.0,
+        start=datetime(2018, 1, 1, tzinfo=timezone.utc),
+        days=365,
+        vendors=1000,
+    ):
+        """
+        :param requisition: probability of a purchase requisition
+        :param vendor_invoice: probability of "Vendor creates invoice"
+        :param extra_blocks: probability of one more receipt block, the number
+        of blocks is geometric
+        :param payment_block: probability of "Remove Payment Block" per block
+        :param cleared: probability that a block ends with "Clear Invoice"
+        :param mean_delay: mean days between two events, exponential
+        :param start: earliest case start
+        :param days: cases start uniformly within these many days after start
+        :param vendors: number of vendors, their frequency follows a power law
+        """
+
+        self.requisition = requisition
+        self.vendor_invoice = vendor_invoice
+        self.extra_blocks = extra_blocks
+        self.payment_block = payment_block
+        self.cleared = cleared
+        self.mean_delay = mean_delay
+        self.start = start
+        self.days = days
+        self.vendors = vendors
+
+    def case(self, rng: random.Random) -> tuple:
+        """
+        :param rng: random generator
+        :return: (activities, timestamps, case attributes)
+        """
+
+        events = []
+        if rng.random() < self.requisition:
+            events.append("Create Purchase Requisition Item")
+        events.append("Create Purchase Order Item")
+        if rng.random() < self.vendor_invoice:
+            events.append("Vendor creates invoice")
+
+        while True:
+            events.append(RGR)
+            events.append(RIR)
+            if rng.random() < self.payment_block:
+                events.append("Remove Payment Block")
+            if rng.random() < self.cleared:
+                events.append(CI)
+            if rng.random() >= self.extra_blocks:
+                break
+
+        # whole minutes, like the BPIC19 timestamps
+        timestamp = self.start + timedelta(
+            minutes=int(rng.random() * self.days * MINUTES)
+        )
+        timestamps = []
+        for _ in events:
+            timestamps.append(timestamp)
+            delay = rng.expovariate(1 / self.mean_delay)
+            timestamp += timedelta(minutes=int(delay * MINUTES))
+
+        vendor = int(rng.paretovariate(1.0)) % self.vendors
+        attributes = {
+            "vendor": "vendorID_%04d" % vendor,
+            "value": round(rng.lognormvariate(6, 1.5), 2),
+            "spend_area": rng.choice(SPEND_AREAS),
+            "item_type": "Standard",
+        }
+        return events, timestamps, attributes
+
+
+def _move_before_first(events: list, timestamps: list, activity: str):
+    # moves the first occurrence of the activity (or a new one) right before
+    # the first goods receipt, the number of occurrences stays the same
+    if activity in events:
+        i = events.index(activity)
+        del events[i]
+        del timestamps[i]
+    if RGR not in events:
+        events.append(RGR)
+        timestamps.append(timestamps[-1] if timestamps else None)
+    i = events.index(RGR)
+    events.insert(i, activity)
+    timestamps.insert(i, timestamps[i])
+
+
+def _rir_before_rgr(events: list, timestamps: list):
+    _move_before_first(events, timestamps, RIR)
+
+
+def _ci_before_rgr(events: list, timestamps: list):
+    _move_before_first(events, timestamps, CI)
+
+
+def _unmatched_ci(events: list, timestamps: list):
+    # one clear invoice more than there are invoice receipts
+    last = timestamps[-1] if timestamps else None
+    events.append(CI)
+    timestamps.append(None if last is None else last + timedelta(days=1))
+
+
+# name -> mutation of (activities, timestamps) that makes the case violate
+# Rule_Checker.check_rir_rgr, check_rgr_ci and check_rir_ci respectively.
+# A clear invoice before the goods receipt usually precedes the invoice
+# receipt as well and then also violates check_rir_ci.
+VIOLATIONS = {
+    "rir_before_rgr": _rir_before_rgr,
+    "ci_before_rgr": _ci_before_rgr,
+    "unmatched_ci": _unmatched_ci,
+}
+
+
+def generate(cases: int, model, violations: dict = None, seed=0, prefix="synthetic_"):
+    """
+    Generate traces one at a time.
+
+    :param cases: number of traces
+    :param model: ``LogSample`` or ``ProcessModel``
+    :param violations: name in VIOLATIONS -> probability that a trace gets it,
+    independently of the other violations
+    :param seed: seed of the random generator
+    :param prefix: prefix of the case ids, followed by the number of the trace
+    :return: generator of traces, see ``util.iter_xes_log``
+    """
+
+    violations = dict(violations or {})
+    for name in violations:
+        if name not in VIOLATIONS:
+            raise ValueError("Unknown violation %r" % name)
+
+    rng = random.Random(seed)
+
+    for n in range(cases):
+        events, timestamps, attributes = model.case(rng)
+        for name, rate in violations.items():
+            if rng.random() < rate:
+                VIOLATIONS[name](events, timestamps)
+
+        trace = {"trace_id": "%s%d" % (prefix, n)}
+        trace.update(attributes)
+        trace["events"] = events
+        trace["events_with_ts"] = [
+            {"name": event, "timestamp": timestamp}
+            for event, timestamp in zip(events, timestamps)
+        ]
+        yield trace
+
+
+def write_xes(traces, file, schema: Schema = DEFAULT_SCHEMA):
+    """
+    Write traces as XES that ``util.import_xes_log`` reads back with the same
+    schema, gzip compressed if the file name ends with ".gz".
+
+    :param traces: iterable of traces, e.g. :func:`generate`
+    :param file: path of the XES file
+    :param schema: XES keys of the case attributes, the first attribute of
+    every name is written
+    """
+
+    attributes = {}
+    for attribute in schema.attributes:
+        attributes.setdefault(attribute.name, attribute)
+
+    opener = gzip.open if str(file).endswith(".gz") else open
+    with opener(file, "wt", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8" ?>\n')
+        f.write('<log xes.version="1.0" xmlns="http://www.xes-standard.org">\n')
+
+        for trace in traces:
+            f.write("<trace>\n")
+            f.write(
+                '<string key="concept:name" value=%s/>\n' % quoteattr(trace["trace_id"])
+            )
+
+            event_attributes = []
+            for name, attribute in attributes.items():
+                value = trace.get(name)
+                if value is None or value == schema.default:
+                    continue
+                if attribute.xes_type == "date":
+                    value = value.isoformat(timespec="milliseconds")
+                elif attribute.xes_type == "boolean":
+                    value = "true" if value else "false"
+                line = "<%s key=%s value=%s/>\n" % (
+                    attribute.xes_type,
+                    quoteattr(attribute.key),
+                    quoteattr(str(value)),
+                )
+                if attribute.level == "trace":
+                    f.write(line)
+                else:
+                    event_attributes.append(line)
+
+            for event in trace["events_with_ts"]:
+                f.write("<event>\n")
+                f.write(
+                    '<string key="concept:name" value=%s/>\n' % quoteattr(event["name"])
+                )
+                if event["timestamp"] is not None:
+                    f.write(
+                        '<date key="time:timestamp" value="%s"/>\n'
+                        % event["timestamp"].isoformat(timespec="milliseconds")
+                    )
+                f.writelines(event_attributes)
+                f.write("</event>\n")
+
+            f.write("</trace>\n")
+
+        f.write("</log>\n")
+
+
+def write_parquet(traces, file, attributes: dict = None, batch_size=1 << 16):
+    """
+    Write traces as a Parquet event table (one row per event) that
+    ``util.load_event_table`` reads back. Requires pyarrow.
+
+    :param traces: iterable of traces, e.g. :func:`generate`
+    :param file: path of the Parquet file
+    :param attributes: case attribute name -> column, ``ATTRIBUTE_COLUMNS`` by
+    default
+    :param batch_size: events per row group
+    """
+
+    if pyarrow is None:
+        raise ImportError("Writing Parquet logs requires the 'pyarrow' package")
+
+    if attributes is None:
+        attributes = ATTRIBUTE_COLUMNS
+
+    columns = [CASE_COLUMN, ACTIVITY_COLUMN, TIMESTAMP_COLUMN]
+    columns += list(attributes.values())
+    rows = {column: [] for column in columns}
+
+    writer = None
+    try:
+        for trace in traces:
+            for event in trace["events_with_ts"]:
+                rows[CASE_COLUMN].append(trace["trace_id"])
+                rows[ACTIVITY_COLUMN].append(event["name"])
+                rows[TIMESTAMP_COLUMN].append(event["timestamp"])
+                for name, column in attributes.items():
+                    rows[column].append(trace.get(name))
+
+            if len(rows[CASE_COLUMN]) >= batch_size:
+                writer = _write_rows(writer, file, rows)
+
+        if writer is None or rows[CASE_COLUMN]:
+            writer = _write_rows(writer, file, rows)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _write_rows(writer, file, rows: dict):
+    table = pyarrow.table(
+        {
+            column: (
+                pyarrow.array(values, pyarrow.timestamp("ns", tz="UTC"))
+                if column == TIMESTAMP_COLUMN
+                else pyarrow.array(values)
+            )
+            for column, values in rows.items()
+        }
+    )
+    if writer is None:
+        writer = pyarrow.parquet.ParquetWriter(file, table.schema)
+    writer.write_table(table)
+
+    for values in rows.values():
+        values.clear()
+    return writer
@@ -0,0 +1,151 @@
+"""
+Declarative schema of the attributes imported from XES logs.
+
+Every ``Attribute`` names an XES key, whether it is read from the trace itself
+or from its events, and its XES type. The importer turns the schema into
+key -> attribute lookup tables, so every XES attribute element costs one dict
+lookup, and stores the typed value under the attribute's name in the trace.
+"""
+
+from datetime import datetime
+
+import pandas as pd
+
+from .event_log import parse_timestamp
+
+
+def _parse_boolean(value: str) -> bool:
+    return value.lower() == "true"
+
+
+def _to_datetime(value) -> datetime:
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, datetime):
+        return value
+    raise TypeError("Cannot convert %r to a date" % (value,))
+
+
+# XES type -> parser of the raw value
+PARSERS = {
+    "string": str,
+    "int": int,
+    "float": float,
+    "boolean": _parse_boolean,
+    "date": parse_timestamp,
+}
+
+# XES type -> conversion of an already typed value, e.g. of a Parquet column
+CONVERTERS = {
+    "string": str,
+    "int": int,
+    "float": float,
+    "boolean": bool,
+    "date": _to_datetime,
+}
+
+
+class Attribute:
+    """
+    Case attribute imported from an XES key.
+    """
+
+    def __init__(self, name: str, key: str, xes_type="string", level="trace"):
+        """
+        :param name: name of the attribute in the imported traces
+        :param key: XES key of the attribute
+        :param xes_type: "string", "int", "float", "boolean" or "date"
+        :param level: "trace" for attributes of the trace element, "event" for
+        attributes of its events, the first event with a value wins
+        """
+
+        if xes_type not in PARSERS:
+            raise ValueError("Unknown XES type %r" % xes_type)
+        if level not in ("trace", "event"):
+            raise ValueError("Unknown attribute level %r" % level)
+
+        self.name = name
+        self.key = key
+        self.xes_type = xes_type
+        self.level = level
+        self.parse = PARSERS[xes_type]
+
+    def convert(self, value):
+        """
+        :param value: raw XES value or typed value, e.g. of an event table
+        :return: value of the attribute's type
+        """
+
+        if isinstance(value, str):
+            return self.parse(value)
+        return CONVERTERS[self.xes_type](value)
+
+    def __repr__(self) -> str:
+        return "Attribute(%r, %r, %r, %r)" % (
+            self.name,
+            self.key,
+            self.xes_type,
+            self.level,
+        )
+
+
+class Schema:
+    """
+    Attributes imported for every trace.
+
+    Several attributes may share a name, e.g. to read the same attribute from
+    differently exported logs; the first value found is kept. Values listed
+    in ``ignored`` (the artificial start and end events of Disco exports) are
+    skipped. Traces without a value get ``default`` for string attributes and
+    None for all other types.
+    """
+
+    def __init__(self, attributes: list, ignored=("Start", "End"), default="N/A"):
+        self.attributes = list(attributes)
+        self.ignored = frozenset(ignored)
+        self.default = default
+
+        # name -> first attribute of the name, which decides the type
+        self.by_name = {}
+        for attribute in self.attributes:
+            self.by_name.setdefault(attribute.name, attribute)
+        self.names = tuple(self.by_name)
+
+        self.defaults = {}
+        for attribute in self.attributes:
+            self.defaults.setdefault(
+                attribute.name, default if attribute.xes_type == "string" else None
+            )
+
+        self.trace_keys = {}
+        self.event_keys = {}
+        for attribute in self.attributes:
+            keys = self.trace_keys if attribute.level == "trace" else self.event_keys
+            keys.setdefault(attribute.key, attribute)
+
+    def key(self) -> list:
+        """
+        :return: JSON serializable description, e.g. for cache keys
+        """
+
+        return [[a.name, a.key, a.xes_type, a.level] for a in self.attributes] + [
+            sorted(self.ignored),
+            self.default,
+        ]
+
+
+# BPIC19 case attributes. The real log carries them at trace level, the legacy
+# keys are the event attributes of logs pre-processed for earlier versions of
+# the importer.
+DEFAULT_SCHEMA = Schema(
+    [
+        Attribute("vendor", "(case) Vendor"),
+        Attribute("value", "Cumulative net worth (EUR)", "float", level="event"),
+        Attribute("spend_area", "(case) Spend area text"),
+        Attribute("item_type", "(case) Item Type"),
+        Attribute("vendor", "(case)_Vendor", level="event"),
+        Attribute("value", "Cumulative_net_worth_(EUR)", "float", level="event"),
+        Attribute("spend_area", "(case)_Spend_area_text", level="event"),
+        Attribute("item_type", "(case)_Item_Type", level="event"),
+    ]
+)